@@ -0,0 +1,310 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+try:
+    from .rolling_stats import RollingMedianMAD
+except ImportError:
+    from rolling_stats import RollingMedianMAD
+
+RISK_ORDER = ("NONE", "LOW", "MEDIUM", "HIGH")
+
+@dataclass
+class FlowSample:
+    time_seconds: float
+    risk_level: str
+    mean_flow_mag: float
+    z_score: float
+    active_ratio: float
+    zone: Optional[str] = None
+    zone_z_score: float = 0.0
+
+def risk_from_z(z: float, z_low: float, z_med: float, z_high: float) -> str:
+    if z > z_high:
+        return "HIGH"
+    if z > z_med:
+        return "MEDIUM"
+    if z > z_low:
+        return "LOW"
+    return "NONE"
+
+def resolve_zone_names(grid: Optional[Sequence[int]] = None, polygons: Optional[Sequence] = None, names: Optional[Sequence[str]] = None) -> List[str]:
+    if grid is not None:
+        defaults = [f"r{r + 1}c{c + 1}" for r in range(int(grid[0])) for c in range(int(grid[1]))]
+    else:
+        defaults = [f"zone{i + 1}" for i in range(len(polygons or ()))]
+    names = list(names or ())
+    return [str(names[i]) if i < len(names) and names[i] else default for i, default in enumerate(defaults)]
+
+def zone_labels(shape: Tuple[int, int], *, grid: Optional[Sequence[int]] = None, polygons: Optional[Sequence] = None) -> np.ndarray:
+    # Label image: 0 outside every zone, i + 1 inside zone i; later polygons win where they overlap.
+    h, w = shape
+    if grid is not None:
+        rows, cols = int(grid[0]), int(grid[1])
+        return ((np.arange(h) * rows // h)[:, None] * cols + (np.arange(w) * cols // w)[None, :] + 1).astype(np.int32)
+    import cv2
+
+    labels = np.zeros((h, w), dtype=np.int32)
+    for i, points in enumerate(polygons or ()):
+        pts = np.round(np.asarray(points, dtype=np.float64).reshape(-1, 2) * (w, h)).astype(np.int32)
+        cv2.fillPoly(labels, [pts], i + 1)
+    return labels
+
+class FlowMeter:
+    # Farneback flow statistics between sampled frames, written into buffers allocated once per resolution.
+    def __init__(
+        self,
+        *,
+        resize_width: int = 320,
+        active_mag_threshold: float = 1.0,
+        use_initial_flow: bool = False,
+        iterations: int = 3,
+        initial_flow_iterations: int = 2,
+        zone_grid: Optional[Sequence[int]] = None,
+        zone_polygons: Optional[Sequence] = None,
+    ) -> None:
+        if zone_grid is not None and zone_polygons:
+            raise ValueError("Use either a zone grid or zone polygons, not both")
+        self.resize_width = int(resize_width)
+        self.active_mag_threshold = float(active_mag_threshold)
+        self.use_initial_flow = bool(use_initial_flow)
+        self.iterations = max(1, int(iterations))
+        self.initial_flow_iterations = max(1, int(initial_flow_iterations))
+        self._resized: Optional[np.ndarray] = None
+        self._gray: Optional[np.ndarray] = None
+        self._prev: Optional[np.ndarray] = None
+        self._flow: Optional[np.ndarray] = None
+        self._fx: Optional[np.ndarray] = None
+        self._fy: Optional[np.ndarray] = None
+        self._mag: Optional[np.ndarray] = None
+        self._mask: Optional[np.ndarray] = None
+        self._flow_valid = False
+        self.zone_grid = None if zone_grid is None else (int(zone_grid[0]), int(zone_grid[1]))
+        self.zone_polygons = [] if zone_grid is not None else list(zone_polygons or ())
+        self.zone_count = self.zone_grid[0] * self.zone_grid[1] if self.zone_grid else len(self.zone_polygons)
+        self._labels: Optional[np.ndarray] = None
+        self._zone_pixels: Optional[np.ndarray] = None
+        self._zone_weights: Optional[np.ndarray] = None
+
+    def reset(self) -> None:
+        if self._prev is not None and self._gray is None:
+            self._gray = self._prev
+        self._prev = None
+        self._flow_valid = False
+
+    @property
+    def prev_gray(self) -> Optional[np.ndarray]:
+        return self._prev
+
+    @property
+    def prev_flow(self) -> Optional[np.ndarray]:
+        return self._flow if self._flow_valid else None
+
+    def set_prev(self, gray: Optional[np.ndarray], flow: Optional[np.ndarray] = None) -> None:
+        self._prev = None if gray is None else np.array(gray, dtype=np.uint8, copy=True)
+        self._flow_valid = False
+        if self._prev is not None and flow is not None:
+            self._ensure_flow_buffers(self._prev.shape)
+            np.copyto(self._flow, flow)
+            self._flow_valid = True
+
+    def _to_gray(self, frame_bgr: np.ndarray) -> np.ndarray:
+        import cv2
+
+        h, w = frame_bgr.shape[:2]
+        src = frame_bgr
+        if w > 0 and self.resize_width > 0 and w != self.resize_width:
+            new_w = int(self.resize_width)
+            new_h = max(1, int(h * (new_w / w)))
+            if self._resized is None or self._resized.shape != (new_h, new_w) + frame_bgr.shape[2:]:
+                self._resized = np.empty((new_h, new_w) + frame_bgr.shape[2:], dtype=frame_bgr.dtype)
+            src = cv2.resize(frame_bgr, (new_w, new_h), dst=self._resized, interpolation=cv2.INTER_AREA)
+
+        if self._gray is None or self._gray.shape != src.shape[:2]:
+            self._gray = np.empty(src.shape[:2], dtype=np.uint8)
+        return cv2.cvtColor(src, cv2.COLOR_BGR2GRAY, dst=self._gray)
+
+    def _ensure_flow_buffers(self, shape: Tuple[int, int]) -> None:
+        if self._flow is not None and self._flow.shape[:2] == shape:
+            return
+        self._flow = np.zeros(shape + (2,), dtype=np.float32)
+        self._fx = np.empty(shape, dtype=np.float32)
+        self._fy = np.empty(shape, dtype=np.float32)
+        self._mag = np.empty(shape, dtype=np.float32)
+        self._mask = np.empty(shape, dtype=np.uint8)
+        self._flow_valid = False
+        if self.zone_count:
+            # intp, like the weights float64: np.bincount's own dtypes, so neither is converted on every frame.
+            self._labels = zone_labels(shape, grid=self.zone_grid, polygons=self.zone_polygons).ravel().astype(np.intp)
+            # Empty zones (a polygon smaller than a pixel) report 0 instead of dividing by zero.
+            self._zone_pixels = np.maximum(np.bincount(self._labels, minlength=self.zone_count + 1)[1:], 1)
+            self._zone_weights = np.empty(self._labels.shape, dtype=np.float64)
+
+    def measure(self, frame_bgr: np.ndarray) -> Optional[Tuple[float, ...]]:
+        # (mean_flow_mag, active_ratio, *zone_mags, *zone_ratios), or None for the first frame of a pair.
+        import cv2
+
+        gray = self._to_gray(frame_bgr)
+        prev = self._prev
+        if prev is None or prev.shape != gray.shape:
+            self._prev, self._gray = gray, None
+            self._flow_valid = False
+            return None
+
+        self._ensure_flow_buffers(gray.shape)
+        if self.use_initial_flow and self._flow_valid:
+            flags, iterations = cv2.OPTFLOW_USE_INITIAL_FLOW, self.initial_flow_iterations
+        else:
+            flags, iterations = 0, self.iterations
+        cv2.calcOpticalFlowFarneback(prev, gray, self._flow, pyr_scale=0.5, levels=3, winsize=15, iterations=iterations, poly_n=5, poly_sigma=1.2, flags=flags,)
+        self._flow_valid = True
+
+        # Magnitude only (cartToPolar would also compute the unused angle), into the preallocated buffers.
+        cv2.extractChannel(self._flow, 0, dst=self._fx)
+        cv2.extractChannel(self._flow, 1, dst=self._fy)
+        mag = cv2.magnitude(self._fx, self._fy, self._mag)
+        cv2.compare(mag, self.active_mag_threshold, cv2.CMP_GT, dst=self._mask)
+        self._prev, self._gray = gray, prev
+        stats = (float(np.mean(mag)), cv2.countNonZero(self._mask) / mag.size)
+        if not self.zone_count:
+            return stats
+        n, weights = self.zone_count + 1, self._zone_weights
+        np.copyto(weights, mag.ravel())
+        mags = np.bincount(self._labels, weights=weights, minlength=n)[1:] / self._zone_pixels
+        np.copyto(weights, self._mask.ravel())
+        active = np.bincount(self._labels, weights=weights, minlength=n)[1:] / (255.0 * self._zone_pixels)
+        return stats + tuple(mags.tolist()) + tuple(active.tolist())
+
+class OpticalFlowScorer:
+    # Stateful optical-flow risk scorer with per-zone baselines; state()/restore() checkpoint it.
+    def __init__(
+        self,
+        *,
+        resize_width: int = 320,
+        mad_window: int = 30,
+        z_low: float = 3.0,
+        z_med: float = 5.0,
+        z_high: float = 7.0,
+        min_consecutive: int = 1,
+        active_mag_threshold: float = 1.0,
+        use_initial_flow: bool = False,
+        reset_after_alert: bool = False,
+        zone_grid: Optional[Sequence[int]] = None,
+        zone_polygons: Optional[Sequence] = None,
+        zone_names: Optional[Sequence[str]] = None,
+    ) -> None:
+        self.meter = FlowMeter(
+            resize_width=resize_width,
+            active_mag_threshold=active_mag_threshold,
+            use_initial_flow=use_initial_flow,
+            zone_grid=zone_grid,
+            zone_polygons=zone_polygons,
+        )
+        self.zone_names = resolve_zone_names(self.meter.zone_grid, self.meter.zone_polygons, zone_names)
+        self.config: Dict[str, Any] = {
+            "resize_width": int(resize_width),
+            "mad_window": int(mad_window),
+            "z_low": float(z_low),
+            "z_med": float(z_med),
+            "z_high": float(z_high),
+            "min_consecutive": max(1, int(min_consecutive)),
+            "active_mag_threshold": float(active_mag_threshold),
+            "use_initial_flow": bool(use_initial_flow),
+            "reset_after_alert": bool(reset_after_alert),
+            "zone_grid": None if self.meter.zone_grid is None else list(self.meter.zone_grid),
+            "zone_polygons": [np.asarray(p, dtype=np.float64).reshape(-1, 2).tolist() for p in self.meter.zone_polygons],
+            "zone_names": list(self.zone_names),
+        }
+        self.counts = {risk: 0 for risk in RISK_ORDER}
+        self.zone_counts = [{risk: 0 for risk in RISK_ORDER} for _ in self.zone_names]
+        self.overall_risk = "NONE"
+        self.first_high_time: Optional[float] = None
+        self.samples_seen = 0
+        self._baseline = RollingMedianMAD(mad_window)
+        self._consec = 0
+        self._zone_baselines = [RollingMedianMAD(mad_window) for _ in self.zone_names]
+        self._zone_consec = [0] * len(self.zone_names)
+
+    def reset_motion(self) -> None:
+        # Frames were skipped: the next frame starts a new flow pair instead of measuring motion across the gap.
+        self.meter.reset()
+
+    def push(self, frame_bgr: np.ndarray, t_sec: float):
+        measured = self.meter.measure(frame_bgr)
+        if measured is None:
+            return None
+        return self.score(t_sec, *measured)
+
+    def _step(self, baseline: RollingMedianMAD, value: float, consec: int) -> Tuple[float, str, int]:
+        cfg = self.config
+        z = float(baseline.zscore(value)) if self.samples_seen > 2 else 0.0
+        baseline.push(value)
+
+        risk = risk_from_z(z, cfg["z_low"], cfg["z_med"], cfg["z_high"])
+        consec = consec + 1 if risk != "NONE" else 0
+        if risk != "NONE" and consec < cfg["min_consecutive"]:
+            risk = "NONE"
+        if risk != "NONE" and cfg["reset_after_alert"]:
+            consec = 0
+        return z, risk, consec
+
+    def score(self, t_sec: float, mean_mag: float, active_ratio: float, *zone_stats: float):
+        # zone_stats: the zone mean magnitudes, then the zone active ratios, as returned by FlowMeter.measure().
+        self.samples_seen += 1
+        z, escalated, self._consec = self._step(self._baseline, mean_mag, self._consec)
+
+        zone, zone_z, hottest = None, 0.0, None
+        for i in range(len(self.zone_names)):
+            zi, risk_i, self._zone_consec[i] = self._step(self._zone_baselines[i], zone_stats[i], self._zone_consec[i])
+            self.zone_counts[i][risk_i] += 1
+            if hottest is None or (RISK_ORDER.index(risk_i), zi) > hottest[0]:
+                hottest = ((RISK_ORDER.index(risk_i), zi), i)
+        if hottest is not None:
+            (rank, zone_z), i = hottest
+            if rank and rank >= RISK_ORDER.index(escalated):
+                zone, escalated = self.zone_names[i], RISK_ORDER[rank]
+
+        self.counts[escalated] += 1
+        if RISK_ORDER.index(escalated) > RISK_ORDER.index(self.overall_risk):
+            self.overall_risk = escalated
+        if escalated == "HIGH" and self.first_high_time is None:
+            self.first_high_time = float(t_sec)
+        return self._sample(float(t_sec), escalated, float(mean_mag), z, float(active_ratio), zone, zone_z)
+
+    def _sample(self, t_sec: float, risk: str, mean_mag: float, z: float, active_ratio: float, zone: Optional[str] = None, zone_z: float = 0.0):
+        return FlowSample(time_seconds=t_sec, risk_level=risk, mean_flow_mag=mean_mag, z_score=z, active_ratio=active_ratio, zone=zone, zone_z_score=zone_z)
+
+    def state(self) -> Dict[str, Any]:
+        prev, flow = self.meter.prev_gray, self.meter.prev_flow
+        return {
+            "config": dict(self.config),
+            "baseline": self._baseline.state(),
+            "consec": self._consec,
+            "zoneBaselines": [b.state() for b in self._zone_baselines],
+            "zoneConsec": list(self._zone_consec),
+            "zoneCounts": [dict(c) for c in self.zone_counts],
+            "samplesSeen": self.samples_seen,
+            "counts": dict(self.counts),
+            "overallRisk": self.overall_risk,
+            "firstHighTime": self.first_high_time,
+            "prevGray": None if prev is None else prev.copy(),
+            "prevFlow": None if flow is None else flow.copy(),
+        }
+
+    @classmethod
+    def restore(cls, state: Dict[str, Any]) -> "OpticalFlowScorer":
+        scorer = cls(**state["config"])
+        scorer._baseline = RollingMedianMAD.restore(state["baseline"])
+        scorer._consec = int(state["consec"])
+        if scorer.zone_names:
+            scorer._zone_baselines = [RollingMedianMAD.restore(b) for b in state["zoneBaselines"]]
+            scorer._zone_consec = [int(c) for c in state["zoneConsec"]]
+            for counts, saved in zip(scorer.zone_counts, state["zoneCounts"]):
+                counts.update(saved)
+        scorer.samples_seen = int(state["samplesSeen"])
+        scorer.counts.update(state["counts"])
+        scorer.overall_risk = str(state["overallRisk"])
+        scorer.first_high_time = state["firstHighTime"]
+        scorer.meter.set_prev(state["prevGray"], state.get("prevFlow"))
+        return scorer
@@ -0,0 +1,78 @@
+from __future__ import annotations
+from typing import Iterator, Optional, Tuple
+import numpy as np
+
+STRATEGIES = ("auto", "read", "grab", "seek")
+
+def open_video(video_path: str, default_fps: float = 25.0):
+    import cv2
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Could not open video: {video_path}")
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    if not fps or fps <= 0:
+        fps = default_fps
+    return cap, float(fps)
+
+def iter_sampled_frames(
+    cap,
+    step: int,
+    *,
+    strategy: str = "auto",
+    seek_min_step: int = 120,
+    start_frame: int = 0,
+    end_frame: Optional[int] = None,
+) -> Iterator[Tuple[int, np.ndarray]]:
+    # Yields (frame_idx, frame_bgr) for every `step`-th frame, by reading, grabbing or seeking.
+    import cv2
+
+    step = max(1, int(step))
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown sampling strategy '{strategy}'. Use one of: {', '.join(STRATEGIES)}")
+    if strategy == "auto":
+        strategy = "seek" if step >= max(2, int(seek_min_step)) else "grab"
+
+    frame_idx = max(0, int(start_frame))
+    if frame_idx and not cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx):
+        for _ in range(frame_idx):
+            if not cap.grab():
+                return
+
+    if strategy == "seek":
+        while end_frame is None or frame_idx < end_frame:
+            ok, frame_bgr = cap.read()
+            if not ok:
+                return
+            yield frame_idx, frame_bgr
+            frame_idx += step
+            if not cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx):
+                # Backend cannot seek (e.g. some streams): grab forward to the next sample instead.
+                strategy = "grab"
+                break
+        else:
+            return
+        # The failed seek left the position right after the last sampled frame.
+        for _ in range(step - 1):
+            if not cap.grab():
+                return
+
+    phase = frame_idx % step
+    while end_frame is None or frame_idx < end_frame:
+        if strategy == "read":
+            ok, frame_bgr = cap.read()
+            if not ok:
+                return
+            if frame_idx % step == phase:
+                yield frame_idx, frame_bgr
+            frame_idx += 1
+            continue
+
+        if not cap.grab():
+            return
+        if frame_idx % step == phase:
+            ok, frame_bgr = cap.retrieve()
+            if not ok:
+                return
+            yield frame_idx, frame_bgr
+        frame_idx += 1
@@ -0,0 +1,114 @@
+from __future__ import annotations
+from bisect import bisect_left, insort
+from collections import deque
+from typing import Callable, Tuple
+import numpy as np
+
+MAD_SCALE = 1.4826
+
+def _kth_of_two(a: Callable[[int], float], len_a: int, b: Callable[[int], float], len_b: int, k: int) -> float:
+    # k-th smallest (0-based) of two ascending sequences given by accessors, in O(log(len_a + len_b)).
+    lo, hi = max(0, k + 1 - len_b), min(k + 1, len_a)
+    while lo < hi:
+        i = (lo + hi) // 2
+        if a(i) < b(k - i):
+            lo = i + 1
+        else:
+            hi = i
+    j = k + 1 - lo
+    if lo == 0:
+        return b(j - 1)
+    if j == 0:
+        return a(lo - 1)
+    return max(a(lo - 1), b(j - 1))
+
+class RollingMedianMAD:
+    # Median and MAD of the last `window` values, equal to np.median on the same slice.
+
+    def __init__(self, window: int) -> None:
+        self._window = max(1, int(window))
+        self._values: deque = deque()
+        self._sorted: list[float] = []
+
+    def __len__(self) -> int:
+        return len(self._sorted)
+
+    def push(self, value: float) -> None:
+        value = float(value)
+        self._values.append(value)
+        insort(self._sorted, value)
+        if len(self._values) > self._window:
+            del self._sorted[bisect_left(self._sorted, self._values.popleft())]
+
+    def median_mad(self) -> Tuple[float, float]:
+        s = self._sorted
+        n = len(s)
+        if n == 0:
+            return 0.0, 0.0
+        half = n // 2
+        med = s[half] if n % 2 else (s[half - 1] + s[half]) / 2
+
+        # Deviations below the median, nearest first, and at/above it, in ascending order.
+        split = bisect_left(s, med)
+
+        def below(i: int) -> float:
+            return med - s[split - 1 - i]
+
+        def above(j: int) -> float:
+            return s[split + j] - med
+
+        n_below, n_above = split, n - split
+        if n % 2:
+            mad = _kth_of_two(below, n_below, above, n_above, half)
+        else:
+            mad = (_kth_of_two(below, n_below, above, n_above, half - 1) + _kth_of_two(below, n_below, above, n_above, half)) / 2
+        return float(med), float(mad)
+
+    def zscore(self, value: float) -> float:
+        med, mad = self.median_mad()
+        return (float(value) - med) / ((mad * MAD_SCALE) + 1e-6)
+
+    def state(self) -> dict:
+        return {"window": self._window, "values": list(self._values)}
+
+    @classmethod
+    def restore(cls, state: dict) -> "RollingMedianMAD":
+        engine = cls(state["window"])
+        for value in state["values"]:
+            engine.push(value)
+        return engine
+
+def rolling_median_mad(values: np.ndarray, window: int, *, chunk_elements: int = 1 << 22) -> Tuple[np.ndarray, np.ndarray]:
+    # Offline mode: med[i], mad[i] are the statistics of values[max(0, i - window):i], i.e. the history before sample i.
+    values = np.asarray(values, dtype=np.float64)
+    window = max(1, int(window))
+    n = len(values)
+    med = np.zeros(n, dtype=np.float64)
+    mad = np.zeros(n, dtype=np.float64)
+
+    # Partial windows at the start are few (< window), so they go through the incremental engine.
+    engine = RollingMedianMAD(window)
+    head = min(n, window + 1)
+    for i in range(head):
+        med[i], mad[i] = engine.median_mad()
+        engine.push(values[i])
+    if n <= head:
+        return med, mad
+
+    # Full windows: row r of the view is values[r:r + window], the history of sample r + window.
+    views = np.lib.stride_tricks.sliding_window_view(values[:-1], window)
+    rows = max(1, int(chunk_elements) // window)
+    for start in range(1, len(views), rows):
+        block = views[start : start + rows]
+        block_med = np.median(block, axis=1)
+        med[start + window : start + window + len(block)] = block_med
+        mad[start + window : start + window + len(block)] = np.median(np.abs(block - block_med[:, None]), axis=1)
+    return med, mad
+
+def rolling_zscores(values: np.ndarray, window: int, *, min_history: int = 2) -> np.ndarray:
+    # Same z-score as the per-sample loops: 0 until more than `min_history` values have been seen.
+    values = np.asarray(values, dtype=np.float64)
+    med, mad = rolling_median_mad(values, window)
+    z = (values - med) / ((mad * MAD_SCALE) + 1e-6)
+    z[: min(len(z), int(min_history))] = 0.0
+    return z
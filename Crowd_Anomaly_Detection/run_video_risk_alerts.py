@@ -1,8 +1,16 @@
 import argparse
 import os
+import queue
+import threading
+from collections import deque
 from datetime import timedelta
 import numpy as np
 
+try:
+    from .frame_sampler import STRATEGIES, iter_sampled_frames, open_video
+except ImportError:
+    from frame_sampler import STRATEGIES, iter_sampled_frames, open_video
+
 def _format_hhmmss(seconds: float) -> str:
     if seconds < 0:
         seconds = 0
@@ -16,54 +24,159 @@ def _mean_euclidean_loss(x1: np.ndarray, x2: np.ndarray) -> float:
     return float(dist / n_samples)
 
 
-def _load_model(model_path: str):
+def _mean_euclidean_losses(x1: np.ndarray, x2: np.ndarray) -> list[float]:
+    # Row-wise version of _mean_euclidean_loss: each row is reduced over the same contiguous elements, so the sums match exactly.
+    diff = (x1 - x2).reshape(len(x1), -1)
+    n_samples = diff.shape[1]
+    dists = np.sqrt(np.square(diff).sum(axis=1))
+    return [float(d / n_samples) for d in dists]
+
+
+def _iter_batch_losses(model, bunches, batch_size: int):
+    batch_size = max(1, int(batch_size))
+    if isinstance(bunches, np.ndarray):
+        batches = (bunches[start : start + batch_size] for start in range(0, len(bunches), batch_size))
+    else:
+        batches = _iter_stacked(bunches, batch_size)
+    for batch in batches:
+        reconstructed = np.asarray(model.predict_on_batch(batch))
+        yield _mean_euclidean_losses(batch, reconstructed)
+
+
+def _iter_stacked(bunches, batch_size: int):
+    pending: list[np.ndarray] = []
+    for bunch in bunches:
+        pending.append(bunch)
+        if len(pending) == batch_size:
+            yield np.stack(pending)
+            pending = []
+    if pending:
+        yield np.stack(pending)
+
+
+def _build_model():
     from tensorflow.keras.layers import Conv3D, Conv3DTranspose, ConvLSTM2D
-    from tensorflow.keras.models import Sequential, load_model
+    from tensorflow.keras.models import Sequential
+
+    model = Sequential()
+    model.add(Conv3D(filters=128,  kernel_size=(11, 11, 1),  strides=(4, 4, 1),  padding="valid",  input_shape=(227, 227, 10, 1),  activation="tanh",))
+    model.add(Conv3D(filters=64, kernel_size=(5, 5, 1), strides=(2, 2, 1), padding="valid", activation="tanh",))
+    model.add(ConvLSTM2D(filters=64, kernel_size=(3, 3), strides=1, padding="same", dropout=0.4, recurrent_dropout=0.3, return_sequences=True,))
+    model.add(ConvLSTM2D(filters=32, kernel_size=(3, 3), strides=1, padding="same", dropout=0.3, return_sequences=True,))
+    model.add(ConvLSTM2D(filters=64, kernel_size=(3, 3), strides=1, padding="same", dropout=0.5, return_sequences=True,))
+    model.add(Conv3DTranspose(filters=128, kernel_size=(5, 5, 1), strides=(2, 2, 1), padding="valid", activation="tanh",))
+    model.add(Conv3DTranspose(filters=1, kernel_size=(11, 11, 1), strides=(4, 4, 1), padding="valid", activation="tanh",))
+    return model
+
+
+def _load_model(model_path: str):
+    from tensorflow.keras.models import load_model
 
     try:
         return load_model(model_path, compile=False)
     except Exception:
-        model = Sequential()
-        model.add(Conv3D(filters=128,  kernel_size=(11, 11, 1),  strides=(4, 4, 1),  padding="valid",  input_shape=(227, 227, 10, 1),  activation="tanh",))
-        model.add(Conv3D(filters=64, kernel_size=(5, 5, 1), strides=(2, 2, 1), padding="valid", activation="tanh",))
-        model.add(ConvLSTM2D(filters=64, kernel_size=(3, 3), strides=1, padding="same", dropout=0.4, recurrent_dropout=0.3, return_sequences=True,))
-        model.add(ConvLSTM2D(filters=32, kernel_size=(3, 3), strides=1, padding="same", dropout=0.3, return_sequences=True,))
-        model.add(ConvLSTM2D(filters=64, kernel_size=(3, 3), strides=1, padding="same", dropout=0.5, return_sequences=True,))
-        model.add(Conv3DTranspose(filters=128, kernel_size=(5, 5, 1), strides=(2, 2, 1), padding="valid", activation="tanh",))
-        model.add(Conv3DTranspose(filters=1, kernel_size=(11, 11, 1), strides=(4, 4, 1), padding="valid", activation="tanh",))
+        model = _build_model()
         model.load_weights(model_path)
         return model
     
-def _extract_sampled_grayscale_frames(video_path: str, sample_every_seconds: float) -> list[np.ndarray]:
-    import cv2
-
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        raise RuntimeError(f"Could not open video: {video_path}")
-
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    if not fps or fps <= 0:
-        fps = 25.0
+def _extract_sampled_grayscale_frames(video_path: str, sample_every_seconds: float, sampling: str = "auto") -> list[np.ndarray]:
+    return list(_iter_sampled_grayscale_frames(video_path, sample_every_seconds, sampling))
 
-    step_frames = max(1, int(round(sample_every_seconds * fps)))
 
-    frames_gray: list[np.ndarray] = []
-    frame_idx = 0
-    while True:
-        ok, frame_bgr = cap.read()
-        if not ok:
-            break
+def _iter_sampled_grayscale_frames(video_path: str, sample_every_seconds: float, sampling: str = "auto", start_sample: int = 0, end_sample=None):
+    cap, fps = open_video(video_path)
+    try:
+        step_frames = max(1, int(round(sample_every_seconds * fps)))
+        end_frame = None if end_sample is None else int(end_sample) * step_frames
+        for _frame_idx, frame_bgr in iter_sampled_frames(cap, step_frames, strategy=sampling, start_frame=int(start_sample) * step_frames, end_frame=end_frame):
+            yield _to_model_gray(frame_bgr)
+    finally:
+        cap.release()
 
-        if frame_idx % step_frames == 0:
-            frame_rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
-            frame_rgb = cv2.resize(frame_rgb, (227, 227), interpolation=cv2.INTER_AREA)
-            gray = (0.2989 * frame_rgb[:, :, 0] + 0.5870 * frame_rgb[:, :, 1] + 0.1140 * frame_rgb[:, :, 2]).astype(np.float32)
-            frames_gray.append(gray)
 
-        frame_idx += 1
+def _to_model_gray(frame_bgr: np.ndarray) -> np.ndarray:
+    import cv2
 
-    cap.release()
-    return frames_gray
+    frame_rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
+    frame_rgb = cv2.resize(frame_rgb, (227, 227), interpolation=cv2.INTER_AREA)
+    return (0.2989 * frame_rgb[:, :, 0] + 0.5870 * frame_rgb[:, :, 1] + 0.1140 * frame_rgb[:, :, 2]).astype(np.float32)
+
+
+class _BunchNormalizer:
+    # Each bunch is normalized over the last `window_frames` frames, from running float64 sums.
+    def __init__(self, window_frames: int = 500) -> None:
+        self._window: deque = deque(maxlen=max(10, int(window_frames)))
+        self._pending: list[np.ndarray] = []
+
+    def push(self, gray: np.ndarray):
+        # Returns the next (227, 227, 10, 1) bunch once 10 frames are pending, else None.
+        flat = gray.astype(np.float64).ravel()
+        self._window.append((float(flat.sum()), float(np.dot(flat, flat))))
+        self._pending.append(gray)
+        if len(self._pending) < 10:
+            return None
+
+        n = len(self._window) * 227 * 227
+        mean = sum(w[0] for w in self._window) / n
+        var = sum(w[1] for w in self._window) / n - mean * mean
+        std = float(np.sqrt(var)) if var > 0 else 0.0
+        if std == 0:
+            std = 1.0
+
+        bunch = np.clip((np.stack(self._pending, axis=-1) - mean) / std, 0, 1).astype(np.float32)
+        self._pending = []
+        return bunch[..., np.newaxis]
+
+
+def _iter_model_bunches(frames_gray, window_frames: int = 500):
+    normalizer = _BunchNormalizer(window_frames)
+    for gray in frames_gray:
+        bunch = normalizer.push(gray)
+        if bunch is not None:
+            yield bunch
+
+
+def _prefetch(items, max_items: int):
+    # Runs `items` on a background thread (cv2 decoding releases the GIL) so decoding overlaps with inference.
+    q: queue.Queue = queue.Queue(maxsize=max(1, int(max_items)))
+    stop = threading.Event()
+
+    def put(entry) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for item in items:
+                if not put(("item", item)):
+                    return
+            put(("done", None))
+        except BaseException as e:
+            put(("error", e))
+        finally:
+            close = getattr(items, "close", None)
+            if close is not None:
+                close()
+
+    worker = threading.Thread(target=produce, name="frame-prefetch", daemon=True)
+    worker.start()
+    try:
+        while True:
+            kind, value = q.get()
+            if kind == "item":
+                yield value
+            elif kind == "error":
+                raise value
+            else:
+                return
+    finally:
+        stop.set()
+        worker.join()
 
 
 def _preprocess_to_model_tensor(frames_gray: list[np.ndarray]) -> tuple[np.ndarray, int]:
@@ -115,6 +228,10 @@ def main() -> int:
     parser.add_argument("--threshold-low", type=float, default=0.0008, help="LOW threshold.")
     parser.add_argument("--threshold-medium", type=float, default=0.0012, help="MEDIUM threshold (must be >= low).",)
     parser.add_argument("--threshold-high", type=float, default=0.0016, help="HIGH threshold (must be >= medium).",)
+    parser.add_argument("--batch-size", type=int, default=16, help="Bunches per model call (default: 16).",)
+    parser.add_argument("--sampling", choices=STRATEGIES, default="auto", help="Frame sampling strategy (default: auto = grab, or seek for long steps).",)
+    parser.add_argument("--streaming", action="store_true", help="Decode, normalize and score bunches as they are read instead of loading the whole video first.",)
+    parser.add_argument("--norm-window-frames", type=int, default=500, help="With --streaming, normalize each bunch over this many trailing frames (default: 500).",)
     args = parser.parse_args()
 
     video_path = os.path.abspath(args.video)
@@ -141,15 +258,19 @@ def main() -> int:
         if not (args.threshold_low <= args.threshold_medium <= args.threshold_high):
             raise SystemExit("Thresholds must satisfy low <= medium <= high")
 
-    frames_gray = _extract_sampled_grayscale_frames(video_path, args.sample_every_seconds)
-    bunches, usable_frames = _preprocess_to_model_tensor(frames_gray)
     model = _load_model(model_path)
+    if args.streaming:
+        frames = _iter_sampled_grayscale_frames(video_path, args.sample_every_seconds, args.sampling)
+        bunches = _prefetch(_iter_model_bunches(frames, args.norm_window_frames), max_items=2 * args.batch_size)
+    else:
+        frames_gray = _extract_sampled_grayscale_frames(video_path, args.sample_every_seconds, args.sampling)
+        bunches, _usable_frames = _preprocess_to_model_tensor(frames_gray)
     seconds_per_bunch = 10.0 * args.sample_every_seconds
     losses: list[float] = []
-    for bunch in bunches:
-        n_bunch = np.expand_dims(bunch, axis=0)  
-        reconstructed = model.predict(n_bunch, verbose=0)
-        losses.append(_mean_euclidean_loss(n_bunch, reconstructed))
+    for batch_losses in _iter_batch_losses(model, bunches, args.batch_size):
+        losses.extend(batch_losses)
+    if not losses:
+        raise SystemExit("Need at least 10 sampled frames")
 
     if args.auto_thresholds:
         t_low = float(np.quantile(losses, args.auto_low_percentile / 100.0))
@@ -180,8 +301,9 @@ def main() -> int:
             print("-")
 
     print("Summary")
-    print(f"- Sampled frames: {len(frames_gray)} (usable: {usable_frames})")
-    print(f"- Bunches analyzed: {len(bunches)}")
+    if not args.streaming:
+        print(f"- Sampled frames: {len(frames_gray)} (usable: {len(losses) * 10})")
+    print(f"- Bunches analyzed: {len(losses)}")
     print(f"- Alerts: LOW={counts['LOW']}, MEDIUM={counts['MEDIUM']}, HIGH={counts['HIGH']}")
     if not any_alert:
         print("- No anomalies detected (at configured thresholds).")
@@ -0,0 +1,263 @@
+from __future__ import annotations
+import importlib
+import math
+from collections import deque
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from .models import RISK_NAMES
+from .path_setup import workspace_module
+
+@dataclass
+class AnalyzerSpec:
+    # signal_options change the raw signal, classify_options only its classification.
+    module: str
+    aliases: Tuple[str, ...] = ()
+    signal_options: Dict[str, Any] = field(default_factory=dict)
+    classify_options: Dict[str, Any] = field(default_factory=dict)
+    weight_option: str = ""
+
+# Analyzer modules provide iter_signal, signal_stream, classify, reclassify, risk_series and preload.
+ANALYZERS: Dict[str, AnalyzerSpec] = {}
+
+def register_analyzer(name: str, spec: AnalyzerSpec) -> None:
+    ANALYZERS[name] = spec
+    load_analyzer.cache_clear()
+
+def normalize_analyzer(analyzer: str) -> str:
+    analyzer_norm = (analyzer or "").strip().lower()
+    for name, spec in ANALYZERS.items():
+        if analyzer_norm == name or analyzer_norm in spec.aliases:
+            return name
+    raise ValueError(f"Invalid analyzer. Use {' or '.join(repr(name) for name in ANALYZERS)}.")
+
+def parse_analyzers(analyzer: str) -> Tuple[str, ...]:
+    # "optical_flow,autoencoder" runs both on one decode.
+    names = [normalize_analyzer(part) for part in (analyzer or "").split(",") if part.strip()] or [normalize_analyzer("")]
+    return tuple(dict.fromkeys(names))
+
+@lru_cache(maxsize=None)
+def load_analyzer(analyzer: str):
+    # Imported on first use, so the API starts without numpy, OpenCV or TensorFlow.
+    return importlib.import_module(ANALYZERS[normalize_analyzer(analyzer)].module, __package__)
+
+def preload_analyzers(analyzers: Tuple[str, ...]) -> None:
+    for analyzer in analyzers:
+        load_analyzer(analyzer).preload()
+
+def signal_params(analyzer: str, options: Dict[str, Any]) -> dict:
+    return {k: options.get(k, default) for k, default in ANALYZERS[analyzer].signal_options.items()}
+
+def classify_params(analyzer: str, options: Dict[str, Any]) -> dict:
+    return {k: options.get(k, default) for k, default in ANALYZERS[analyzer].classify_options.items()}
+
+register_analyzer(
+    "optical_flow",
+    AnalyzerSpec(
+        ".analyzers.optical_flow",
+        aliases=("flow", "optical"),
+        signal_options={"processFps": 5.0, "useInitialFlow": False, "zoneGrid": "", "zones": []},
+        classify_options={"minConsecutive": 1, "zLow": 3.0, "zMed": 5.0, "zHigh": 7.0, "flowWeight": 0.5},
+        weight_option="flowWeight",
+    ),
+)
+register_analyzer(
+    "autoencoder",
+    AnalyzerSpec(
+        ".analyzers.autoencoder",
+        aliases=("ae",),
+        signal_options={"sampleEverySeconds": 0.2, "streaming": True, "normWindowFrames": 500},
+        classify_options={"thresholdLow": 0.0008, "thresholdMedium": 0.0012, "thresholdHigh": 0.0016, "includeLosses": False, "autoencoderWeight": 0.5},
+        weight_option="autoencoderWeight",
+    ),
+)
+
+class _Recorder:
+    # Passes a signal through to the classifier while keeping every item it consumed.
+    def __init__(self, source: Iterable) -> None:
+        self._source = iter(source)
+        self.items: List[Any] = []
+        self.exhausted = False
+
+    def __iter__(self) -> Iterator:
+        for item in self._source:
+            self.items.append(item)
+            yield item
+        self.exhausted = True
+
+class _SharedDecode:
+    # One decode feeding several analyzers; signal items (never frames) are buffered for the ones not yet read.
+    def __init__(self, video_path: str, analyzers: Tuple[str, ...], options: Dict[str, Any]) -> None:
+        sampler = workspace_module("frame_sampler")
+        self._cap, fps = sampler.open_video(video_path)
+        try:
+            streams = {name: load_analyzer(name).signal_stream(fps, options) for name in analyzers}
+        except BaseException:
+            self._cap.release()
+            raise
+        self._streams = {name: stream for name, stream in streams.items() if stream is not None}
+        self._queues: Dict[str, deque] = {name: deque() for name in self._streams}
+        self._reading = set(self._streams)
+        step = math.gcd(*(stream.step for stream in self._streams.values())) if self._streams else 1
+        self._frames = sampler.iter_sampled_frames(self._cap, step, strategy=options.get("sampling", "auto"))
+        self._done = not self._streams
+
+    def feeds(self, analyzer: str) -> bool:
+        return analyzer in self._streams
+
+    def _advance(self) -> None:
+        try:
+            frame_idx, frame_bgr = next(self._frames)
+        except StopIteration:
+            for name in self._reading:
+                self._queues[name].extend(self._streams[name].flush())
+            self._done = True
+            return
+        for name in self._reading:
+            stream = self._streams[name]
+            if frame_idx % stream.step == 0:
+                self._queues[name].extend(stream.push(frame_idx, frame_bgr))
+
+    def signal(self, analyzer: str) -> Iterator:
+        queue = self._queues[analyzer]
+        try:
+            while True:
+                if queue:
+                    yield queue.popleft()
+                elif self._done:
+                    return
+                else:
+                    self._advance()
+        finally:
+            self._reading.discard(analyzer)
+            queue.clear()
+
+    def close(self) -> None:
+        self._frames.close()
+        self._cap.release()
+
+def fusion_enabled(analyzers: Tuple[str, ...], options: Dict[str, Any]) -> bool:
+    return len(analyzers) > 1 and bool(options.get("fusion", False))
+
+def _fusion_options(analyzers: Tuple[str, ...], options: Dict[str, Any]) -> Dict[str, Any]:
+    return {**options, "stopOnHigh": False} if fusion_enabled(analyzers, options) else options
+
+def fuse_risk(analyzers: Tuple[str, ...], values: Dict[str, Any], options: Dict[str, Any], include_samples: bool = True) -> dict:
+    # Weighted mean of scores scaled to each analyzer's HIGH threshold, on the finest-sampled analyzer's timeline.
+    import numpy as np
+
+    weights = {name: max(0.0, float(options.get(ANALYZERS[name].weight_option, 0.0))) for name in analyzers}
+    series = {name: load_analyzer(name).risk_series(values[name], options) for name in analyzers if weights[name] > 0}
+    if not series:
+        raise RuntimeError("Fusion needs a positive weight for at least one analyzer")
+    total = sum(weights[name] for name in series)
+    low = sum(weights[name] * s["low"] for name, s in series.items()) / total
+    medium = sum(weights[name] * s["medium"] for name, s in series.items()) / total
+
+    grid = min(series.values(), key=lambda s: s["span"])["time"]
+    weighted, weight_sum, scores = np.zeros(len(grid)), np.zeros(len(grid)), {}
+    for name, s in series.items():
+        idx = np.searchsorted(s["time"], grid, side="right") - 1
+        covered = idx >= 0
+        covered[covered] = grid[covered] < s["time"][idx[covered]] + s["span"]
+        score = np.full(len(grid), np.nan)
+        score[covered] = s["score"][idx[covered]]
+        weighted[covered] += weights[name] * score[covered]
+        weight_sum[covered] += weights[name]
+        scores[name] = score
+    keep = weight_sum > 0
+    times, fused = grid[keep], weighted[keep] / weight_sum[keep]
+    levels = np.select([fused > 1.0, fused > medium, fused > low], [3, 2, 1], 0)
+    alerts = np.flatnonzero(levels >= 2)
+    payload = {
+        "riskLevel": RISK_NAMES[int(levels.max(initial=0))],
+        "riskScore": float(fused.max(initial=0.0)),
+        "eventTimeSeconds": float(times[alerts[0]]) if alerts.size else 0.0,
+        "weights": {name: weights[name] for name in analyzers},
+        "thresholds": {"low": low, "medium": medium, "high": 1.0},
+        "counts": dict(zip(RISK_NAMES, np.bincount(levels, minlength=4).tolist())),
+    }
+    if include_samples:
+        per_analyzer = {name: [None if np.isnan(v) else v for v in score[keep].tolist()] for name, score in scores.items()}
+        payload["samples"] = [
+            {"timeSeconds": t, "riskLevel": RISK_NAMES[level], "score": f, "scores": {name: per_analyzer[name][i] for name in per_analyzer}}
+            for i, (t, f, level) in enumerate(zip(times.tolist(), fused.tolist(), levels.tolist()))
+        ]
+    return payload
+
+def combine_results(analyzers: Tuple[str, ...], results: Dict[str, dict], fusion: Optional[dict] = None) -> dict:
+    # Highest level and earliest MEDIUM/HIGH event on top (or the fused risk), per-analyzer payloads nested.
+    if len(analyzers) == 1:
+        return results[analyzers[0]]
+    lead = max(analyzers, key=lambda name: RISK_NAMES.index(results[name]["riskLevel"]))
+    alerting = [name for name in analyzers if results[name]["riskLevel"] in {"MEDIUM", "HIGH"}]
+    first = min(alerting, key=lambda name: results[name]["eventTimeSeconds"], default=None)
+    combined = {
+        "analyzer": ",".join(analyzers),
+        "riskLevel": results[lead]["riskLevel"],
+        "riskScore": results[lead]["riskScore"],
+        "eventTimeSeconds": float(results[first]["eventTimeSeconds"]) if first else 0.0,
+        "analyzers": {name: results[name] for name in analyzers},
+    }
+    if any("eventZone" in r for r in results.values()):
+        combined["eventZone"] = results[first].get("eventZone") if first and fusion is None else None
+    if fusion is not None:
+        combined.update(riskLevel=fusion["riskLevel"], riskScore=fusion["riskScore"], eventTimeSeconds=fusion["eventTimeSeconds"], fusion=fusion)
+    return combined
+
+def reclassify_array(*, analyzer: str, signals: Dict[str, Tuple[Any, bool]], options: Dict[str, Any], include_samples: bool = True) -> dict:
+    # `truncated`: the result ran off the end of a signal prefix cut short by stop-on-high.
+    analyzers = parse_analyzers(analyzer)
+    options = _fusion_options(analyzers, options)
+    results = {}
+    for name in analyzers:
+        values, complete = signals[name]
+        payload, stopped = load_analyzer(name).reclassify(values, options, include_samples)
+        results[name] = {**payload, "signalComplete": bool(complete), "truncated": not complete and not stopped}
+    fusion = fuse_risk(analyzers, {name: signals[name][0] for name in analyzers}, options, include_samples) if fusion_enabled(analyzers, options) else None
+    combined = combine_results(analyzers, results, fusion)
+    if len(analyzers) > 1:
+        combined["signalComplete"] = all(r["signalComplete"] for r in results.values())
+        combined["truncated"] = any(r["truncated"] for r in results.values())
+    return combined
+
+def analyze_with_signal(*, video_path: str, analyzer: str, options: Dict[str, Any]) -> Tuple[dict, Dict[str, dict]]:
+    # Returns the result and the raw signal per analyzer (only the consumed prefix unless `complete`).
+    analyzers = parse_analyzers(analyzer)
+    options = _fusion_options(analyzers, options)
+    shared = _SharedDecode(video_path, analyzers, options) if len(analyzers) > 1 else None
+    results, signals = {}, {}
+    try:
+        for name in analyzers:
+            module = load_analyzer(name)
+            source = shared.signal(name) if shared is not None and shared.feeds(name) else module.iter_signal(video_path, options)
+            recorder = _Recorder(source)
+            try:
+                results[name] = module.classify(recorder, options)
+            finally:
+                source.close()
+            signals[name] = {"values": recorder.items, "complete": recorder.exhausted}
+    finally:
+        if shared is not None:
+            shared.close()
+    fusion = fuse_risk(analyzers, {name: signals[name]["values"] for name in analyzers}, options) if fusion_enabled(analyzers, options) else None
+    return combine_results(analyzers, results, fusion), signals
+
+def classify_signal(*, analyzer: str, signals: Dict[str, dict], options: Dict[str, Any]) -> Optional[dict]:
+    # None when a stored prefix ends before the new thresholds would have stopped: decode again.
+    analyzers = parse_analyzers(analyzer)
+    options = _fusion_options(analyzers, options)
+    results = {}
+    for name in analyzers:
+        signal = signals[name]
+        recorder = _Recorder(tuple(v) if isinstance(v, list) else v for v in signal["values"])
+        try:
+            results[name] = load_analyzer(name).classify(recorder, options)
+        except RuntimeError:
+            if signal["complete"]:
+                raise
+            return None
+        if recorder.exhausted and not signal["complete"]:
+            return None
+    fusion = fuse_risk(analyzers, {name: signals[name]["values"] for name in analyzers}, options) if fusion_enabled(analyzers, options) else None
+    return combine_results(analyzers, results, fusion)
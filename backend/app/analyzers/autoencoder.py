@@ -1,12 +1,15 @@
 from __future__ import annotations
 
+import logging
+import math
 import os
+from itertools import chain, islice
 from dataclasses import dataclass
 from threading import Lock
-from typing import List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import numpy as np
-from ..models import RiskLevel
-from ..path_setup import ensure_workspace_on_path
+from ..models import RISK_NAMES, RiskLevel
+from ..path_setup import ensure_workspace_on_path, workspace_module
 
 @dataclass
 class AnalysisResult:
@@ -21,51 +24,131 @@ class AnalysisResult:
 
 _model_lock = Lock()
 _model = None
+ALERT_CAUSE = "Motion pattern anomaly detected: spatiotemporal reconstruction error exceeded threshold."
 
 def _get_default_model_path() -> str:
     root_dir = ensure_workspace_on_path()
     return os.path.join(root_dir, "Crowd_Anomaly_Detection", "AnomalyDetector.h5")
 
-def analyze_video_autoencoder(
+def _get_model(model_path: str):
+    global _model
+    with _model_lock:
+        if _model is None:
+            address = os.getenv("INFERENCE_SOCKET")
+            if address:
+                # One copy of the weights per host: batches go to the inference server instead of a local model.
+                from ..inference_server import RemoteModel
+
+                _model = RemoteModel(address, connect_timeout=float(os.getenv("INFERENCE_CONNECT_TIMEOUT", "120")))
+            else:
+                _model = workspace_module("run_video_risk_alerts")._load_model(model_path)
+        return _model
+
+def preload(model_path: Optional[str] = None) -> None:
+    # Loads the model (or connects to the inference server) and warms it up.
+    try:
+        from ..inference_server import RemoteModel, warm_up
+
+        model = _get_model(model_path or _get_default_model_path())
+        if not isinstance(model, RemoteModel):
+            warm_up(model)
+    except Exception:
+        # e.g. no TensorFlow on an optical-flow-only host, or a wrong INFERENCE_SOCKET.
+        logging.getLogger(__name__).warning("Autoencoder preload failed", exc_info=True)
+
+def _iter_streaming_losses(
+    video_path: str,
     *,
+    sample_every_seconds: float,
+    sampling: str,
+    norm_window_frames: int,
+    batch_size: int,
+    model_path: str,
+    start_bunch: int = 0,
+    end_bunch: Optional[int] = None,
+) -> Iterator[float]:
+    rva = workspace_module("run_video_risk_alerts")
+    model = _get_model(model_path)
+    # Decoding starts early enough to fill the first bunch's normalization window.
+    window = max(10, int(norm_window_frames))
+    first_bunch = max(0, int(start_bunch) - math.ceil((window - 10) / 10))
+    frames = rva._iter_sampled_grayscale_frames(
+        video_path,
+        sample_every_seconds,
+        sampling,
+        start_sample=10 * first_bunch,
+        end_sample=None if end_bunch is None else 10 * int(end_bunch),
+    )
+    bunches = rva._prefetch(rva._iter_model_bunches(frames, window), max_items=2 * max(1, int(batch_size)))
+    try:
+        # Batches are predicted lazily, so stopping on HIGH skips every batch after the one that contained it.
+        yield from chain.from_iterable(rva._iter_batch_losses(model, islice(bunches, int(start_bunch) - first_bunch, None), batch_size))
+    finally:
+        bunches.close()
+
+def _autoencoder_segment(video_path: str, start_bunch: int, end_bunch: Optional[int], options: dict) -> List[float]:
+    return list(_iter_streaming_losses(video_path, start_bunch=start_bunch, end_bunch=end_bunch, **options))
+
+def _iter_parallel_losses(video_path: str, *, segments: int, options: dict) -> Iterator[float]:
+    import cv2
+
+    from .segments import iter_segment_results, plan_segments
+
+    cap, fps = workspace_module("frame_sampler").open_video(video_path)
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    cap.release()
+    step_frames = max(1, int(round(options["sample_every_seconds"] * fps)))
+    plan = plan_segments(math.ceil(frame_count / step_frames) // 10, segments, min_size=10)
+    if len(plan) <= 1:
+        yield from _iter_streaming_losses(video_path, **options)
+        return
+    yield from iter_segment_results(_autoencoder_segment, [(video_path, start, end, options) for start, end in plan], max_workers=len(plan))
+
+def _iter_whole_video_losses(video_path: str, *, sample_every_seconds: float, sampling: str, batch_size: int, model_path: str) -> Iterator[float]:
+    rva = workspace_module("run_video_risk_alerts")
+    model = _get_model(model_path)
+    frames_gray = rva._extract_sampled_grayscale_frames(video_path, sample_every_seconds, sampling)
+    bunches, _usable_frames = rva._preprocess_to_model_tensor(frames_gray)
+    yield from chain.from_iterable(rva._iter_batch_losses(model, bunches, batch_size))
+
+def iter_loss_signal(
     video_path: str,
+    *,
+    sample_every_seconds: float = 0.2,
+    model_path: Optional[str] = None,
+    batch_size: int = 16,
+    streaming: bool = True,
+    norm_window_frames: int = 500,
+    sampling: str = "auto",
+    parallel_segments: int = 0,
+) -> Iterator[float]:
+    # Raw per-bunch reconstruction losses; thresholds are applied by classify_losses.
+    if model_path is None:
+        model_path = _get_default_model_path()
+
+    options = {"sample_every_seconds": sample_every_seconds, "sampling": sampling, "batch_size": batch_size, "model_path": model_path}
+    if not streaming:
+        # Whole-video normalization needs every frame before the first bunch, so this path cannot be split.
+        return _iter_whole_video_losses(video_path, **options)
+    if parallel_segments > 1:
+        return _iter_parallel_losses(video_path, segments=parallel_segments, options={**options, "norm_window_frames": norm_window_frames})
+    return _iter_streaming_losses(video_path, norm_window_frames=norm_window_frames, **options)
+
+def classify_losses(
+    loss_iter: Iterable[float],
+    *,
     sample_every_seconds: float = 0.2,
     threshold_low: float = 0.0008,
     threshold_medium: float = 0.0012,
     threshold_high: float = 0.0016,
     include_losses: bool = False,
     stop_on_high: bool = True,
-    model_path: Optional[str] = None,
 ) -> AnalysisResult:
-    global _model
-    ensure_workspace_on_path()
-
-    from Crowd_Anomaly_Detection.run_video_risk_alerts import (
-        _classify_risk,
-        _extract_sampled_grayscale_frames,
-        _load_model,
-        _mean_euclidean_loss,
-        _preprocess_to_model_tensor,
-    )
-
-    if model_path is None:
-        model_path = _get_default_model_path()
-
-    frames_gray = _extract_sampled_grayscale_frames(video_path, sample_every_seconds)
-    bunches, _usable_frames = _preprocess_to_model_tensor(frames_gray)
-
-    with _model_lock:
-        if _model is None:
-            _model = _load_model(model_path)
-        model = _model
-
+    _classify_risk = workspace_module("run_video_risk_alerts")._classify_risk
     losses: List[float] = []
     first_alert_bunch_idx: Optional[int] = None
     samples: List[dict] = []
-    for bunch in bunches:
-        n_bunch = np.expand_dims(bunch, axis=0)
-        reconstructed = model.predict(n_bunch, verbose=0)
-        loss = _mean_euclidean_loss(n_bunch, reconstructed)
+    for loss in loss_iter:
         losses.append(loss)
 
         bunch_idx = len(losses) - 1
@@ -73,11 +156,7 @@ def analyze_video_autoencoder(
         t_sec = float(bunch_idx * seconds_per_bunch)
         risk_str = _classify_risk(loss, threshold_low, threshold_medium, threshold_high)
         risk_level = RiskLevel(risk_str)
-        cause = (
-            "Motion pattern anomaly detected: spatiotemporal reconstruction error exceeded threshold."
-            if risk_level != RiskLevel.NONE
-            else "Normal scene motion."
-        )
+        cause = ALERT_CAUSE if risk_level != RiskLevel.NONE else "Normal scene motion."
         samples.append(
             {
                 "riskLevel": risk_level.value,
@@ -93,6 +172,9 @@ def analyze_video_autoencoder(
         if stop_on_high and risk_level == RiskLevel.HIGH:
             break
 
+    if not losses:
+        raise RuntimeError("Need at least 10 sampled frames")
+
     max_loss = float(np.max(losses)) if losses else 0.0
     mean_loss = float(np.mean(losses)) if losses else 0.0
 
@@ -113,3 +195,177 @@ def analyze_video_autoencoder(
         samples=samples,
         losses=losses if include_losses else None,
     )
+
+def classify_loss_array(
+    losses: np.ndarray,
+    *,
+    threshold_low: float = 0.0008,
+    threshold_medium: float = 0.0012,
+    threshold_high: float = 0.0016,
+    stop_on_high: bool = True,
+) -> Tuple[Dict[str, np.ndarray], bool]:
+    # Vectorized classify_losses over a stored loss array.
+    losses = np.asarray(losses, dtype=np.float64).reshape(-1)
+    levels = np.select([losses > threshold_high, losses > threshold_medium, losses > threshold_low], [3, 2, 1], 0)
+    highs = np.flatnonzero(levels == 3)
+    stopped = bool(stop_on_high and highs.size)
+    n = int(highs[0]) + 1 if stopped else len(levels)
+    return {"loss": losses[:n], "level": levels[:n]}, stopped
+
+def analyze_video_autoencoder(
+    *,
+    video_path: str,
+    sample_every_seconds: float = 0.2,
+    threshold_low: float = 0.0008,
+    threshold_medium: float = 0.0012,
+    threshold_high: float = 0.0016,
+    include_losses: bool = False,
+    stop_on_high: bool = True,
+    model_path: Optional[str] = None,
+    batch_size: int = 16,
+    streaming: bool = True,
+    norm_window_frames: int = 500,
+    sampling: str = "auto",
+    parallel_segments: int = 0,
+) -> AnalysisResult:
+    loss_iter = iter_loss_signal(
+        video_path,
+        sample_every_seconds=sample_every_seconds,
+        model_path=model_path,
+        batch_size=batch_size,
+        streaming=streaming,
+        norm_window_frames=norm_window_frames,
+        sampling=sampling,
+        parallel_segments=parallel_segments,
+    )
+    try:
+        return classify_losses(
+            loss_iter,
+            sample_every_seconds=sample_every_seconds,
+            threshold_low=threshold_low,
+            threshold_medium=threshold_medium,
+            threshold_high=threshold_high,
+            include_losses=include_losses,
+            stop_on_high=stop_on_high,
+        )
+    finally:
+        loss_iter.close()
+
+def _thresholds(options: dict) -> dict:
+    return {
+        "sample_every_seconds": float(options["sampleEverySeconds"]),
+        "include_losses": bool(options["includeLosses"]),
+        "threshold_low": float(options["thresholdLow"]),
+        "threshold_medium": float(options["thresholdMedium"]),
+        "threshold_high": float(options["thresholdHigh"]),
+        "stop_on_high": bool(options.get("stopOnHigh", True)),
+    }
+
+def iter_signal(video_path: str, options: dict) -> Iterator[float]:
+    return iter_loss_signal(
+        video_path,
+        sample_every_seconds=float(options["sampleEverySeconds"]),
+        batch_size=int(options.get("batchSize", 16)),
+        streaming=bool(options.get("streaming", True)),
+        norm_window_frames=int(options.get("normWindowFrames", 500)),
+        parallel_segments=int(options.get("parallelSegments", 0)),
+    )
+
+class LossSignalStream:
+    # Push version of _iter_streaming_losses for a decode shared with other analyzers.
+    def __init__(self, fps: float, *, sample_every_seconds: float, norm_window_frames: int = 500, batch_size: int = 16, model_path: Optional[str] = None) -> None:
+        self._rva = workspace_module("run_video_risk_alerts")
+        self.step = max(1, int(round(sample_every_seconds * fps)))
+        self._model = _get_model(model_path or _get_default_model_path())
+        self._normalizer = self._rva._BunchNormalizer(norm_window_frames)
+        self._batch_size = max(1, int(batch_size))
+        self._bunches: List[np.ndarray] = []
+
+    def _predict(self) -> List[float]:
+        bunches, self._bunches = self._bunches, []
+        return list(chain.from_iterable(self._rva._iter_batch_losses(self._model, bunches, self._batch_size)))
+
+    def push(self, frame_idx: int, frame_bgr: np.ndarray) -> List[float]:
+        bunch = self._normalizer.push(self._rva._to_model_gray(frame_bgr))
+        if bunch is not None:
+            self._bunches.append(bunch)
+        return self._predict() if len(self._bunches) >= self._batch_size else []
+
+    def flush(self) -> List[float]:
+        return self._predict() if self._bunches else []
+
+def signal_stream(fps: float, options: dict) -> Optional[LossSignalStream]:
+    # Whole-video normalization needs every frame before the first bunch, so it keeps its own decode.
+    if not bool(options.get("streaming", True)):
+        return None
+    return LossSignalStream(
+        fps,
+        sample_every_seconds=float(options["sampleEverySeconds"]),
+        norm_window_frames=int(options.get("normWindowFrames", 500)),
+        batch_size=int(options.get("batchSize", 16)),
+    )
+
+def classify(signal: Iterable[float], options: dict) -> dict:
+    ae = classify_losses(signal, **_thresholds(options))
+    return {
+        "analyzer": "autoencoder",
+        "riskLevel": ae.risk_level.value,
+        "riskScore": ae.risk_score,
+        "maxLoss": ae.max_loss,
+        "meanLoss": ae.mean_loss,
+        "eventTimeSeconds": ae.event_time_seconds,
+        "sampleEverySeconds": float(options["sampleEverySeconds"]),
+        "losses": ae.losses,
+        "samples": ae.samples,
+    }
+
+def reclassify(values: np.ndarray, options: dict, include_samples: bool = True) -> Tuple[dict, bool]:
+    t = _thresholds(options)
+    a, stopped = classify_loss_array(
+        values,
+        threshold_low=t["threshold_low"],
+        threshold_medium=t["threshold_medium"],
+        threshold_high=t["threshold_high"],
+        stop_on_high=t["stop_on_high"],
+    )
+    losses, levels = a["loss"], a["level"]
+    if not len(losses):
+        raise RuntimeError("Need at least 10 sampled frames")
+    seconds_per_bunch = 10.0 * t["sample_every_seconds"]
+    max_loss = float(losses.max())
+    alerts = np.flatnonzero(levels >= 2)
+    overall = np.select([max_loss > t["threshold_high"], max_loss > t["threshold_medium"], max_loss > t["threshold_low"]], [3, 2, 1], 0)
+    payload = {
+        "analyzer": "autoencoder",
+        "riskLevel": RISK_NAMES[int(overall)],
+        "riskScore": max_loss,
+        "maxLoss": max_loss,
+        "meanLoss": float(np.mean(losses)),
+        "eventTimeSeconds": float(alerts[0] * seconds_per_bunch) if alerts.size else 0.0,
+        "sampleEverySeconds": float(options["sampleEverySeconds"]),
+        "losses": losses.tolist() if t["include_losses"] else None,
+    }
+    if include_samples:
+        payload["samples"] = [
+            {
+                "riskLevel": RISK_NAMES[level],
+                "timeSeconds": float(i * seconds_per_bunch),
+                "loss": loss,
+                "cause": ALERT_CAUSE if level else "Normal scene motion.",
+            }
+            for i, (loss, level) in enumerate(zip(losses.tolist(), levels.tolist()))
+        ]
+    return payload, stopped
+
+def risk_series(values: np.ndarray, options: dict) -> dict:
+    # Per-bunch losses scaled so that thresholdHigh is 1.0, for fusion.
+    losses = np.asarray(values, dtype=np.float64).reshape(-1)
+    threshold_high = float(options["thresholdHigh"])
+    span = 10.0 * float(options["sampleEverySeconds"])
+    return {
+        "time": np.arange(len(losses)) * span,
+        "span": span,
+        "score": losses / threshold_high,
+        "low": float(options["thresholdLow"]) / threshold_high,
+        "medium": float(options["thresholdMedium"]) / threshold_high,
+    }
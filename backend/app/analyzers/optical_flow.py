@@ -1,8 +1,11 @@
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import List, Optional
+from dataclasses import dataclass, field
+import math
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 import numpy as np
-from ..models import RiskLevel
+from ..models import RISK_NAMES, RiskLevel
+from ..path_setup import workspace_module
+from .zones import zone_options
 
 @dataclass
 class RiskSample:
@@ -12,6 +15,8 @@ class RiskSample:
     z_score: float
     active_ratio: float
     cause: str
+    zone: Optional[str] = None
+    zone_z_score: float = 0.0
 
 @dataclass
 class OpticalFlowAnalysisResult:
@@ -20,28 +25,20 @@ class OpticalFlowAnalysisResult:
     event_time_seconds: float
     samples: List[RiskSample]
     counts: dict
+    zone_counts: Dict[str, dict] = field(default_factory=dict)
 
-def _rolling_median_mad(values: list[float], window: int) -> tuple[float, float]:
-    if len(values) == 0:
-        return 0.0, 0.0
-    w = values[-window:] if len(values) > window else values
-    med = float(np.median(w))
-    mad = float(np.median(np.abs(np.array(w) - med)))
-    return med, mad
-
-def _risk_from_z(z: float, z_low: float, z_med: float, z_high: float) -> RiskLevel:
-    if z > z_high:
-        return RiskLevel.HIGH
-    if z > z_med:
-        return RiskLevel.MEDIUM
-    if z > z_low:
-        return RiskLevel.LOW
-    return RiskLevel.NONE
-
-def _cause_for(risk: RiskLevel, *, z: float, active_ratio: float) -> str:
+# Below this many samples per segment, worker spawn and import time outweigh the split (1800 frames at 5 fps ran at 0.8x).
+MIN_SEGMENT_SAMPLES = 600
+
+_ZONE_CAUSES = {RiskLevel.HIGH: "Sudden crowd acceleration", RiskLevel.MEDIUM: "Elevated crowd motion", RiskLevel.LOW: "Noticeable motion spike"}
+
+def _cause_for(risk: RiskLevel, *, z: float, active_ratio: float, zone: Optional[str] = None) -> str:
     if risk == RiskLevel.NONE:
         return "Normal scene motion."
 
+    if zone is not None:
+        return f"{_ZONE_CAUSES[risk]} in zone '{zone}'."
+
     widespread = active_ratio >= 0.18
 
     if risk == RiskLevel.HIGH:
@@ -58,6 +55,236 @@ def _cause_for(risk: RiskLevel, *, z: float, active_ratio: float) -> str:
         return "Noticeable motion increase across the scene."
     return "Noticeable motion spike detected."
 
+def _to_risk_sample(sample) -> RiskSample:
+    risk = RiskLevel(sample.risk_level)
+    return RiskSample(
+        time_seconds=sample.time_seconds,
+        risk_level=risk,
+        mean_flow_mag=sample.mean_flow_mag,
+        z_score=sample.z_score,
+        active_ratio=sample.active_ratio,
+        cause=_cause_for(risk, z=sample.z_score, active_ratio=sample.active_ratio, zone=sample.zone),
+        zone=sample.zone,
+        zone_z_score=sample.zone_z_score,
+    )
+
+class OpticalFlowScorer:
+    # One sampled frame (or precomputed flow statistics) in, one RiskSample out.
+    def __init__(self, *, _core=None, **options) -> None:
+        self._core = _core if _core is not None else workspace_module("flow_scorer").OpticalFlowScorer(**options)
+
+    @property
+    def counts(self) -> dict:
+        return self._core.counts
+
+    @property
+    def overall_risk(self) -> RiskLevel:
+        return RiskLevel(self._core.overall_risk)
+
+    @property
+    def first_high_time(self) -> Optional[float]:
+        return self._core.first_high_time
+
+    @property
+    def samples_seen(self) -> int:
+        return self._core.samples_seen
+
+    @property
+    def zone_counts(self) -> Dict[str, dict]:
+        return dict(zip(self._core.zone_names, self._core.zone_counts))
+
+    def reset_motion(self) -> None:
+        self._core.reset_motion()
+
+    def push(self, frame_bgr: np.ndarray, t_sec: float) -> Optional[RiskSample]:
+        sample = self._core.push(frame_bgr, t_sec)
+        return None if sample is None else _to_risk_sample(sample)
+
+    def score(self, t_sec: float, mean_mag: float, active_ratio: float, *zone_stats: float) -> RiskSample:
+        return _to_risk_sample(self._core.score(t_sec, mean_mag, active_ratio, *zone_stats))
+
+    def state(self) -> dict:
+        return self._core.state()
+
+    @classmethod
+    def restore(cls, state: dict) -> "OpticalFlowScorer":
+        return cls(_core=workspace_module("flow_scorer").OpticalFlowScorer.restore(state))
+
+def preload() -> None:
+    # Imports OpenCV and the shared flow code.
+    try:
+        import cv2
+
+        workspace_module("flow_scorer")
+        workspace_module("frame_sampler")
+    except Exception:
+        pass
+
+def _iter_flow_samples(
+    video_path: str,
+    *,
+    process_fps: float,
+    resize_width: int,
+    active_mag_threshold: float,
+    sampling: str,
+    use_initial_flow: bool = False,
+    zone_grid: Optional[Sequence[int]] = None,
+    zone_polygons: Optional[Sequence] = None,
+    start_sample: int = 0,
+    end_sample: Optional[int] = None,
+) -> Iterator[Tuple[float, ...]]:
+    # Yields (time_seconds, mean_flow_mag, active_ratio, *zone_mags, *zone_ratios) for samples in [start, end).
+    sampler = workspace_module("frame_sampler")
+    cap, fps = sampler.open_video(video_path)
+    step = max(1, int(round(fps / max(process_fps, 0.1))))
+    start_frame = max(0, int(start_sample) - 1) * step
+    end_frame = None if end_sample is None else int(end_sample) * step
+    meter = workspace_module("flow_scorer").FlowMeter(
+        resize_width=resize_width,
+        active_mag_threshold=active_mag_threshold,
+        use_initial_flow=use_initial_flow,
+        zone_grid=zone_grid,
+        zone_polygons=zone_polygons,
+    )
+    try:
+        for frame_idx, frame_bgr in sampler.iter_sampled_frames(cap, step, strategy=sampling, start_frame=start_frame, end_frame=end_frame):
+            measured = meter.measure(frame_bgr)
+            if measured is not None:
+                yield (float(frame_idx / fps), *measured)
+    finally:
+        cap.release()
+
+def _flow_segment(video_path: str, start_sample: int, end_sample: Optional[int], options: dict) -> List[Tuple[float, ...]]:
+    return list(_iter_flow_samples(video_path, start_sample=start_sample, end_sample=end_sample, **options))
+
+def _iter_parallel_flow_samples(video_path: str, *, segments: int, options: dict) -> Iterator[Tuple[float, ...]]:
+    import cv2
+
+    from .segments import iter_segment_results, plan_segments
+
+    cap, fps = workspace_module("frame_sampler").open_video(video_path)
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    cap.release()
+    step = max(1, int(round(fps / max(options["process_fps"], 0.1))))
+    plan = plan_segments(math.ceil(frame_count / step), segments, min_size=MIN_SEGMENT_SAMPLES)
+    if len(plan) <= 1:
+        yield from _iter_flow_samples(video_path, **options)
+        return
+    yield from iter_segment_results(_flow_segment, [(video_path, start, end, options) for start, end in plan], max_workers=len(plan))
+
+def classify_flow_signal(
+    flow_samples: Iterable[Tuple[float, ...]],
+    *,
+    mad_window: int,
+    z_low: float,
+    z_med: float,
+    z_high: float,
+    min_consecutive: int,
+    stop_on_high: bool,
+    zone_grid: Optional[Sequence[int]] = None,
+    zone_polygons: Optional[Sequence] = None,
+    zone_names: Optional[Sequence[str]] = None,
+) -> OpticalFlowAnalysisResult:
+    scorer = OpticalFlowScorer(
+        mad_window=mad_window,
+        z_low=z_low,
+        z_med=z_med,
+        z_high=z_high,
+        min_consecutive=min_consecutive,
+        zone_grid=zone_grid,
+        zone_polygons=zone_polygons,
+        zone_names=zone_names,
+    )
+    samples: List[RiskSample] = []
+    for t_sec, mean_mag, active_ratio, *zone_stats in flow_samples:
+        sample = scorer.score(t_sec, mean_mag, active_ratio, *zone_stats)
+        samples.append(sample)
+        if stop_on_high and sample.risk_level == RiskLevel.HIGH:
+            break
+
+    event_time_seconds = float(scorer.first_high_time or 0.0)
+    risk_score = float(scorer.first_high_time or 0.0)  
+
+    return OpticalFlowAnalysisResult(
+        risk_level=scorer.overall_risk,
+        risk_score=risk_score,
+        event_time_seconds=event_time_seconds,
+        samples=samples,
+        counts=scorer.counts,
+        zone_counts=scorer.zone_counts,
+    )
+
+def _escalated_levels(z: np.ndarray, *, z_low: float, z_med: float, z_high: float, min_consecutive: int) -> np.ndarray:
+    # Levels (0..3) per column, counting only once a run of non-NONE samples is min_consecutive long.
+    raw = np.select([z > z_high, z > z_med, z > z_low], [3, 2, 1], 0)
+    idx = np.arange(len(raw)).reshape(-1, *([1] * (raw.ndim - 1)))
+    run = idx - np.maximum.accumulate(np.where(raw == 0, idx, -1), axis=0)
+    return np.where(run >= max(1, int(min_consecutive)), raw, 0)
+
+def classify_flow_array(
+    signal: np.ndarray,
+    *,
+    mad_window: int,
+    z_low: float,
+    z_med: float,
+    z_high: float,
+    min_consecutive: int,
+    stop_on_high: bool,
+    zones: int = 0,
+) -> Tuple[Dict[str, np.ndarray], bool]:
+    # Vectorized classify_flow_signal over a stored (n, 3 + 2 * zones) array.
+    rolling_zscores = workspace_module("rolling_stats").rolling_zscores
+    signal = np.asarray(signal, dtype=np.float64).reshape(-1, 3 + 2 * zones)
+    thresholds = {"z_low": z_low, "z_med": z_med, "z_high": z_high, "min_consecutive": min_consecutive}
+    z = rolling_zscores(signal[:, 1], mad_window)
+    levels = _escalated_levels(z, **thresholds)
+
+    zone_arrays = {}
+    if zones:
+        zone_z = np.stack([rolling_zscores(signal[:, 3 + i], mad_window) for i in range(zones)], axis=1)
+        zone_levels = _escalated_levels(zone_z, **thresholds)
+        # Hottest zone: highest level, then highest z-score, first zone on ties (as the per-sample scorer picks it).
+        top = zone_levels.max(axis=1)
+        hottest = np.argmax(np.where(zone_levels == top[:, None], zone_z, -np.inf), axis=1)
+        rows = np.arange(len(hottest))
+        localized = (top > 0) & (top >= levels)
+        levels = np.maximum(levels, top)
+        zone_arrays = {"zone": np.where(localized, hottest, -1), "zoneZScore": zone_z[rows, hottest], "zoneLevels": zone_levels}
+
+    highs = np.flatnonzero(levels == 3)
+    stopped = bool(stop_on_high and highs.size)
+    n = int(highs[0]) + 1 if stopped else len(levels)
+    arrays = {"time": signal[:n, 0], "meanFlowMag": signal[:n, 1], "activeRatio": signal[:n, 2], "zScore": z[:n], "level": levels[:n]}
+    arrays.update({k: v[:n] for k, v in zone_arrays.items()})
+    return arrays, stopped
+
+def iter_flow_signal(
+    video_path: str,
+    *,
+    process_fps: float = 5.0,
+    resize_width: int = 320,
+    active_mag_threshold: float = 1.0,
+    sampling: str = "auto",
+    parallel_segments: int = 0,
+    use_initial_flow: bool = False,
+    zone_grid: Optional[Sequence[int]] = None,
+    zone_polygons: Optional[Sequence] = None,
+) -> Iterator[Tuple[float, ...]]:
+    # Raw flow series; thresholds only apply in classify_flow_signal, so it can be re-classified.
+    options = {
+        "process_fps": process_fps,
+        "resize_width": resize_width,
+        "active_mag_threshold": active_mag_threshold,
+        "sampling": sampling,
+        "use_initial_flow": use_initial_flow,
+        "zone_grid": zone_grid,
+        "zone_polygons": zone_polygons,
+    }
+    if parallel_segments > 1:
+        # Workers only compute raw magnitudes; baselines run here over the stitched sequence.
+        return _iter_parallel_flow_samples(video_path, segments=parallel_segments, options=options)
+    return _iter_flow_samples(video_path, **options)
+
 def analyze_video_optical_flow(
     *,
     video_path: str,
@@ -70,87 +297,185 @@ def analyze_video_optical_flow(
     min_consecutive: int = 1,
     stop_on_high: bool = True,
     active_mag_threshold: float = 1.0,
+    sampling: str = "auto",
+    parallel_segments: int = 0,
+    use_initial_flow: bool = False,
+    zone_grid: Optional[Sequence[int]] = None,
+    zone_polygons: Optional[Sequence] = None,
+    zone_names: Optional[Sequence[str]] = None,
 ) -> OpticalFlowAnalysisResult:
-    import cv2
+    flow_samples = iter_flow_signal(
+        video_path,
+        process_fps=process_fps,
+        resize_width=resize_width,
+        active_mag_threshold=active_mag_threshold,
+        sampling=sampling,
+        parallel_segments=parallel_segments,
+        use_initial_flow=use_initial_flow,
+        zone_grid=zone_grid,
+        zone_polygons=zone_polygons,
+    )
+    try:
+        return classify_flow_signal(
+            flow_samples,
+            mad_window=mad_window,
+            z_low=z_low,
+            z_med=z_med,
+            z_high=z_high,
+            min_consecutive=min_consecutive,
+            stop_on_high=stop_on_high,
+            zone_grid=zone_grid,
+            zone_polygons=zone_polygons,
+            zone_names=zone_names,
+        )
+    finally:
+        flow_samples.close()
 
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        raise RuntimeError(f"Could not open video: {video_path}")
+def _thresholds(options: dict) -> dict:
+    return {
+        "mad_window": 30,
+        "min_consecutive": int(options["minConsecutive"]),
+        "z_low": float(options["zLow"]),
+        "z_med": float(options["zMed"]),
+        "z_high": float(options["zHigh"]),
+        "stop_on_high": bool(options.get("stopOnHigh", True)),
+    }
 
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    if not fps or fps <= 0:
-        fps = 25.0
+def _zone_names(zones: dict) -> List[str]:
+    return workspace_module("flow_scorer").resolve_zone_names(zones["zone_grid"], zones["zone_polygons"], zones["zone_names"])
 
-    step = max(1, int(round(fps / max(process_fps, 0.1))))
-    prev_gray = None
-    mags: list[float] = []
-    samples: List[RiskSample] = []
-    counts = {"NONE": 0, "LOW": 0, "MEDIUM": 0, "HIGH": 0}
-    overall_risk = RiskLevel.NONE
-    first_high_time: Optional[float] = None
-    consec = 0
-    frame_idx = 0
-    try:
-        while True:
-            ok, frame_bgr = cap.read()
-            if not ok:
-                break
-            if frame_idx % step != 0:
-                frame_idx += 1
-                continue
-            t_sec = float(frame_idx / fps)
-
-            h, w = frame_bgr.shape[:2]
-            if w > 0 and resize_width > 0 and w != resize_width:
-                new_w = int(resize_width)
-                new_h = max(1, int(h * (new_w / w)))
-                frame_bgr = cv2.resize(frame_bgr, (new_w, new_h), interpolation=cv2.INTER_AREA)
-
-            gray = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2GRAY)
-
-            if prev_gray is None:
-                prev_gray = gray
-                frame_idx += 1
-                continue
-
-            flow = cv2.calcOpticalFlowFarneback(prev_gray, gray, None, pyr_scale=0.5, levels=3, winsize=15, iterations=3, poly_n=5, poly_sigma=1.2, flags=0,)
-            mag, _ang = cv2.cartToPolar(flow[..., 0], flow[..., 1])
-            mean_mag = float(np.mean(mag))
-            active_ratio = float(np.mean(mag > float(active_mag_threshold)))
-            mags.append(mean_mag)
-            med, mad = _rolling_median_mad(mags[:-1], window=mad_window)
-            denom = (mad * 1.4826) + 1e-6
-            z = (mean_mag - med) / denom if len(mags) > 2 else 0.0
-
-            risk = _risk_from_z(float(z), z_low, z_med, z_high)
-
-            if risk != RiskLevel.NONE:
-                consec += 1
-            else:
-                consec = 0
-
-            escalated = risk
-            if risk != RiskLevel.NONE and consec < max(1, int(min_consecutive)):
-                escalated = RiskLevel.NONE
-
-            cause = _cause_for(escalated, z=float(z), active_ratio=active_ratio)
-
-            samples.append(RiskSample(time_seconds=t_sec, risk_level=escalated, mean_flow_mag=mean_mag, z_score=float(z), active_ratio=active_ratio, cause=cause,))
-            counts[escalated.value] = counts.get(escalated.value, 0) + 1
-            overall_risk = max(overall_risk, escalated, key=lambda r: ["NONE", "LOW", "MEDIUM", "HIGH"].index(r.value),)
-
-            if escalated == RiskLevel.HIGH and first_high_time is None:
-                first_high_time = t_sec
-                if stop_on_high:
-                    break
-
-            prev_gray = gray
-            frame_idx += 1
+def _summary(options: dict, counts: dict, samples: int, zone_counts: Optional[Dict[str, dict]] = None) -> dict:
+    summary = {
+        "processFps": float(options["processFps"]),
+        "minConsecutive": int(options["minConsecutive"]),
+        "zLow": float(options["zLow"]),
+        "zMed": float(options["zMed"]),
+        "zHigh": float(options["zHigh"]),
+        "counts": counts,
+        "samples": samples,
+    }
+    if zone_counts:
+        summary["zones"] = [
+            {"name": name, "riskLevel": max((r for r in RISK_NAMES if c[r]), key=RISK_NAMES.index, default="NONE"), "counts": c}
+            for name, c in zone_counts.items()
+        ]
+    return summary
 
-    finally:
-        cap.release()
+def iter_signal(video_path: str, options: dict) -> Iterator[Tuple[float, ...]]:
+    zones = zone_options(options)
+    return iter_flow_signal(
+        video_path,
+        process_fps=float(options["processFps"]),
+        parallel_segments=int(options.get("parallelSegments", 0)),
+        use_initial_flow=bool(options.get("useInitialFlow", False)),
+        zone_grid=zones["zone_grid"],
+        zone_polygons=zones["zone_polygons"],
+    )
+
+class FlowSignalStream:
+    # Push version of _iter_flow_samples for a decode shared with other analyzers: takes every `step`-th frame.
+    def __init__(
+        self,
+        fps: float,
+        *,
+        process_fps: float,
+        resize_width: int = 320,
+        active_mag_threshold: float = 1.0,
+        use_initial_flow: bool = False,
+        zone_grid: Optional[Sequence[int]] = None,
+        zone_polygons: Optional[Sequence] = None,
+    ) -> None:
+        self.fps = float(fps)
+        self.step = max(1, int(round(fps / max(process_fps, 0.1))))
+        self._meter = workspace_module("flow_scorer").FlowMeter(
+            resize_width=resize_width,
+            active_mag_threshold=active_mag_threshold,
+            use_initial_flow=use_initial_flow,
+            zone_grid=zone_grid,
+            zone_polygons=zone_polygons,
+        )
+
+    def push(self, frame_idx: int, frame_bgr: np.ndarray) -> List[Tuple[float, ...]]:
+        measured = self._meter.measure(frame_bgr)
+        return [] if measured is None else [(float(frame_idx / self.fps), *measured)]
+
+    def flush(self) -> List[Tuple[float, ...]]:
+        return []
+
+def signal_stream(fps: float, options: dict) -> FlowSignalStream:
+    zones = zone_options(options)
+    return FlowSignalStream(
+        fps,
+        process_fps=float(options["processFps"]),
+        use_initial_flow=bool(options.get("useInitialFlow", False)),
+        zone_grid=zones["zone_grid"],
+        zone_polygons=zones["zone_polygons"],
+    )
+
+def _sample_payload(level: RiskLevel, t: float, mag: float, z: float, ratio: float, cause: str) -> dict:
+    return {"riskLevel": level.value, "timeSeconds": t, "meanFlowMag": mag, "zScore": z, "activeRatio": ratio, "cause": cause}
+
+def classify(signal: Iterable[Tuple[float, ...]], options: dict) -> dict:
+    zones = zone_options(options)
+    of = classify_flow_signal(signal, **_thresholds(options), **zones)
+    first_alert = next((s for s in of.samples if s.risk_level in {RiskLevel.MEDIUM, RiskLevel.HIGH}), None)
+    scores = [max(s.z_score, s.zone_z_score) if of.zone_counts else s.z_score for s in of.samples]
+    payload = {
+        "analyzer": "optical_flow",
+        "riskLevel": of.risk_level.value,
+        "riskScore": float(max(scores, default=0.0)),
+        "eventTimeSeconds": float(first_alert.time_seconds) if first_alert else 0.0,
+        "summary": _summary(options, of.counts, len(of.samples), of.zone_counts),
+        "samples": [_sample_payload(s.risk_level, s.time_seconds, s.mean_flow_mag, s.z_score, s.active_ratio, s.cause) for s in of.samples],
+    }
+    if of.zone_counts:
+        payload["eventZone"] = first_alert.zone if first_alert else None
+        for item, s in zip(payload["samples"], of.samples):
+            item.update(zone=s.zone, zoneZScore=s.zone_z_score)
+    return payload
 
-    event_time_seconds = float(first_high_time or 0.0)
-    risk_score = float(first_high_time or 0.0)  
+def reclassify(values: np.ndarray, options: dict, include_samples: bool = True) -> Tuple[dict, bool]:
+    names = _zone_names(zone_options(options))
+    a, stopped = classify_flow_array(values, **_thresholds(options), zones=len(names))
+    levels = a["level"]
+    alerts = np.flatnonzero(levels >= 2)
+    counts = np.bincount(levels, minlength=4).tolist()
+    zone_counts = {name: dict(zip(RISK_NAMES, np.bincount(a["zoneLevels"][:, i], minlength=4).tolist())) for i, name in enumerate(names)}
+    scores = np.maximum(a["zScore"], a["zoneZScore"]) if names else a["zScore"]
+    payload = {
+        "analyzer": "optical_flow",
+        "riskLevel": RISK_NAMES[int(levels.max(initial=0))],
+        "riskScore": float(scores.max()) if len(levels) else 0.0,
+        "eventTimeSeconds": float(a["time"][alerts[0]]) if alerts.size else 0.0,
+        "summary": _summary(options, dict(zip(RISK_NAMES, counts)), len(levels), zone_counts),
+    }
+    zone_of = [names[i] if i >= 0 else None for i in a["zone"].tolist()] if names else [None] * len(levels)
+    if names:
+        payload["eventZone"] = zone_of[alerts[0]] if alerts.size else None
+    if include_samples:
+        payload["samples"] = []
+        for i, (t, mag, z, ratio, level) in enumerate(zip(*(a[k].tolist() for k in ("time", "meanFlowMag", "zScore", "activeRatio", "level")))):
+            risk = RiskLevel(RISK_NAMES[level])
+            item = _sample_payload(risk, t, mag, z, ratio, _cause_for(risk, z=z, active_ratio=ratio, zone=zone_of[i]))
+            if names:
+                item.update(zone=zone_of[i], zoneZScore=float(a["zoneZScore"][i]))
+            payload["samples"].append(item)
+    return payload, stopped
 
-    return OpticalFlowAnalysisResult(risk_level=overall_risk, risk_score=risk_score, event_time_seconds=event_time_seconds, samples=samples, counts=counts,)
+def risk_series(values: np.ndarray, options: dict) -> dict:
+    # Per-sample z-scores scaled so that zHigh is 1.0, for fusion.
+    zones = len(_zone_names(zone_options(options)))
+    signal = np.asarray(values, dtype=np.float64).reshape(-1, 3 + 2 * zones)
+    z_high = float(options["zHigh"])
+    rolling_zscores = workspace_module("rolling_stats").rolling_zscores
+    mad_window = _thresholds(options)["mad_window"]
+    z = rolling_zscores(signal[:, 1], mad_window)
+    for i in range(zones):
+        z = np.maximum(z, rolling_zscores(signal[:, 3 + i], mad_window))
+    return {
+        "time": signal[:, 0],
+        "span": 1.0 / max(float(options["processFps"]), 0.1),
+        "score": z / z_high,
+        "low": float(options["zLow"]) / z_high,
+        "medium": float(options["zMed"]) / z_high,
+    }
@@ -0,0 +1,28 @@
+from __future__ import annotations
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Iterator, List, Optional, Sequence, Tuple
+
+Segment = Tuple[int, Optional[int]]
+
+def plan_segments(total: int, parts: int, *, min_size: int = 1) -> List[Segment]:
+    # Up to `parts` contiguous ranges of [0, total); the last is open-ended since frame counts are estimates.
+    parts = max(1, min(int(parts), int(total) // max(1, int(min_size))))
+    size = math.ceil(max(0, int(total)) / parts) if total > 0 else 0
+    if parts <= 1 or size <= 0:
+        return [(0, None)]
+    bounds = [i * size for i in range(parts) if i * size < total]
+    return [(start, bounds[i + 1] if i + 1 < len(bounds) else None) for i, start in enumerate(bounds)]
+
+def iter_segment_results(fn: Callable[..., list], args: Sequence[Tuple[Any, ...]], *, max_workers: int) -> Iterator[Any]:
+    # Runs fn(*a) per segment in a process pool and yields their items in segment order.
+    executor = ProcessPoolExecutor(max_workers=max(1, int(max_workers)), mp_context=multiprocessing.get_context("spawn"))
+    futures = [executor.submit(fn, *a) for a in args]
+    try:
+        for future in futures:
+            yield from future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
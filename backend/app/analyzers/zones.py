@@ -0,0 +1,52 @@
+from __future__ import annotations
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+MAX_ZONES = 64
+
+def parse_zone_grid(text: Optional[str]) -> Optional[Tuple[int, int]]:
+    # "3x4" -> (3 rows, 4 columns); empty means no grid.
+    if not text or not str(text).strip():
+        return None
+    try:
+        rows, cols = (int(part) for part in str(text).lower().split("x"))
+    except ValueError:
+        raise ValueError(f"Invalid zone grid {text!r}; expected ROWSxCOLS, e.g. 3x3") from None
+    if not (1 <= rows <= 16 and 1 <= cols <= 16):
+        raise ValueError("Zone grid rows and columns must be between 1 and 16")
+    return rows, cols
+
+def parse_zones(value: Any) -> List[dict]:
+    # ROI polygons: [{"name": ..., "points": [[x, y], ...]}] with x and y as fractions of the frame size.
+    if isinstance(value, str):
+        if not value.strip():
+            return []
+        try:
+            value = json.loads(value)
+        except ValueError:
+            raise ValueError("zones must be a JSON list of {name, points} objects") from None
+    if not value:
+        return []
+    if not isinstance(value, list) or len(value) > MAX_ZONES:
+        raise ValueError(f"zones must be a list of at most {MAX_ZONES} {{name, points}} objects")
+    zones = []
+    for i, zone in enumerate(value):
+        points = zone.get("points") if isinstance(zone, dict) else None
+        try:
+            points = [[float(x), float(y)] for x, y in points]
+        except (TypeError, ValueError):
+            raise ValueError(f"Zone {i + 1}: points must be a list of [x, y] pairs") from None
+        if len(points) < 3 or not all(0.0 <= c <= 1.0 for point in points for c in point):
+            raise ValueError(f"Zone {i + 1}: needs at least 3 points with x and y between 0 and 1")
+        zones.append({"name": str(zone.get("name") or f"zone{i + 1}"), "points": points})
+    if len({zone["name"] for zone in zones}) != len(zones):
+        raise ValueError("Zone names must be unique")
+    return zones
+
+def zone_options(options: Dict[str, Any]) -> Dict[str, Any]:
+    # zoneGrid / zones analysis options -> FlowMeter and OpticalFlowScorer keyword arguments.
+    grid = parse_zone_grid(options.get("zoneGrid"))
+    zones = parse_zones(options.get("zones"))
+    if grid is not None and zones:
+        raise ValueError("Use either zoneGrid or zones, not both")
+    return {"zone_grid": grid, "zone_polygons": [z["points"] for z in zones] or None, "zone_names": [z["name"] for z in zones] or None}
@@ -0,0 +1,80 @@
+from __future__ import annotations
+import asyncio
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, List, Tuple
+
+class Subscriber:
+    def __init__(self, loop: asyncio.AbstractEventLoop, *, max_pending: int) -> None:
+        self._loop = loop
+        self._lock = Lock()
+        self._wakeup = asyncio.Event()
+        self._max_pending = max(1, int(max_pending))
+        self._pending: "OrderedDict[Tuple[str, str], dict]" = OrderedDict()
+        self._seqs: List[int] = []
+        self._overflowed = False
+
+    def offer(self, event: dict) -> None:
+        with self._lock:
+            if not self._overflowed:
+                # Coalesce per entity: a slow consumer only ever sees the latest state of each alert/location.
+                key = (event["entity"], event["key"])
+                self._pending[key] = event
+                self._pending.move_to_end(key)
+                self._seqs.append(int(event["seq"]))
+                if len(self._pending) > self._max_pending:
+                    self._pending.clear()
+                    self._seqs.clear()
+                    self._overflowed = True
+        self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def wait(self, timeout: float) -> None:
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def drain(self) -> Tuple[List[int], List[dict], bool]:
+        with self._lock:
+            self._wakeup.clear()
+            seqs, self._seqs = self._seqs, []
+            events = list(self._pending.values())
+            self._pending.clear()
+            overflowed, self._overflowed = self._overflowed, False
+        return seqs, events, overflowed
+
+class ChangeFeed:
+    def __init__(self, *, max_pending: int = 1000) -> None:
+        self._lock = Lock()
+        self._subscribers: Dict[int, Subscriber] = {}
+        self._max_pending = max_pending
+
+    def subscribe(self) -> Subscriber:
+        sub = Subscriber(asyncio.get_running_loop(), max_pending=self._max_pending)
+        with self._lock:
+            self._subscribers[id(sub)] = sub
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        with self._lock:
+            self._subscribers.pop(id(sub), None)
+
+    def publish(self, event: dict) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.values())
+        for sub in subscribers:
+            try:
+                sub.offer(event)
+            except RuntimeError:
+                # The subscriber's event loop is closed; it will be unsubscribed by its handler.
+                continue
+
+def events_payload(events: List[dict], *, seq: int, epoch: str) -> dict:
+    return {
+        "seq": seq,
+        "epoch": epoch,
+        "reset": False,
+        "alerts": [e["data"] for e in events if e["entity"] == "alert"],
+        "locations": [e["data"] for e in events if e["entity"] == "location" and e["op"] == "upsert"],
+        "removedLocations": [e["key"] for e in events if e["entity"] == "location" and e["op"] == "remove"],
+    }
@@ -0,0 +1,213 @@
+from __future__ import annotations
+import argparse
+import os
+import queue
+import secrets
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from typing import Any, List, Optional, Tuple
+import numpy as np
+
+WARMUP_SHAPE = (1, 227, 227, 10, 1)
+
+def warm_up(model) -> None:
+    # The first predict builds the inference graph.
+    model.predict_on_batch(np.zeros(WARMUP_SHAPE, dtype=np.float32))
+
+def _authkey(address: str) -> bytes:
+    key = os.getenv("INFERENCE_AUTHKEY")
+    if key:
+        return key.encode("utf-8")
+    # Without INFERENCE_AUTHKEY the server writes a fresh key next to the socket on every start.
+    path = f"{address}.key"
+    with os.fdopen(os.open(path, os.O_RDONLY | os.O_NOFOLLOW), "rb") as f:
+        st = os.fstat(f.fileno())
+        if st.st_uid != os.getuid() or st.st_mode & 0o077:
+            raise PermissionError(f"{path} must belong to this user and have mode 0600")
+        return f.read()
+
+def create_authkey(address: str) -> bytes:
+    if os.getenv("INFERENCE_AUTHKEY"):
+        return _authkey(address)
+    key = secrets.token_hex(32).encode("ascii")
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(address)), prefix=".inference-key-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(key)
+        os.replace(tmp, f"{address}.key")
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return key
+
+def _lock(address: str) -> Optional[int]:
+    import fcntl
+
+    # With several uvicorn workers every lifespan tries to start a server; the lock keeps exactly one per socket.
+    fd = os.open(f"{address}.lock", os.O_CREAT | os.O_RDWR | os.O_NOFOLLOW, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return None
+    return fd
+
+class RemoteModel:
+    # Stands in for the Keras model in analysis workers, forwarding predict_on_batch() to the inference server.
+    def __init__(self, address: str, *, connect_timeout: float = 120.0) -> None:
+        self._address = address
+        self._connect_timeout = max(0.0, float(connect_timeout))
+        self._conn = self._connect()
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        deadline = time.monotonic() + self._connect_timeout
+        while True:
+            try:
+                return Client(self._address, family="AF_UNIX", authkey=_authkey(self._address))
+            except (FileNotFoundError, ConnectionRefusedError, AuthenticationError):
+                # The server may still be importing TensorFlow, or restarting with a new key.
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.2)
+
+    def _request(self, batch: np.ndarray):
+        self._conn.send(batch)
+        return self._conn.recv()
+
+    def predict_on_batch(self, batch: np.ndarray) -> np.ndarray:
+        batch = np.asarray(batch)
+        with self._lock:
+            try:
+                status, payload = self._request(batch)
+            except (EOFError, OSError):
+                # The server restarted: reconnect and retry once (a predict is safe to repeat).
+                self._conn.close()
+                self._conn = self._connect()
+                status, payload = self._request(batch)
+        if status != "ok":
+            raise RuntimeError(f"Inference server failed: {payload}")
+        return payload
+
+    def close(self) -> None:
+        self._conn.close()
+
+class InferenceServer:
+    # One model, many clients: requests arriving within `max_wait` run as one predict_on_batch of up to `max_batch`.
+    def __init__(self, model, *, max_batch: int = 32, max_wait: float = 0.005) -> None:
+        self._model = model
+        self._max_batch = max(1, int(max_batch))
+        self._max_wait = max(0.0, float(max_wait))
+        self._requests: "queue.Queue[Optional[Tuple[np.ndarray, Future]]]" = queue.Queue()
+        self.batches = 0
+        self.bunches = 0
+
+    def _handle(self, conn) -> None:
+        try:
+            while True:
+                batch = conn.recv()
+                future: Future = Future()
+                self._requests.put((np.asarray(batch), future))
+                try:
+                    conn.send(("ok", future.result()))
+                except Exception as e:
+                    conn.send(("error", str(e)))
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+
+    def _next_group(self) -> Optional[List[Tuple[np.ndarray, Future]]]:
+        first = self._requests.get()
+        if first is None:
+            return None
+        group, size = [first], len(first[0])
+        deadline = time.monotonic() + self._max_wait
+        while size < self._max_batch:
+            try:
+                item = self._requests.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is None:
+                self._requests.put(None)
+                break
+            group.append(item)
+            size += len(item[0])
+        return group
+
+    def _batch_loop(self) -> None:
+        while True:
+            group = self._next_group()
+            if group is None:
+                return
+            try:
+                batch = group[0][0] if len(group) == 1 else np.concatenate([b for b, _ in group])
+                out = np.asarray(self._model.predict_on_batch(batch))
+            except Exception as e:
+                for _, future in group:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.bunches += len(batch)
+            start = 0
+            for b, future in group:
+                future.set_result(out[start : start + len(b)])
+                start += len(b)
+
+    def serve_forever(self, listener: Listener) -> None:
+        threading.Thread(target=self._batch_loop, name="inference-batcher", daemon=True).start()
+        while True:
+            try:
+                conn = listener.accept()
+            except (OSError, EOFError, AuthenticationError):
+                # A client that fails the handshake or hangs up only loses its own connection.
+                continue
+            threading.Thread(target=self._handle, args=(conn,), name="inference-client", daemon=True).start()
+
+    def stop(self) -> None:
+        self._requests.put(None)
+
+def run_server(address: str, *, model_path: Optional[str] = None, max_batch: int = 32, max_wait: float = 0.005) -> int:
+    lock_fd = _lock(address)
+    if lock_fd is None:
+        return 0
+
+    from .analyzers.autoencoder import _get_default_model_path
+    from .path_setup import workspace_module
+
+    model = workspace_module("run_video_risk_alerts")._load_model(model_path or _get_default_model_path())
+    warm_up(model)
+
+    if os.path.exists(address):
+        os.unlink(address)
+    listener = Listener(address, family="AF_UNIX", authkey=create_authkey(address))
+    os.chmod(address, 0o600)
+    try:
+        InferenceServer(model, max_batch=max_batch, max_wait=max_wait).serve_forever(listener)
+    finally:
+        listener.close()
+        os.close(lock_fd)
+    return 0
+
+def start_inference_server(address: str, **kwargs: Any):
+    import multiprocessing
+
+    process = multiprocessing.get_context("spawn").Process(target=run_server, args=(address,), kwargs=kwargs, name="inference-server", daemon=True)
+    process.start()
+    return process
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Serve the autoencoder to analysis workers over a Unix socket, batching bunches across requests.")
+    parser.add_argument("--socket", default=os.getenv("INFERENCE_SOCKET", "/tmp/crowd-risk-inference.sock"), help="Unix socket path.")
+    parser.add_argument("--model", default=None, help="Model .h5 (default: Crowd_Anomaly_Detection/AnomalyDetector.h5).")
+    parser.add_argument("--max-batch", type=int, default=int(os.getenv("INFERENCE_MAX_BATCH", "32")), help="Bunches per model call (default: 32).")
+    parser.add_argument("--max-wait-ms", type=float, default=float(os.getenv("INFERENCE_MAX_WAIT_MS", "5")), help="How long to wait for more requests before a call (default: 5).")
+    args = parser.parse_args()
+    return run_server(args.socket, model_path=args.model, max_batch=args.max_batch, max_wait=args.max_wait_ms / 1000.0)
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,308 @@
+from __future__ import annotations
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Any, Callable, Dict, Optional, Tuple
+from uuid import uuid4
+from .analysis import analyze_with_signal, classify_params, classify_signal, fusion_enabled, parse_analyzers, signal_params
+from .models import JobStatus
+from .result_cache import ResultCache, cache_key
+from .signal_store import SignalStore
+
+class JobQueueFull(Exception):
+    pass
+
+def _noop() -> None:
+    return None
+
+@dataclass
+class AnalysisJob:
+    id: str
+    created_at: datetime
+    user_email: str
+    location: str
+    file_name: str
+    analyzer: str
+    upload_sha256: Optional[str] = None
+    cache_hit: Optional[str] = None
+    cancel_requested: bool = False
+    status: JobStatus = JobStatus.QUEUED
+    finished_at: Optional[datetime] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    future: Optional[Future] = field(default=None, repr=False)
+
+class JobManager:
+    def __init__(
+        self,
+        *,
+        max_workers: int = 2,
+        max_queue: int = 16,
+        max_finished: int = 500,
+        on_result: Optional[Callable[[AnalysisJob, dict], dict]] = None,
+        cache: Optional[ResultCache] = None,
+        signal_store: Optional[SignalStore] = None,
+        initializer: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self._lock = Lock()
+        self._jobs: "OrderedDict[str, AnalysisJob]" = OrderedDict()
+        self._max_workers = max(1, int(max_workers))
+        self._max_queue = max(0, int(max_queue))
+        self._max_finished = max(1, int(max_finished))
+        self._on_result = on_result
+        self._cache = cache
+        self._signal_store = signal_store
+        self._initializer = initializer
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=self._initializer,
+            )
+        return self._executor
+
+    def _submit_to_pool(self, fn: Callable[..., Any], **kwargs: Any) -> Tuple[ProcessPoolExecutor, Future]:
+        # Callers hold `_lock`. A dead worker (OOM kill, segfault) breaks the whole pool: start a new one and retry once.
+        try:
+            executor = self._get_executor()
+            return executor, executor.submit(fn, **kwargs)
+        except BrokenProcessPool:
+            self._discard_executor(self._executor)
+            executor = self._get_executor()
+            return executor, executor.submit(fn, **kwargs)
+
+    def _discard_executor(self, executor: Optional[ProcessPoolExecutor]) -> None:
+        # A broken pool has already terminated its workers and failed its futures.
+        if executor is not None and executor is self._executor:
+            self._executor = None
+
+    def warm_up(self) -> None:
+        # Starts every worker now, so the initializer (model preload) runs at startup rather than on the first job.
+        with self._lock:
+            for _ in range(self._max_workers):
+                self._submit_to_pool(_noop)
+
+    def _active_count(self) -> int:
+        return sum(1 for j in self._jobs.values() if j.status in {JobStatus.QUEUED, JobStatus.RUNNING})
+
+    def _prune_finished(self) -> None:
+        finished = [j.id for j in self._jobs.values() if j.status not in {JobStatus.QUEUED, JobStatus.RUNNING}]
+        for job_id in finished[: max(0, len(finished) - self._max_finished)]:
+            del self._jobs[job_id]
+
+    def submit(
+        self,
+        *,
+        video_path: str,
+        analyzer: str,
+        options: Dict[str, Any],
+        user_email: str,
+        location: str,
+        file_name: str,
+        upload_sha256: Optional[str] = None,
+    ) -> AnalysisJob:
+        # Blocks on a cache hit, which is finished here rather than in the pool; callers on an event loop use a thread.
+        job = AnalysisJob(
+            id=str(uuid4()),
+            created_at=datetime.now(timezone.utc),
+            user_email=user_email,
+            location=location,
+            file_name=file_name,
+            analyzer=analyzer,
+            upload_sha256=upload_sha256,
+        )
+        keys = self._cache_keys(upload_sha256, analyzer, options) if upload_sha256 else None
+        cached = None
+        if self._cache is not None and keys is not None:
+            cached = self._cached_result(keys, analyzer, options)
+            job.cache_hit = None if cached is None else cached[0]
+
+        with self._lock:
+            if cached is None and self._active_count() >= self._max_workers + self._max_queue:
+                raise JobQueueFull(f"Analysis queue is full ({self._max_workers + self._max_queue} jobs in flight)")
+            self._jobs[job.id] = job
+            if cached is None:
+                executor, job.future = self._submit_to_pool(analyze_with_signal, video_path=video_path, analyzer=analyzer, options=options)
+
+        if cached is not None:
+            # Same upload and parameters as an earlier analysis: finish now, without the worker pool.
+            self._link_signal(job, keys, options)
+            self._finish(job.id, JobStatus.SUCCEEDED, cached[1], None)
+            return job
+        job.future.add_done_callback(lambda fut, job_id=job.id, keys=keys, options=options: self._on_done(job_id, fut, keys, options, executor))
+        return job
+
+    def _cache_keys(self, upload_sha256: str, analyzer: str, options: Dict[str, Any]) -> Tuple[str, Dict[str, str]]:
+        # One result key for the run, one signal key per analyzer, so signals are shared between analyzer combinations.
+        analyzers = parse_analyzers(analyzer)
+        signal_keys = {name: cache_key(sha256=upload_sha256, analyzer=name, signal=signal_params(name, options)) for name in analyzers}
+        classify = {name: classify_params(name, options) for name in analyzers}
+        fusion = fusion_enabled(analyzers, options)
+        return cache_key(sha256=upload_sha256, analyzer=analyzer, signal=signal_keys, classify=classify, fusion=fusion), signal_keys
+
+    def _cached_result(self, keys: Tuple[str, Dict[str, str]], analyzer: str, options: Dict[str, Any]) -> Optional[Tuple[str, dict]]:
+        result_key, signal_keys = keys
+        result = self._cache.get("result", result_key)
+        if result is not None:
+            return "result", result
+        signals = {}
+        for name, signal_key in signal_keys.items():
+            signals[name] = self._cache.get("signal", signal_key)
+            if signals[name] is None:
+                return None
+        # Same video and sampling, different thresholds: re-classify the stored signals instead of decoding again.
+        try:
+            result = classify_signal(analyzer=analyzer, signals=signals, options=options)
+        except Exception:
+            return None
+        if result is None:
+            return None
+        self._cache.put("result", result_key, result)
+        for name, signal in signals.items():
+            self._save_signal(signal_keys[name], name, signal)
+        return "signal", result
+
+    def _save_signal(self, signal_key: str, analyzer: str, signal: dict) -> None:
+        if self._signal_store is None:
+            return
+        try:
+            self._signal_store.save_signal(signal_key, analyzer=analyzer, values=signal["values"], complete=signal["complete"])
+        except Exception:
+            pass
+
+    def _link_signal(self, job: AnalysisJob, keys: Optional[Tuple[str, Dict[str, str]]], options: Dict[str, Any]) -> None:
+        # Lets POST /api/analyses/{id}/reclassify find the stored signals, and the options they were produced with.
+        if self._signal_store is None or keys is None:
+            return
+        info = {
+            "analyzer": job.analyzer,
+            "sha256": job.upload_sha256,
+            "userEmail": job.user_email,
+            "location": job.location,
+            "fileName": job.file_name,
+            "options": options,
+        }
+        try:
+            self._signal_store.link(job.id, keys[1], info)
+        except Exception:
+            pass
+
+    def _on_done(
+        self,
+        job_id: str,
+        fut: Future,
+        keys: Optional[Tuple[str, Dict[str, str]]] = None,
+        options: Optional[Dict[str, Any]] = None,
+        executor: Optional[ProcessPoolExecutor] = None,
+    ) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status == JobStatus.CANCELLED:
+                return
+            if not fut.cancelled() and isinstance(fut.exception(), BrokenProcessPool):
+                # Every job in flight on that pool fails with it; the next submit starts a new one.
+                self._discard_executor(executor)
+
+        status = JobStatus.SUCCEEDED
+        result = None
+        error = None
+        if fut.cancelled():
+            status = JobStatus.CANCELLED
+        elif fut.exception() is not None:
+            status = JobStatus.FAILED
+            error = f"Analysis failed: {fut.exception()}"
+        else:
+            result, signals = fut.result()
+            if keys is not None:
+                if self._cache is not None:
+                    self._cache.put("result", keys[0], result)
+                for name, signal in signals.items():
+                    if self._cache is not None:
+                        self._cache.put("signal", keys[1][name], signal)
+                    self._save_signal(keys[1][name], name, signal)
+                self._link_signal(job, keys, options or {})
+        self._finish(job_id, status, result, error)
+
+    def _finish(self, job_id: str, status: JobStatus, result: Optional[dict], error: Optional[str]) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            if job.cancel_requested and status == JobStatus.SUCCEEDED:
+                status, result = JobStatus.CANCELLED, None
+
+        if status == JobStatus.SUCCEEDED and self._on_result is not None:
+            try:
+                result = self._on_result(job, result)
+            except Exception as e:
+                status = JobStatus.FAILED
+                error = f"Analysis failed: {e}"
+
+        with self._lock:
+            if job.status == JobStatus.CANCELLED:
+                return
+            job.status = status
+            job.result = result
+            job.error = error
+            job.finished_at = datetime.now(timezone.utc)
+            self._prune_finished()
+
+    def get(self, job_id: str) -> Optional[AnalysisJob]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.status == JobStatus.QUEUED and job.future is not None and job.future.running():
+                job.status = JobStatus.RUNNING
+            return job
+
+    def cancel(self, job_id: str) -> Optional[AnalysisJob]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status not in {JobStatus.QUEUED, JobStatus.RUNNING}:
+                return job
+            future = job.future
+        # Outside the lock: a successful cancel() runs _on_done right away, which finishes the job as CANCELLED.
+        if future is None or not future.cancel():
+            with self._lock:
+                # Already executing: it keeps its worker (and counts as active) until it ends; the result is discarded.
+                if job.status in {JobStatus.QUEUED, JobStatus.RUNNING}:
+                    job.cancel_requested = True
+        return job
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "maxWorkers": self._max_workers,
+                "maxQueue": self._max_queue,
+                "active": self._active_count(),
+                "tracked": len(self._jobs),
+                "cache": None if self._cache is None else self._cache.stats(),
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+def serialize_job(job: AnalysisJob) -> dict:
+    return {
+        "jobId": job.id,
+        "status": job.status.value,
+        "analyzer": job.analyzer,
+        "fileName": job.file_name,
+        "sha256": job.upload_sha256,
+        "cacheHit": job.cache_hit,
+        "cancelRequested": job.cancel_requested,
+        "createdAt": job.created_at.isoformat(),
+        "finishedAt": job.finished_at.isoformat() if job.finished_at else None,
+        "result": job.result,
+        "error": job.error,
+    }
@@ -1,33 +1,81 @@
 from __future__ import annotations
 
+import hashlib
+import json
 import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from datetime import datetime, timezone
+from functools import partial
 from pathlib import Path
-from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from typing import List, Optional, Tuple
+from uuid import uuid4
+from fastapi import Body, Depends, FastAPI, File, Form, HTTPException, Query, Request, Response, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from .analyzers.autoencoder import analyze_video_autoencoder
-from .analyzers.optical_flow import analyze_video_optical_flow
-from .models import RiskLevel
-from .storage import AlertStore, LocationStore
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from .analysis import normalize_analyzer, parse_analyzers, preload_analyzers, reclassify_array
+from .analyzers.zones import parse_zone_grid, parse_zones, zone_options
+from .events import ChangeFeed, events_payload
+from .jobs import AnalysisJob, JobManager, JobQueueFull, serialize_job
+from .models import LocationPing, RiskLevel
+from .result_cache import ResultCache
+from .signal_store import SignalStore
+from .streams import StreamLimitReached, StreamManager, check_source, serialize_stream
+from .storage import BoundingBox, create_stores, haversine_m, in_bbox, parse_timestamp
+from .uploads import UploadLimitMiddleware, UploadTooLarge, save_upload_streaming
 
-app = FastAPI(title="Crowd Risk API", version="0.1.0")
-store = AlertStore()
-location_store = LocationStore()
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    inference_process = None
+    if INFERENCE_SOCKET and INFERENCE_SERVER:
+        from .inference_server import start_inference_server
+
+        inference_process = start_inference_server(
+            INFERENCE_SOCKET,
+            max_batch=int(os.getenv("INFERENCE_MAX_BATCH", "32")),
+            max_wait=float(os.getenv("INFERENCE_MAX_WAIT_MS", "5")) / 1000.0,
+        )
+    if ANALYZE_PRELOAD:
+        job_manager.warm_up()
+    yield
+    job_manager.shutdown()
+    if inference_process is not None:
+        inference_process.terminate()
+    stream_manager.shutdown()
+    store.close()
+    location_store.close()
+
+app = FastAPI(title="Crowd Risk API", version="0.1.0", lifespan=lifespan)
+store, location_store, change_sequence = create_stores()
+change_feed = ChangeFeed(max_pending=int(os.getenv("SSE_MAX_PENDING", "1000")))
+store.add_listener(change_feed.publish)
+location_store.add_listener(change_feed.publish)
+SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+SSE_POLL_SECONDS = float(os.getenv("SSE_POLL_SECONDS", "1" if change_sequence.shared else str(SSE_KEEPALIVE_SECONDS)))
+LOCATION_BATCH_MAX = int(os.getenv("LOCATION_BATCH_MAX", "10000"))
+ALERTS_PAGE_SIZE = 100
 
 cors_origins = os.getenv(
     "CORS_ALLOW_ORIGINS",
     "http://localhost:5173,http://127.0.0.1:5173,https://public-safety-monitoring.vercel.app",
 )
 allow_origins = [o.strip() for o in cors_origins.split(",") if o.strip()]
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(1024 * 1024 * 1024)))
+# Sits inside CORS, so a 413 still carries the CORS headers.
+app.add_middleware(UploadLimitMiddleware, max_bytes=UPLOAD_MAX_BYTES, paths=["/api/analyze"])
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allow_origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 UPLOAD_DIR = Path(__file__).resolve().parent.parent / "uploads"
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
 
 @app.get("/api/health")
 def health():
@@ -44,11 +92,21 @@ async def analyze(
     thresholdLow: float = Form(0.0008),
     thresholdMedium: float = Form(0.0012),
     thresholdHigh: float = Form(0.0016),
+    batchSize: int = Form(16),
+    streaming: bool = Form(True),
+    normWindowFrames: int = Form(500),
+    parallelSegments: int = Form(0),
     processFps: float = Form(5.0),
     minConsecutive: int = Form(1),
     zLow: float = Form(3.0),
     zMed: float = Form(5.0),
     zHigh: float = Form(7.0),
+    useInitialFlow: bool = Form(False),
+    fusion: bool = Form(False),
+    flowWeight: float = Form(0.5),
+    autoencoderWeight: float = Form(0.5),
+    zoneGrid: str = Form(""),
+    zones: str = Form(""),
 ):
     if not file.filename:
         raise HTTPException(status_code=400, detail="Missing filename")
@@ -57,125 +115,300 @@ async def analyze(
     if suffix not in {".mp4", ".avi", ".mov", ".mkv"}:
         raise HTTPException(status_code=400, detail="Unsupported file type")
 
+    try:
+        analyzer_norm = ",".join(parse_analyzers(analyzer))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if fusion and flowWeight <= 0 and autoencoderWeight <= 0:
+        raise HTTPException(status_code=400, detail="Fusion needs a positive flowWeight or autoencoderWeight")
+    try:
+        zone_grid, zone_list = _parse_zone_fields(zoneGrid, zones)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     safe_name = Path(file.filename).name
-    out_path = UPLOAD_DIR / f"{int(datetime.now().timestamp())}_{safe_name}"
+    out_path = UPLOAD_DIR / f"{int(datetime.now().timestamp())}_{uuid4().hex[:8]}_{safe_name}"
 
     try:
-        contents = await file.read()
-        out_path.write_bytes(contents)
+        upload = await save_upload_streaming(file, out_path, max_bytes=UPLOAD_MAX_BYTES, chunk_size=UPLOAD_CHUNK_BYTES)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to save upload: {e}")
 
-    analyzer_norm = (analyzer or "").strip().lower()
+    options = {
+        "includeLosses": bool(includeLosses),
+        "sampleEverySeconds": float(sampleEverySeconds),
+        "thresholdLow": float(thresholdLow),
+        "thresholdMedium": float(thresholdMedium),
+        "thresholdHigh": float(thresholdHigh),
+        "batchSize": max(1, int(batchSize)),
+        "streaming": bool(streaming),
+        "normWindowFrames": max(10, int(normWindowFrames)),
+        "parallelSegments": max(0, min(int(parallelSegments), os.cpu_count() or 1)),
+        "processFps": float(processFps),
+        "minConsecutive": int(minConsecutive),
+        "zLow": float(zLow),
+        "zMed": float(zMed),
+        "zHigh": float(zHigh),
+        "useInitialFlow": bool(useInitialFlow),
+        "fusion": bool(fusion),
+        "flowWeight": max(0.0, float(flowWeight)),
+        "autoencoderWeight": max(0.0, float(autoencoderWeight)),
+        "zoneGrid": zone_grid,
+        "zones": zone_list,
+    }
 
     try:
-        if analyzer_norm in {"optical_flow", "flow", "optical"}:
-            of = analyze_video_optical_flow(
-                video_path=str(out_path),
-                process_fps=float(processFps),
-                min_consecutive=int(minConsecutive),
-                z_low=float(zLow),
-                z_med=float(zMed),
-                z_high=float(zHigh),
-                stop_on_high=True,
-            )
-            first_alert = next(
-                (s for s in of.samples if s.risk_level in {RiskLevel.MEDIUM, RiskLevel.HIGH}),
-                None,
-            )
-            risk_level = of.risk_level
-            event_time_seconds = float(first_alert.time_seconds) if first_alert else 0.0
-            result_payload = {
-                "analyzer": "optical_flow",
-                "riskLevel": risk_level.value,
-                "riskScore": float(max((s.z_score for s in of.samples), default=0.0)),
-                "eventTimeSeconds": event_time_seconds,
-                "summary": {
-                    "processFps": float(processFps),
-                    "minConsecutive": int(minConsecutive),
-                    "zLow": float(zLow),
-                    "zMed": float(zMed),
-                    "zHigh": float(zHigh),
-                    "counts": of.counts,
-                    "samples": len(of.samples),
-                },
-                "samples": [
-                    {
-                        "riskLevel": s.risk_level.value,
-                        "timeSeconds": s.time_seconds,
-                        "meanFlowMag": s.mean_flow_mag,
-                        "zScore": s.z_score,
-                        "activeRatio": s.active_ratio,
-                        "cause": s.cause,
-                    }
-                    for s in of.samples
-                ],
-            }
-
-        elif analyzer_norm in {"autoencoder", "ae"}:
-            ae = analyze_video_autoencoder(
-                video_path=str(out_path),
-                include_losses=bool(includeLosses),
-                sample_every_seconds=float(sampleEverySeconds),
-                threshold_low=float(thresholdLow),
-                threshold_medium=float(thresholdMedium),
-                threshold_high=float(thresholdHigh),
-                stop_on_high=True,
-            )
-            result_payload = {
-                "analyzer": "autoencoder",
-                "riskLevel": ae.risk_level.value,
-                "riskScore": ae.risk_score,
-                "maxLoss": ae.max_loss,
-                "meanLoss": ae.mean_loss,
-                "eventTimeSeconds": ae.event_time_seconds,
-                "sampleEverySeconds": float(sampleEverySeconds),
-                "losses": ae.losses,
-                "samples": ae.samples,
-            }
-        else:
-            raise HTTPException(status_code=400, detail="Invalid analyzer. Use 'optical_flow' or 'autoencoder'.")
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Analysis failed: {e}")
-
-    alert_created = False
-    alert = None
-
-    if result_payload["riskLevel"] in {RiskLevel.MEDIUM.value, RiskLevel.HIGH.value}:
-        alert_created = True
-        alert_obj = store.create_alert(
+        # A cache hit is finished inside submit (re-classification, disk writes, the alert), so it runs in a thread.
+        job = await run_in_threadpool(
+            job_manager.submit,
+            video_path=str(out_path),
+            analyzer=analyzer_norm,
+            options=options,
             user_email=userEmail,
-            location=location or "Kandavli",
-            risk_level=RiskLevel(result_payload["riskLevel"]),
-            risk_score=float(result_payload.get("riskScore", 0.0)),
+            location=location or "Kandivali",
             file_name=safe_name,
-            event_time_seconds=float(result_payload.get("eventTimeSeconds", 0.0)),
+            upload_sha256=upload.sha256,
         )
-        alert = {
-            "id": alert_obj.id,
-            "created_at": alert_obj.created_at.isoformat(),
-            "user_email": alert_obj.user_email,
-            "location": alert_obj.location,
-            "risk_level": alert_obj.risk_level,
-            "risk_score": alert_obj.risk_score,
-            "file_name": alert_obj.file_name,
-            "event_time_seconds": alert_obj.event_time_seconds,
-        }
+    except JobQueueFull as e:
+        out_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+
+    return JSONResponse(status_code=202, content=serialize_job(job))
+
+def _parse_zone_fields(zone_grid: Optional[str], zones) -> Tuple[str, list]:
+    # Normalized zoneGrid ("3x3", or "" for none) and ROI polygons, so equivalent requests share cache keys.
+    grid = parse_zone_grid(zone_grid)
+    polygons = parse_zones(zones)
+    if grid is not None and polygons:
+        raise ValueError("Use either zoneGrid or zones, not both")
+    return ("" if grid is None else f"{grid[0]}x{grid[1]}"), polygons
+
+def _create_analysis_alert(*, user_email: str, location: str, file_name: str, result_payload: dict) -> Optional[dict]:
+    if result_payload["riskLevel"] not in {RiskLevel.MEDIUM.value, RiskLevel.HIGH.value}:
+        return None
+    alert_obj = store.create_alert(
+        user_email=user_email,
+        location=location or "Kandavli",
+        risk_level=RiskLevel(result_payload["riskLevel"]),
+        risk_score=float(result_payload.get("riskScore", 0.0)),
+        file_name=file_name,
+        event_time_seconds=float(result_payload.get("eventTimeSeconds", 0.0)),
+        zone=result_payload.get("eventZone"),
+    )
+    return {
+        "id": alert_obj.id,
+        "created_at": alert_obj.created_at.isoformat(),
+        "user_email": alert_obj.user_email,
+        "location": alert_obj.location,
+        "risk_level": alert_obj.risk_level,
+        "risk_score": alert_obj.risk_score,
+        "file_name": alert_obj.file_name,
+        "event_time_seconds": alert_obj.event_time_seconds,
+        "zone": alert_obj.zone,
+    }
 
+def _finish_analysis(job: AnalysisJob, result_payload: dict) -> dict:
+    alert = _create_analysis_alert(user_email=job.user_email, location=job.location, file_name=job.file_name, result_payload=result_payload)
     return {
-        "userEmail": userEmail,
-        "location": location or "Kandivali",
+        "userEmail": job.user_email,
+        "location": job.location,
         **result_payload,
-        "alertCreated": alert_created,
+        "alertCreated": alert is not None,
         "alert": alert,
     }
 
+ANALYZE_CACHE_MAX = int(os.getenv("ANALYZE_CACHE_MAX", "256"))
+result_cache = ResultCache(max_entries=ANALYZE_CACHE_MAX, directory=os.getenv("ANALYZE_CACHE_DIR") or None) if ANALYZE_CACHE_MAX > 0 else None
+ANALYZE_PRELOAD = tuple(normalize_analyzer(a) for a in os.getenv("ANALYZE_PRELOAD", "").split(",") if a.strip())
+INFERENCE_SOCKET = os.getenv("INFERENCE_SOCKET") or None
+INFERENCE_SERVER = os.getenv("INFERENCE_SERVER", "0").strip().lower() in {"1", "true", "yes"}
+SIGNAL_STORE_ENABLED = os.getenv("SIGNAL_STORE", "1").strip().lower() in {"1", "true", "yes"}
+signal_store = SignalStore(os.getenv("SIGNAL_DIR") or None) if SIGNAL_STORE_ENABLED else None
+job_manager = JobManager(
+    max_workers=int(os.getenv("ANALYZE_MAX_WORKERS", "2")),
+    max_queue=int(os.getenv("ANALYZE_MAX_QUEUE", "16")),
+    on_result=_finish_analysis,
+    cache=result_cache,
+    signal_store=signal_store,
+    initializer=partial(preload_analyzers, ANALYZE_PRELOAD) if ANALYZE_PRELOAD else None,
+)
+
+def _stream_alert(stream, sample) -> None:
+    store.create_alert(
+        user_email=stream.user_email,
+        location=stream.location,
+        risk_level=sample.risk_level,
+        risk_score=float(sample.z_score),
+        file_name=f"stream:{stream.name}",
+        event_time_seconds=float(sample.time_seconds),
+        zone=sample.zone,
+    )
+
+stream_manager = StreamManager(max_streams=int(os.getenv("STREAM_MAX", "8")), on_alert=_stream_alert)
+STREAM_ALLOW_FILES = os.getenv("STREAM_ALLOW_FILES", "0").strip().lower() in {"1", "true", "yes"}
+
+@app.get("/api/analysis/stats")
+def analysis_stats():
+    return job_manager.stats()
+
+@app.get("/api/jobs/{job_id}")
+def get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return serialize_job(job)
+
+@app.post("/api/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return serialize_job(job)
+
+@app.post("/api/analyses/{analysis_id}/reclassify")
+def reclassify_analysis(
+    analysis_id: str,
+    zLow: Optional[float] = Body(None),
+    zMed: Optional[float] = Body(None),
+    zHigh: Optional[float] = Body(None),
+    minConsecutive: Optional[int] = Body(None),
+    thresholdLow: Optional[float] = Body(None),
+    thresholdMedium: Optional[float] = Body(None),
+    thresholdHigh: Optional[float] = Body(None),
+    fusion: Optional[bool] = Body(None),
+    flowWeight: Optional[float] = Body(None),
+    autoencoderWeight: Optional[float] = Body(None),
+    includeSamples: bool = Body(False),
+    createAlert: bool = Body(False),
+):
+    stored = signal_store.load(analysis_id) if signal_store is not None else None
+    if stored is None:
+        raise HTTPException(status_code=404, detail="No stored signal for this analysis")
+    info, signals = stored
+
+    overrides = {
+        "zLow": zLow,
+        "zMed": zMed,
+        "zHigh": zHigh,
+        "minConsecutive": minConsecutive,
+        "thresholdLow": thresholdLow,
+        "thresholdMedium": thresholdMedium,
+        "thresholdHigh": thresholdHigh,
+        "fusion": fusion,
+        "flowWeight": None if flowWeight is None else max(0.0, flowWeight),
+        "autoencoderWeight": None if autoencoderWeight is None else max(0.0, autoencoderWeight),
+    }
+    options = {**info["options"], **{k: v for k, v in overrides.items() if v is not None}}
+    try:
+        payload = reclassify_array(
+            analyzer=info["analyzer"],
+            signals={name: (values, meta["complete"]) for name, (meta, values) in signals.items()},
+            options=options,
+            include_samples=includeSamples,
+        )
+    except RuntimeError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    alert = None
+    if createAlert:
+        alert = _create_analysis_alert(user_email=info["userEmail"], location=info["location"], file_name=info["fileName"], result_payload=payload)
+    return {"analysisId": analysis_id, **payload, "alertCreated": alert is not None, "alert": alert}
+
+@app.post("/api/streams")
+def add_stream(
+    source: str = Body(...),
+    userEmail: str = Body(...),
+    name: Optional[str] = Body(None),
+    location: str = Body("Kandivali"),
+    processFps: float = Body(5.0),
+    minConsecutive: int = Body(2),
+    zLow: float = Body(3.0),
+    zMed: float = Body(5.0),
+    zHigh: float = Body(7.0),
+    cooldownSeconds: float = Body(30.0),
+    bufferSize: int = Body(8),
+    useInitialFlow: bool = Body(False),
+    zoneGrid: str = Body(""),
+    zones: Optional[List[dict]] = Body(None),
+):
+    source = source.strip()
+    if not source:
+        raise HTTPException(status_code=400, detail="Missing stream source")
+    try:
+        check_source(source, allow_files=STREAM_ALLOW_FILES)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not (zLow <= zMed <= zHigh):
+        raise HTTPException(status_code=400, detail="z thresholds must satisfy low <= med <= high")
+    try:
+        zone_grid, zone_list = _parse_zone_fields(zoneGrid, zones)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        stream = stream_manager.add(
+            source=source,
+            name=name or source,
+            user_email=userEmail,
+            location=location or "Kandivali",
+            process_fps=processFps,
+            buffer_size=bufferSize,
+            cooldown_seconds=cooldownSeconds,
+            scorer_options={
+                "min_consecutive": minConsecutive,
+                "z_low": zLow,
+                "z_med": zMed,
+                "z_high": zHigh,
+                "use_initial_flow": useInitialFlow,
+                **zone_options({"zoneGrid": zone_grid, "zones": zone_list}),
+            },
+        )
+    except StreamLimitReached as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return JSONResponse(status_code=201, content=serialize_stream(stream))
+
+@app.get("/api/streams")
+def list_streams():
+    return {"streams": [serialize_stream(s) for s in stream_manager.list()]}
+
+@app.get("/api/streams/{stream_id}")
+def get_stream(stream_id: str):
+    stream = stream_manager.get(stream_id)
+    if stream is None:
+        raise HTTPException(status_code=404, detail="Stream not found")
+    return serialize_stream(stream)
+
+@app.delete("/api/streams/{stream_id}")
+def remove_stream(stream_id: str):
+    stream = stream_manager.remove(stream_id)
+    if stream is None:
+        raise HTTPException(status_code=404, detail="Stream not found")
+    return serialize_stream(stream)
+
 @app.get("/api/alerts")
-def list_alerts(includeAcknowledged: bool = True):
-    return {"alerts": store.list_alerts(include_acknowledged=includeAcknowledged)}
+def list_alerts(
+    includeAcknowledged: bool = True,
+    limit: int = Query(ALERTS_PAGE_SIZE, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    since: Optional[str] = None,
+    riskLevel: Optional[RiskLevel] = None,
+    location: Optional[str] = None,
+):
+    try:
+        since_ts = parse_timestamp(since) if since else None
+        alerts, next_cursor = store.query_alerts(
+            limit=limit,
+            cursor=cursor,
+            since=since_ts,
+            risk_level=riskLevel,
+            location=location,
+            acknowledged=None if includeAcknowledged else False,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"alerts": alerts, "nextCursor": next_cursor}
 
 @app.post("/api/alerts/{alert_id}/ack")
 def acknowledge(alert_id: str):
@@ -201,9 +434,54 @@ def update_location(
         }
     }
 
+@app.post("/api/locations/batch")
+def update_locations_batch(pings: List[LocationPing] = Body(...)):
+    if len(pings) > LOCATION_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {LOCATION_BATCH_MAX} pings")
+    pings = [p for p in pings if (p.user_email or "").strip()]
+    updated = location_store.update_locations(pings)
+    return {"status": "ok", "updated": len(updated)}
+
+@dataclass
+class MapArea:
+    bbox: Optional[BoundingBox] = None
+    near: Optional[Tuple[float, float, float]] = None
+
+    def contains(self, loc: dict) -> bool:
+        lat, lon = float(loc["latitude"]), float(loc["longitude"])
+        if self.near is not None:
+            return haversine_m(self.near[0], self.near[1], lat, lon) <= self.near[2]
+        return self.bbox is None or in_bbox(lat, lon, self.bbox)
+
+    def tag(self) -> str:
+        if self.near is not None:
+            return "near:" + ",".join(map(repr, self.near))
+        return "" if self.bbox is None else "bbox:" + ",".join(map(repr, self.bbox))
+
+def map_area(
+    minLat: Optional[float] = Query(None, ge=-90, le=90),
+    minLon: Optional[float] = Query(None, ge=-180, le=180),
+    maxLat: Optional[float] = Query(None, ge=-90, le=90),
+    maxLon: Optional[float] = Query(None, ge=-180, le=180),
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lon: Optional[float] = Query(None, ge=-180, le=180),
+    radiusMeters: Optional[float] = Query(None, gt=0),
+) -> MapArea:
+    bbox_parts = [minLat, minLon, maxLat, maxLon]
+    near_parts = [lat, lon, radiusMeters]
+    if any(v is not None for v in near_parts):
+        if any(v is None for v in near_parts):
+            raise HTTPException(status_code=400, detail="lat, lon and radiusMeters must be given together")
+        return MapArea(near=(float(lat), float(lon), float(radiusMeters)))
+    if any(v is not None for v in bbox_parts):
+        if any(v is None for v in bbox_parts) or minLat > maxLat or minLon > maxLon:
+            raise HTTPException(status_code=400, detail="minLat, minLon, maxLat and maxLon must describe a bounding box")
+        return MapArea(bbox=(float(minLat), float(minLon), float(maxLat), float(maxLon)))
+    return MapArea()
+
 @app.get("/api/locations")
-def get_locations():
-    return {"locations": location_store.get_active_locations(max_age_seconds=60)}
+def get_locations(area: MapArea = Depends(map_area)):
+    return {"locations": location_store.get_active_locations(max_age_seconds=60, bbox=area.bbox, near=area.near)}
 
 
 @app.post("/api/location/stop")
@@ -213,3 +491,100 @@ def stop_location(userEmail: str = Form(...)):
         raise HTTPException(status_code=400, detail="Missing userEmail")
     location_store.remove_location(email)
     return {"status": "ok"}
+
+def _restrict_to_area(payload: dict, area: MapArea) -> dict:
+    # Locations that moved out of the viewer's area are reported as removed so the client drops them.
+    if area.bbox is None and area.near is None:
+        return payload
+    inside = [loc for loc in payload["locations"] if area.contains(loc)]
+    outside = [loc["user_email"] for loc in payload["locations"] if not area.contains(loc)]
+    return {**payload, "locations": inside, "removedLocations": payload["removedLocations"] + outside}
+
+def _changes_payload(since: int, epoch: Optional[str], area: MapArea = MapArea()) -> dict:
+    current = change_sequence.current()
+    location_changes = None
+    reset = since <= 0 or since > current or epoch != change_sequence.epoch
+    if not reset:
+        location_changes = location_store.changes_since(since, current)
+        reset = location_changes is None
+
+    if reset:
+        # The newest page only; older alerts are paged through /api/alerts?cursor=<alertsCursor>.
+        alerts, alerts_cursor = store.query_alerts(limit=ALERTS_PAGE_SIZE)
+        payload = {
+            "reset": True,
+            "alerts": alerts,
+            "alertsCursor": alerts_cursor,
+            "locations": location_store.get_active_locations(max_age_seconds=60, bbox=area.bbox, near=area.near),
+            "removedLocations": [],
+        }
+    else:
+        payload = {
+            "reset": False,
+            "alerts": store.changes_since(since, current),
+            "locations": location_changes["locations"],
+            "removedLocations": location_changes["removed"],
+        }
+        payload = _restrict_to_area(payload, area)
+    return {"seq": current, "epoch": change_sequence.epoch, **payload}
+
+def _changes_etag(epoch: str, seq: int, area: MapArea) -> str:
+    # The area is part of the tag: the same sequence seen through another viewport is a different response.
+    return f'"{epoch}-{seq}-{hashlib.sha256(area.tag().encode()).hexdigest()[:16]}"'
+
+@app.get("/api/changes")
+def get_changes(request: Request, since: int = 0, epoch: Optional[str] = None, area: MapArea = Depends(map_area)):
+    etag = _changes_etag(change_sequence.epoch, change_sequence.current(), area)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    payload = _changes_payload(since, epoch, area)
+    return JSONResponse(content=payload, headers={"ETag": _changes_etag(payload["epoch"], payload["seq"], area)})
+
+def _sse(payload: dict) -> str:
+    return f"id: {payload['epoch']}:{payload['seq']}\nevent: changes\ndata: {json.dumps(payload)}\n\n"
+
+@app.get("/api/events")
+async def stream_events(request: Request, since: int = 0, epoch: Optional[str] = None, area: MapArea = Depends(map_area)):
+    last_event_id = request.headers.get("last-event-id") or ""
+    if ":" in last_event_id:
+        epoch, _, raw_seq = last_event_id.rpartition(":")
+        since = int(raw_seq) if raw_seq.isdigit() else 0
+
+    sub = change_feed.subscribe()
+
+    async def gen():
+        try:
+            payload = await run_in_threadpool(_changes_payload, since, epoch, area)
+            last_seq, stream_epoch = payload["seq"], payload["epoch"]
+            yield _sse(payload)
+            last_sent = time.monotonic()
+
+            while not await request.is_disconnected():
+                # Wakes on local changes; the poll interval bounds how late other workers' changes arrive.
+                await sub.wait(min(SSE_POLL_SECONDS, SSE_KEEPALIVE_SECONDS))
+                seqs, events, overflowed = sub.drain()
+                fresh = sorted(x for x in seqs if x > last_seq)
+                if not overflowed and fresh and fresh == list(range(last_seq + 1, last_seq + 1 + len(fresh))):
+                    fresh_events = [e for e in events if e["seq"] > last_seq]
+                    last_seq = fresh[-1]
+                    yield _sse(_restrict_to_area(events_payload(fresh_events, seq=last_seq, epoch=stream_epoch), area))
+                    last_sent = time.monotonic()
+                    continue
+
+                # Gaps (slow consumer, other worker processes) are filled from the store instead of the queue.
+                if overflowed or fresh or await run_in_threadpool(change_sequence.current) > last_seq:
+                    payload = await run_in_threadpool(_changes_payload, last_seq, stream_epoch, area)
+                    last_seq, stream_epoch = payload["seq"], payload["epoch"]
+                    yield _sse(payload)
+                    last_sent = time.monotonic()
+                elif time.monotonic() - last_sent >= SSE_KEEPALIVE_SECONDS:
+                    yield ": keepalive\n\n"
+                    last_sent = time.monotonic()
+        finally:
+            change_feed.unsubscribe(sub)
+
+    return StreamingResponse(
+        gen(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
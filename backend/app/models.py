@@ -10,6 +10,9 @@ class RiskLevel(str, Enum):
     MEDIUM = "MEDIUM"
     HIGH = "HIGH"
 
+# Risk levels in order; analyzers classify into indices 0..3 of this tuple.
+RISK_NAMES = tuple(level.value for level in RiskLevel)
+
 @dataclass
 class Alert:
     id: str
@@ -21,6 +24,7 @@ class Alert:
     file_name: str
     event_time_seconds: float
     acknowledged_at: Optional[datetime] = None
+    zone: Optional[str] = None
 
 @dataclass
 class UserLocation:
@@ -29,3 +33,17 @@ class UserLocation:
     longitude: float
     timestamp: datetime
     active: bool = True
+
+class JobStatus(str, Enum):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    SUCCEEDED = "SUCCEEDED"
+    FAILED = "FAILED"
+    CANCELLED = "CANCELLED"
+
+@dataclass
+class LocationPing:
+    user_email: str
+    latitude: float
+    longitude: float
+    timestamp: Optional[datetime] = None
@@ -1,6 +1,8 @@
 from __future__ import annotations
+import importlib
 import os
 import sys
+from functools import lru_cache
 
 def ensure_workspace_on_path() -> str:
     here = os.path.dirname(os.path.abspath(__file__))  
@@ -11,3 +13,9 @@ def ensure_workspace_on_path() -> str:
         sys.path.insert(0, root_dir)
 
     return root_dir
+
+@lru_cache(maxsize=None)
+def workspace_module(name: str):
+    # Crowd_Anomaly_Detection.<name>, imported once per process instead of on every request.
+    ensure_workspace_on_path()
+    return importlib.import_module(f"Crowd_Anomaly_Detection.{name}")
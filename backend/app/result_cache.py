@@ -0,0 +1,84 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, Optional
+
+KINDS = ("result", "signal")
+
+def cache_key(**parts: Any) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+class ResultCache:
+    # LRU of results and raw signals, mirrored to <kind>-<key>.json when a directory is set.
+    def __init__(self, *, max_entries: int = 256, directory: Optional[str] = None) -> None:
+        self._lock = Lock()
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._max_entries = max(1, int(max_entries))
+        self._dir = Path(directory) if directory else None
+        self._hits = {kind: 0 for kind in KINDS}
+        self._misses = {kind: 0 for kind in KINDS}
+        if self._dir is not None:
+            self._load_from_disk()
+
+    def _path(self, entry_key: str) -> Path:
+        return self._dir / f"{entry_key}.json"
+
+    def _load_from_disk(self) -> None:
+        self._dir.mkdir(parents=True, exist_ok=True)
+        files = sorted(self._dir.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        for path in files[: max(0, len(files) - self._max_entries)]:
+            path.unlink(missing_ok=True)
+        for path in files[-self._max_entries :]:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self._entries[path.stem] = json.load(f)
+            except Exception:
+                path.unlink(missing_ok=True)
+
+    def _save(self, entry_key: str, value: Any) -> None:
+        tmp = f"{self._path(entry_key)}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(value, f)
+        os.replace(tmp, self._path(entry_key))
+
+    def get(self, kind: str, key: str) -> Optional[Any]:
+        entry_key = f"{kind}-{key}"
+        with self._lock:
+            value = self._entries.get(entry_key)
+            if value is None:
+                self._misses[kind] += 1
+                return None
+            self._entries.move_to_end(entry_key)
+            self._hits[kind] += 1
+            return value
+
+    def put(self, kind: str, key: str, value: Any) -> None:
+        entry_key = f"{kind}-{key}"
+        with self._lock:
+            self._entries[entry_key] = value
+            self._entries.move_to_end(entry_key)
+            evicted = []
+            while len(self._entries) > self._max_entries:
+                evicted.append(self._entries.popitem(last=False)[0])
+            if self._dir is None:
+                return
+            try:
+                self._save(entry_key, value)
+                for old in evicted:
+                    self._path(old).unlink(missing_ok=True)
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "maxEntries": self._max_entries,
+                "persistent": self._dir is not None,
+                "hits": dict(self._hits),
+                "misses": dict(self._misses),
+            }
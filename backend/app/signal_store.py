@@ -0,0 +1,78 @@
+from __future__ import annotations
+import json
+import os
+from pathlib import Path
+from threading import Lock
+from typing import TYPE_CHECKING, Any, Dict, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+class SignalStore:
+    # Raw per-sample series as memory-mapped .npy files, linked to analyses through analyses/<id>.json.
+    def __init__(self, directory: Optional[str] = None) -> None:
+        if directory is None:
+            directory = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "signals")
+        self._dir = Path(directory)
+        self._lock = Lock()
+        (self._dir / "analyses").mkdir(parents=True, exist_ok=True)
+
+    def _write_json(self, path: Path, payload: dict) -> None:
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp, path)
+
+    def _read_json(self, path: Path) -> Optional[dict]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save_signal(self, signal_key: str, *, analyzer: str, values: Sequence[Any], complete: bool) -> None:
+        import numpy as np
+
+        meta_path = self._dir / f"{signal_key}.json"
+        with self._lock:
+            existing = self._read_json(meta_path)
+            # Never replace a full-length series with a prefix cut short by stop-on-high.
+            if existing is not None and (existing["complete"] or (not complete and existing["samples"] >= len(values))):
+                return
+            array = np.asarray(values, dtype=np.float64)
+            tmp = self._dir / f"{signal_key}.tmp.npy"
+            np.save(tmp, array)
+            os.replace(tmp, self._dir / f"{signal_key}.npy")
+            self._write_json(meta_path, {"analyzer": analyzer, "complete": bool(complete), "samples": int(len(array))})
+
+    def link(self, analysis_id: str, signal_keys: Dict[str, str], info: Dict[str, Any]) -> None:
+        self._write_json(self._dir / "analyses" / f"{analysis_id}.json", {**info, "signalKeys": signal_keys})
+
+    def _load_signal(self, signal_key: str) -> Optional[Tuple[dict, np.ndarray]]:
+        import numpy as np
+
+        meta = self._read_json(self._dir / f"{signal_key}.json")
+        if meta is None:
+            return None
+        path = self._dir / f"{signal_key}.npy"
+        try:
+            return meta, np.load(path, mmap_mode="r")
+        except ValueError:
+            # Zero-length arrays cannot be memory-mapped.
+            return meta, np.load(path)
+        except OSError:
+            return None
+
+    def load(self, analysis_id: str) -> Optional[Tuple[dict, Dict[str, Tuple[dict, np.ndarray]]]]:
+        # (analysis info, {analyzer: (signal meta, array)}), or None when anything is missing.
+        info = self._read_json(self._dir / "analyses" / f"{Path(analysis_id).name}.json")
+        if info is None:
+            return None
+        signals = {}
+        with self._lock:
+            for analyzer, signal_key in info["signalKeys"].items():
+                signal = self._load_signal(signal_key)
+                if signal is None:
+                    return None
+                signals[analyzer] = signal
+        return info, signals
@@ -0,0 +1,426 @@
+from __future__ import annotations
+import os
+import sqlite3
+from datetime import datetime, timezone
+from contextlib import contextmanager
+from threading import Lock, local
+from typing import Dict, Iterator, List, Optional, Tuple
+from uuid import uuid4
+from .models import Alert, LocationPing, RiskLevel, UserLocation
+from .storage import BackgroundFlusher, BoundingBox, ChangeListener, _emit, as_utc, decode_cursor, encode_cursor, haversine_m, parse_timestamp, radius_bbox
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    user_email TEXT NOT NULL,
+    location TEXT NOT NULL,
+    risk_level TEXT NOT NULL,
+    risk_score REAL NOT NULL,
+    file_name TEXT NOT NULL,
+    event_time_seconds REAL NOT NULL,
+    acknowledged_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_alerts_created_at ON alerts (created_at, id);
+CREATE INDEX IF NOT EXISTS idx_alerts_acknowledged_at ON alerts (acknowledged_at);
+CREATE INDEX IF NOT EXISTS idx_alerts_location ON alerts (location);
+CREATE INDEX IF NOT EXISTS idx_alerts_risk_level ON alerts (risk_level);
+
+CREATE TABLE IF NOT EXISTS locations (
+    user_email TEXT PRIMARY KEY,
+    latitude REAL NOT NULL,
+    longitude REAL NOT NULL,
+    timestamp TEXT NOT NULL,
+    active INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_locations_timestamp ON locations (timestamp);
+CREATE INDEX IF NOT EXISTS idx_locations_lat_lon ON locations (latitude, longitude);
+
+CREATE TABLE IF NOT EXISTS location_tombstones (
+    user_email TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_location_tombstones_seq ON location_tombstones (seq);
+
+CREATE TABLE IF NOT EXISTS change_seq (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    value INTEGER NOT NULL,
+    epoch TEXT NOT NULL
+);
+"""
+
+_MIGRATIONS = (
+    ("alerts", "seq", "INTEGER NOT NULL DEFAULT 0", "CREATE INDEX IF NOT EXISTS idx_alerts_seq ON alerts (seq)"),
+    ("locations", "seq", "INTEGER NOT NULL DEFAULT 0", "CREATE INDEX IF NOT EXISTS idx_locations_seq ON locations (seq)"),
+    ("alerts", "zone", "TEXT", None),
+)
+
+_ALERT_COLUMNS = "id, created_at, user_email, location, risk_level, risk_score, file_name, event_time_seconds, acknowledged_at, zone"
+
+def default_sqlite_path() -> str:
+    here = os.path.dirname(os.path.abspath(__file__))
+    backend_dir = os.path.dirname(here)
+    return os.path.join(backend_dir, "data", "crowd_risk.db")
+
+class SqliteDatabase:
+    def __init__(self, db_path: Optional[str] = None) -> None:
+        self._db_path = db_path or default_sqlite_path()
+        self._local = local()
+        self._lock = Lock()
+        self._connections: List[sqlite3.Connection] = []
+        os.makedirs(os.path.dirname(os.path.abspath(self._db_path)), exist_ok=True)
+        conn = self.connection()
+        conn.executescript(_SCHEMA)
+        for table, column, decl, index_sql in _MIGRATIONS:
+            columns = {r["name"] for r in conn.execute(f"PRAGMA table_info({table})")}
+            if column not in columns:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+            if index_sql:
+                conn.execute(index_sql)
+        conn.execute("INSERT OR IGNORE INTO change_seq (id, value, epoch) VALUES (1, 0, ?)", (uuid4().hex,))
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._db_path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def close(self) -> None:
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = local()
+
+def _advance_seq(conn: sqlite3.Connection) -> int:
+    conn.execute("UPDATE change_seq SET value = value + 1 WHERE id = 1")
+    return int(conn.execute("SELECT value FROM change_seq WHERE id = 1").fetchone()[0])
+
+class SqliteChangeSequence:
+    # Other worker processes advance it too, and their changes never reach this process's ChangeFeed.
+    shared = True
+
+    def __init__(self, db: SqliteDatabase) -> None:
+        self._db = db
+        self.epoch = str(db.connection().execute("SELECT epoch FROM change_seq WHERE id = 1").fetchone()[0])
+
+    def current(self) -> int:
+        return int(self._db.connection().execute("SELECT value FROM change_seq WHERE id = 1").fetchone()[0])
+
+class SqliteAlertStore:
+    def __init__(self, *, db: Optional[SqliteDatabase] = None, db_path: Optional[str] = None) -> None:
+        self._db = db or SqliteDatabase(db_path)
+        self._listeners: List[ChangeListener] = []
+
+    def add_listener(self, listener: ChangeListener) -> None:
+        self._listeners.append(listener)
+
+    def _row_to_dict(self, row: sqlite3.Row) -> dict:
+        return {
+            "id": row["id"],
+            "created_at": row["created_at"],
+            "user_email": row["user_email"],
+            "location": row["location"],
+            "risk_level": row["risk_level"],
+            "risk_score": float(row["risk_score"]),
+            "file_name": row["file_name"],
+            "event_time_seconds": float(row["event_time_seconds"]),
+            "acknowledged_at": row["acknowledged_at"],
+            "zone": row["zone"],
+        }
+
+    def create_alert(
+        self,
+        *,
+        user_email: str,
+        location: str,
+        risk_level: RiskLevel,
+        risk_score: float,
+        file_name: str,
+        event_time_seconds: float,
+        zone: Optional[str] = None,
+    ) -> Alert:
+        alert = Alert(
+            id=str(uuid4()),
+            created_at=datetime.now(timezone.utc),
+            user_email=user_email,
+            location=location,
+            risk_level=risk_level,
+            risk_score=float(risk_score),
+            file_name=file_name,
+            event_time_seconds=float(event_time_seconds),
+            zone=zone,
+        )
+        with self._db.transaction() as conn:
+            seq = _advance_seq(conn)
+            conn.execute(
+                f"INSERT INTO alerts ({_ALERT_COLUMNS}, seq) VALUES (?, ?, ?, ?, ?, ?, ?, ?, NULL, ?, ?)",
+                (alert.id, alert.created_at.isoformat(timespec="microseconds"), alert.user_email, alert.location, RiskLevel(risk_level).value, alert.risk_score, alert.file_name, alert.event_time_seconds, alert.zone, seq,),
+            )
+            row = conn.execute(f"SELECT {_ALERT_COLUMNS} FROM alerts WHERE id = ?", (alert.id,)).fetchone()
+        _emit(self._listeners, {"seq": seq, "entity": "alert", "key": alert.id, "op": "upsert", "data": self._row_to_dict(row)})
+        return alert
+
+    def query_alerts(
+        self,
+        *,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        since: Optional[datetime] = None,
+        risk_level: Optional[RiskLevel] = None,
+        location: Optional[str] = None,
+        acknowledged: Optional[bool] = None,
+    ) -> Tuple[List[dict], Optional[str]]:
+        clauses: List[str] = []
+        params: list = []
+        if acknowledged is not None:
+            clauses.append("acknowledged_at IS NOT NULL" if acknowledged else "acknowledged_at IS NULL")
+        if risk_level is not None:
+            clauses.append("risk_level = ?")
+            params.append(RiskLevel(risk_level).value)
+        if location is not None:
+            clauses.append("location = ?")
+            params.append(location)
+        if since is not None:
+            clauses.append("created_at > ?")
+            params.append(as_utc(since).isoformat(timespec="microseconds"))
+        if cursor:
+            before_ts, before_id = decode_cursor(cursor)
+            before = as_utc(before_ts).isoformat(timespec="microseconds")
+            clauses.append("(created_at < ? OR (created_at = ? AND id < ?))")
+            params.extend([before, before, before_id])
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._db.connection().execute(
+            f"SELECT {_ALERT_COLUMNS} FROM alerts {where} ORDER BY created_at DESC, id DESC LIMIT ?",
+            (*params, int(limit) + 1),
+        ).fetchall()
+
+        page = [self._row_to_dict(r) for r in rows[: int(limit)]]
+        next_cursor = None
+        if len(rows) > int(limit) and page:
+            next_cursor = encode_cursor(parse_timestamp(page[-1]["created_at"]), page[-1]["id"])
+        return page, next_cursor
+
+    def changes_since(self, since: int, upto: int) -> List[dict]:
+        rows = self._db.connection().execute(
+            f"SELECT {_ALERT_COLUMNS} FROM alerts WHERE seq > ? AND seq <= ? ORDER BY seq",
+            (int(since), int(upto)),
+        ).fetchall()
+        return [self._row_to_dict(r) for r in rows]
+
+    def acknowledge(self, alert_id: str) -> Optional[dict]:
+        seq = None
+        with self._db.transaction() as conn:
+            pending = conn.execute("SELECT 1 FROM alerts WHERE id = ? AND acknowledged_at IS NULL", (alert_id,)).fetchone()
+            if pending is not None:
+                seq = _advance_seq(conn)
+                conn.execute(
+                    "UPDATE alerts SET acknowledged_at = ?, seq = ? WHERE id = ?",
+                    (datetime.now(timezone.utc).isoformat(timespec="microseconds"), seq, alert_id),
+                )
+            row = conn.execute(f"SELECT {_ALERT_COLUMNS} FROM alerts WHERE id = ?", (alert_id,)).fetchone()
+        if row is None:
+            return None
+        data = self._row_to_dict(row)
+        if seq is not None:
+            _emit(self._listeners, {"seq": seq, "entity": "alert", "key": alert_id, "op": "upsert", "data": data})
+        return data
+
+    def close(self) -> None:
+        self._db.close()
+
+class SqliteLocationStore:
+    def __init__(
+        self,
+        *,
+        db: Optional[SqliteDatabase] = None,
+        db_path: Optional[str] = None,
+        flush_interval: float = 1.0,
+        flush_batch_size: int = 1000,
+        ttl_seconds: float = 60.0,
+        expire_interval: float = 1.0,
+    ) -> None:
+        self._db = db or SqliteDatabase(db_path)
+        self._ttl_seconds = float(ttl_seconds)
+        self._listeners: List[ChangeListener] = []
+        self._lock = Lock()
+        self._write_lock = Lock()
+        self._pending: Dict[str, UserLocation] = {}
+        self._flush_batch_size = max(1, int(flush_batch_size))
+        self._flusher = BackgroundFlusher(self.flush, interval=flush_interval, name="sqlite-location-flusher") if flush_interval > 0 else None
+        self._expirer = (
+            BackgroundFlusher(self.expire, interval=expire_interval, name="sqlite-location-expiry")
+            if self._ttl_seconds > 0 and expire_interval > 0
+            else None
+        )
+
+    def add_listener(self, listener: ChangeListener) -> None:
+        self._listeners.append(listener)
+
+    def update_location(self, user_email: str, latitude: float, longitude: float) -> UserLocation:
+        return self.update_locations([LocationPing(user_email=user_email, latitude=latitude, longitude=longitude)])[0]
+
+    def update_locations(self, pings: List[LocationPing]) -> List[UserLocation]:
+        now = datetime.now(timezone.utc)
+        updated = [
+            UserLocation(
+                user_email=p.user_email,
+                latitude=float(p.latitude),
+                longitude=float(p.longitude),
+                timestamp=min(as_utc(p.timestamp), now) if p.timestamp else now,
+                active=True
+            )
+            for p in pings
+        ]
+        with self._lock:
+            for loc in updated:
+                self._pending[loc.user_email] = loc
+            pending = len(self._pending)
+        if self._flusher is None:
+            self.flush()
+        elif pending >= self._flush_batch_size:
+            self._flusher.poke()
+        return updated
+
+    def flush(self) -> None:
+        with self._write_lock:
+            with self._lock:
+                batch, self._pending = list(self._pending.values()), {}
+            if not batch:
+                return
+            with self._db.transaction() as conn:
+                conn.execute("UPDATE change_seq SET value = value + ? WHERE id = 1", (len(batch),))
+                last_seq = int(conn.execute("SELECT value FROM change_seq WHERE id = 1").fetchone()[0])
+                rows = [
+                    (loc.user_email, loc.latitude, loc.longitude, as_utc(loc.timestamp).isoformat(timespec="microseconds"), last_seq - len(batch) + i + 1)
+                    for i, loc in enumerate(batch)
+                ]
+                conn.executemany(
+                    "INSERT INTO locations (user_email, latitude, longitude, timestamp, active, seq) VALUES (?, ?, ?, ?, 1, ?) "
+                    "ON CONFLICT(user_email) DO UPDATE SET latitude = excluded.latitude, longitude = excluded.longitude, "
+                    "timestamp = excluded.timestamp, active = excluded.active, seq = excluded.seq",
+                    rows,
+                )
+                conn.executemany("DELETE FROM location_tombstones WHERE user_email = ?", [(r[0],) for r in rows])
+        for email, lat, lon, timestamp, seq in rows:
+            data = {"user_email": email, "latitude": float(lat), "longitude": float(lon), "timestamp": timestamp, "active": True}
+            _emit(self._listeners, {"seq": seq, "entity": "location", "key": email, "op": "upsert", "data": data})
+
+    def expire(self) -> int:
+        if self._ttl_seconds <= 0:
+            return 0
+        now = datetime.now(timezone.utc).timestamp()
+        cutoff = datetime.fromtimestamp(now - self._ttl_seconds, tz=timezone.utc).isoformat(timespec="microseconds")
+        events: List[dict] = []
+        with self._write_lock:
+            with self._lock:
+                pending = set(self._pending)
+            with self._db.transaction() as conn:
+                stale = [
+                    r["user_email"]
+                    for r in conn.execute("SELECT user_email FROM locations WHERE timestamp < ?", (cutoff,))
+                    if r["user_email"] not in pending
+                ]
+                for email in stale:
+                    seq = _advance_seq(conn)
+                    conn.execute("DELETE FROM locations WHERE user_email = ?", (email,))
+                    conn.execute(
+                        "INSERT INTO location_tombstones (user_email, seq) VALUES (?, ?) "
+                        "ON CONFLICT(user_email) DO UPDATE SET seq = excluded.seq",
+                        (email, seq),
+                    )
+                    events.append({"seq": seq, "entity": "location", "key": email, "op": "remove", "data": None})
+        for event in events:
+            _emit(self._listeners, event)
+        return len(events)
+
+    def get_active_locations(
+        self,
+        *,
+        max_age_seconds: int = 60,
+        bbox: Optional[BoundingBox] = None,
+        near: Optional[Tuple[float, float, float]] = None,
+    ) -> List[dict]:
+        if near is not None:
+            bbox = radius_bbox(*near)
+        now = datetime.now(timezone.utc)
+        cutoff = datetime.fromtimestamp(now.timestamp() - float(max_age_seconds), tz=timezone.utc).isoformat(timespec="microseconds")
+        sql = "SELECT user_email, latitude, longitude, timestamp, active FROM locations WHERE timestamp >= ? AND active = 1"
+        params: list = [cutoff]
+        if bbox is not None:
+            sql += " AND latitude BETWEEN ? AND ? AND longitude BETWEEN ? AND ?"
+            params.extend([bbox[0], bbox[2], bbox[1], bbox[3]])
+        rows = self._db.connection().execute(sql, params).fetchall()
+        return [
+            self._row_to_dict(r)
+            for r in rows
+            if near is None or haversine_m(near[0], near[1], float(r["latitude"]), float(r["longitude"])) <= near[2]
+        ]
+
+    def _row_to_dict(self, row: sqlite3.Row) -> dict:
+        return {
+            "user_email": row["user_email"],
+            "latitude": float(row["latitude"]),
+            "longitude": float(row["longitude"]),
+            "timestamp": row["timestamp"],
+            "active": bool(row["active"]),
+        }
+
+    def changes_since(self, since: int, upto: int) -> Optional[dict]:
+        conn = self._db.connection()
+        rows = conn.execute(
+            "SELECT user_email, latitude, longitude, timestamp, active FROM locations WHERE seq > ? AND seq <= ? ORDER BY seq",
+            (int(since), int(upto)),
+        ).fetchall()
+        removed = conn.execute(
+            "SELECT user_email FROM location_tombstones WHERE seq > ? AND seq <= ? ORDER BY seq",
+            (int(since), int(upto)),
+        ).fetchall()
+        return {
+            "locations": [self._row_to_dict(r) for r in rows],
+            "removed": [r["user_email"] for r in removed],
+        }
+
+    def remove_location(self, user_email: str) -> None:
+        with self._lock:
+            self._pending.pop(user_email, None)
+        seq = None
+        with self._write_lock, self._db.transaction() as conn:
+            if conn.execute("DELETE FROM locations WHERE user_email = ?", (user_email,)).rowcount:
+                seq = _advance_seq(conn)
+                conn.execute(
+                    "INSERT INTO location_tombstones (user_email, seq) VALUES (?, ?) "
+                    "ON CONFLICT(user_email) DO UPDATE SET seq = excluded.seq",
+                    (user_email, seq),
+                )
+        if seq is not None:
+            _emit(self._listeners, {"seq": seq, "entity": "location", "key": user_email, "op": "remove", "data": None})
+
+    def close(self) -> None:
+        if self._expirer is not None:
+            self._expirer.stop()
+            self._expirer = None
+        if self._flusher is not None:
+            self._flusher.stop()
+            self._flusher = None
+        else:
+            self.flush()
+        self._db.close()
@@ -1,17 +1,153 @@
 from __future__ import annotations
+import base64
+from bisect import bisect_left, insort
+from collections import OrderedDict
 from dataclasses import asdict
+import heapq
 from datetime import datetime, timezone
 import json
+import math
 import os
-from threading import Lock
-from typing import Dict, List, Optional
+from threading import Event, Lock, Thread
+from typing import Callable, Dict, List, Optional, Tuple
 from uuid import uuid4
-from .models import Alert, RiskLevel, UserLocation
+from .models import Alert, LocationPing, RiskLevel, UserLocation
+
+AlertKey = Tuple[datetime, str]
+ChangeListener = Callable[[dict], None]
+BoundingBox = Tuple[float, float, float, float]
+GridCell = Tuple[int, int]
+
+EARTH_RADIUS_M = 6371008.8
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+def radius_bbox(lat: float, lon: float, radius_m: float) -> BoundingBox:
+    dlat = math.degrees(radius_m / EARTH_RADIUS_M)
+    cos_lat = max(1e-6, math.cos(math.radians(lat)))
+    dlon = min(180.0, math.degrees(radius_m / (EARTH_RADIUS_M * cos_lat)))
+    return lat - dlat, lon - dlon, lat + dlat, lon + dlon
+
+def in_bbox(lat: float, lon: float, bbox: BoundingBox) -> bool:
+    min_lat, min_lon, max_lat, max_lon = bbox
+    return min_lat <= lat <= max_lat and min_lon <= lon <= max_lon
+
+def as_utc(ts: datetime) -> datetime:
+    # Naive timestamps are taken as UTC.
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts.astimezone(timezone.utc)
+
+def parse_timestamp(raw: str) -> datetime:
+    ts = datetime.fromisoformat(raw)
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts
+
+def encode_cursor(created_at: datetime, alert_id: str) -> str:
+    raw = f"{created_at.isoformat(timespec='microseconds')}|{alert_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str) -> AlertKey:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        ts, alert_id = raw.split("|", 1)
+        return parse_timestamp(ts), alert_id
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def _emit(listeners: List[ChangeListener], event: dict) -> None:
+    for listener in listeners:
+        try:
+            listener(event)
+        except Exception:
+            continue
+
+def _changed_keys(changes: "OrderedDict[str, int]", since: int, upto: int) -> List[str]:
+    keys: List[str] = []
+    for key, seq in reversed(changes.items()):
+        if seq <= since:
+            break
+        if seq <= upto:
+            keys.append(key)
+    keys.reverse()
+    return keys
+
+class BackgroundFlusher:
+    def __init__(self, flush: Callable[[], None], *, interval: float, name: str) -> None:
+        self._flush = flush
+        self._interval = max(0.01, float(interval))
+        self._wake = Event()
+        self._stop = Event()
+        self._thread = Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def poke(self) -> None:
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self._interval)
+            self._wake.clear()
+            try:
+                self._flush()
+            except Exception:
+                continue
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        self._flush()
+
+class ChangeSequence:
+    shared = False
+
+    def __init__(self) -> None:
+        self.lock = Lock()
+        self.epoch = uuid4().hex
+        self._value = 0
+
+    def advance(self) -> int:
+        # Callers hold `lock` while advancing and recording, so every seq <= current() is visible to readers.
+        self._value += 1
+        return self._value
+
+    def current(self) -> int:
+        with self.lock:
+            return self._value
 
 class LocationStore:
-    def __init__(self, *, file_path: Optional[str] = None) -> None:
+    def __init__(
+        self,
+        *,
+        file_path: Optional[str] = None,
+        sequence: Optional[ChangeSequence] = None,
+        max_tombstones: int = 10000,
+        flush_interval: float = 1.0,
+        flush_batch_size: int = 1000,
+        cell_degrees: float = 0.01,
+        ttl_seconds: float = 60.0,
+        expire_interval: float = 1.0,
+    ) -> None:
         self._lock = Lock()
         self._locations: Dict[str, UserLocation] = {}
+        self._ttl_seconds = float(ttl_seconds)
+        self._expiry: List[Tuple[datetime, str]] = []
+        self._cell_degrees = float(cell_degrees)
+        self._grid: Dict[GridCell, set] = {}
+        self._sequence = sequence or ChangeSequence()
+        self._changes: "OrderedDict[str, int]" = OrderedDict()
+        self._removed: "OrderedDict[str, int]" = OrderedDict()
+        self._max_tombstones = max(1, int(max_tombstones))
+        self._tombstone_floor = 0
+        self._listeners: List[ChangeListener] = []
+        self._dirty = 0
+        self._write_lock = Lock()
+        self._flush_batch_size = max(1, int(flush_batch_size))
 
         if file_path is None:
             here = os.path.dirname(os.path.abspath(__file__)) 
@@ -20,6 +156,22 @@ class LocationStore:
         
         self._file_path = file_path
         self._load_from_disk()
+        if self._ttl_seconds > 0:
+            cutoff = datetime.now(timezone.utc).timestamp() - self._ttl_seconds
+            stale = [email for email, loc in self._locations.items() if loc.timestamp.timestamp() < cutoff]
+            for email in stale:
+                del self._locations[email]
+            self._dirty = len(stale)
+        for loc in self._locations.values():
+            self._grid.setdefault(self._cell_of(loc.latitude, loc.longitude), set()).add(loc.user_email)
+            self._expiry.append((loc.timestamp, loc.user_email))
+        heapq.heapify(self._expiry)
+        self._flusher = BackgroundFlusher(self.flush, interval=flush_interval, name="location-flusher") if flush_interval > 0 else None
+        self._expirer = (
+            BackgroundFlusher(self.expire, interval=expire_interval, name="location-expiry")
+            if self._ttl_seconds > 0 and expire_interval > 0
+            else None
+        )
 
     def _serialize_location(self, loc: UserLocation) -> dict:
         return {
@@ -59,61 +211,228 @@ class LocationStore:
         except Exception:
             return
 
-    def _save_to_disk(self) -> None:
+    def _save_to_disk(self, payload: List[dict]) -> None:
         os.makedirs(os.path.dirname(self._file_path), exist_ok=True)
-        payload = [self._serialize_location(loc) for loc in self._locations.values()]
         tmp = f"{self._file_path}.tmp"
         with open(tmp, "w", encoding="utf-8") as f:
-            json.dump(payload, f, indent=2)
+            json.dump(payload, f)
         os.replace(tmp, self._file_path)
 
+    def _mark_dirty(self, count: int = 1) -> None:
+        # Called with the lock held. Without a flusher every change is written through, as before.
+        self._dirty += count
+        if self._flusher is None:
+            self._dirty = 0
+            self._save_to_disk([self._serialize_location(loc) for loc in self._locations.values()])
+        elif self._dirty >= self._flush_batch_size:
+            self._flusher.poke()
+
+    def flush(self) -> None:
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                self._dirty = 0
+                payload = [self._serialize_location(loc) for loc in self._locations.values()]
+            self._save_to_disk(payload)
+
     def update_location(self, user_email: str, latitude: float, longitude: float) -> UserLocation:
+        return self.update_locations([LocationPing(user_email=user_email, latitude=latitude, longitude=longitude)])[0]
+
+    def update_locations(self, pings: List[LocationPing]) -> List[UserLocation]:
+        now = datetime.now(timezone.utc)
+        events: List[dict] = []
+        updated: List[UserLocation] = []
         with self._lock:
-            loc = UserLocation(
-                user_email=user_email,
-                latitude=latitude,
-                longitude=longitude,
-                timestamp=datetime.now(timezone.utc),
-                active=True
-            )
-            self._locations[user_email] = loc
-            self._save_to_disk()
-            return loc
-
-    def get_active_locations(self, *, max_age_seconds: int = 60) -> List[dict]:
+            for ping in pings:
+                loc = UserLocation(
+                    user_email=ping.user_email,
+                    latitude=float(ping.latitude),
+                    longitude=float(ping.longitude),
+                    timestamp=min(as_utc(ping.timestamp), now) if ping.timestamp else now,
+                    active=True
+                )
+                previous = self._locations.get(loc.user_email)
+                if previous is not None:
+                    self._unindex_cell(previous)
+                self._locations[loc.user_email] = loc
+                self._grid.setdefault(self._cell_of(loc.latitude, loc.longitude), set()).add(loc.user_email)
+                heapq.heappush(self._expiry, (loc.timestamp, loc.user_email))
+                seq = self._record_change(loc.user_email)
+                events.append({"seq": seq, "entity": "location", "key": loc.user_email, "op": "upsert", "data": self._serialize_location(loc)})
+                updated.append(loc)
+            if len(self._expiry) > 2 * len(self._locations) + 1024:
+                # Frequent reporters leave superseded heap entries behind; rebuild before they outnumber live users.
+                self._expiry = [(loc.timestamp, email) for email, loc in self._locations.items()]
+                heapq.heapify(self._expiry)
+            self._mark_dirty(len(updated))
+        for event in events:
+            _emit(self._listeners, event)
+        return updated
+
+    def expire(self) -> int:
+        if self._ttl_seconds <= 0:
+            return 0
+        cutoff = datetime.fromtimestamp(datetime.now(timezone.utc).timestamp() - self._ttl_seconds, tz=timezone.utc)
+        events: List[dict] = []
+        with self._lock:
+            while self._expiry and self._expiry[0][0] < cutoff:
+                timestamp, email = heapq.heappop(self._expiry)
+                loc = self._locations.get(email)
+                if loc is None or loc.timestamp != timestamp:
+                    continue
+                self._unindex_cell(self._locations.pop(email))
+                seq = self._record_removal(email)
+                events.append({"seq": seq, "entity": "location", "key": email, "op": "remove", "data": None})
+            if events:
+                self._mark_dirty(len(events))
+        for event in events:
+            _emit(self._listeners, event)
+        return len(events)
+
+    def add_listener(self, listener: ChangeListener) -> None:
+        self._listeners.append(listener)
+
+    def _record_change(self, user_email: str) -> int:
+        with self._sequence.lock:
+            seq = self._sequence.advance()
+            self._changes[user_email] = seq
+            self._changes.move_to_end(user_email)
+            self._removed.pop(user_email, None)
+            return seq
+
+    def _record_removal(self, user_email: str) -> int:
+        with self._sequence.lock:
+            seq = self._sequence.advance()
+            self._changes.pop(user_email, None)
+            self._removed[user_email] = seq
+            self._removed.move_to_end(user_email)
+            while len(self._removed) > self._max_tombstones:
+                _email, dropped = self._removed.popitem(last=False)
+                self._tombstone_floor = dropped
+            return seq
+
+    def changes_since(self, since: int, upto: int) -> Optional[dict]:
+        with self._lock:
+            if since < self._tombstone_floor:
+                return None
+            updated = _changed_keys(self._changes, since, upto)
+            removed = _changed_keys(self._removed, since, upto)
+            return {
+                "locations": [self._serialize_location(self._locations[email]) for email in updated],
+                "removed": removed,
+            }
+
+    def _cell_of(self, latitude: float, longitude: float) -> GridCell:
+        return math.floor(latitude / self._cell_degrees), math.floor(longitude / self._cell_degrees)
+
+    def _unindex_cell(self, loc: UserLocation) -> None:
+        cell = self._cell_of(loc.latitude, loc.longitude)
+        members = self._grid.get(cell)
+        if members is not None:
+            members.discard(loc.user_email)
+            if not members:
+                del self._grid[cell]
+
+    def _candidates(self, bbox: BoundingBox):
+        min_lat, min_lon, max_lat, max_lon = bbox
+        lo_row, lo_col = self._cell_of(min_lat, min_lon)
+        hi_row, hi_col = self._cell_of(max_lat, max_lon)
+        if (hi_row - lo_row + 1) * (hi_col - lo_col + 1) <= len(self._grid):
+            cells = ((r, c) for r in range(lo_row, hi_row + 1) for c in range(lo_col, hi_col + 1))
+        else:
+            # A huge viewport covers more cells than are occupied: walk the occupied ones instead.
+            cells = (cell for cell in self._grid if lo_row <= cell[0] <= hi_row and lo_col <= cell[1] <= hi_col)
+        for cell in cells:
+            for email in self._grid.get(cell, ()):
+                yield self._locations[email]
+
+    def get_active_locations(
+        self,
+        *,
+        max_age_seconds: int = 60,
+        bbox: Optional[BoundingBox] = None,
+        near: Optional[Tuple[float, float, float]] = None,
+    ) -> List[dict]:
+        if near is not None:
+            bbox = radius_bbox(*near)
         with self._lock:
             now = datetime.now(timezone.utc)
+            candidates = self._candidates(bbox) if bbox is not None else self._locations.values()
             active = [
-                {
-                    "user_email": loc.user_email,
-                    "latitude": loc.latitude,
-                    "longitude": loc.longitude,
-                    "timestamp": loc.timestamp.isoformat(),
-                    "active": loc.active
-                }
-                for loc in self._locations.values()
-                if loc.active and (now - loc.timestamp).total_seconds() <= float(max_age_seconds)
+                self._serialize_location(loc)
+                for loc in candidates
+                if loc.active
+                and (now - loc.timestamp).total_seconds() <= float(max_age_seconds)
+                and (bbox is None or in_bbox(loc.latitude, loc.longitude, bbox))
+                and (near is None or haversine_m(near[0], near[1], loc.latitude, loc.longitude) <= near[2])
             ]
             return active
 
     def remove_location(self, user_email: str) -> None:
         with self._lock:
-            if user_email in self._locations:
-                del self._locations[user_email]
-                self._save_to_disk()
+            if user_email not in self._locations:
+                return
+            self._unindex_cell(self._locations.pop(user_email))
+            seq = self._record_removal(user_email)
+            self._mark_dirty()
+        _emit(self._listeners, {"seq": seq, "entity": "location", "key": user_email, "op": "remove", "data": None})
+
+    def close(self) -> None:
+        if self._expirer is not None:
+            self._expirer.stop()
+            self._expirer = None
+        if self._flusher is not None:
+            self._flusher.stop()
+            self._flusher = None
+        else:
+            self.flush()
 
 class AlertStore:
-    def __init__(self, *, file_path: Optional[str] = None) -> None:
+    def __init__(
+        self,
+        *,
+        file_path: Optional[str] = None,
+        journal_path: Optional[str] = None,
+        compact_every: int = 10000,
+        fsync: bool = True,
+        sequence: Optional[ChangeSequence] = None,
+    ) -> None:
         self._lock = Lock()
         self._alerts: Dict[str, Alert] = {}
+        self._sequence = sequence or ChangeSequence()
+        self._changes: "OrderedDict[str, int]" = OrderedDict()
+        self._listeners: List[ChangeListener] = []
 
         if file_path is None:
             here = os.path.dirname(os.path.abspath(__file__)) 
             backend_dir = os.path.dirname(here)  
             file_path = os.path.join(backend_dir, "data", "alerts.json")
+        if journal_path is None:
+            journal_path = f"{os.path.splitext(file_path)[0]}.journal.jsonl"
 
         self._file_path = file_path
+        self._journal_path = journal_path
+        self._compact_every = max(1, int(compact_every))
+        self._fsync = fsync
+        self._journal_entries = 0
+        self._compacting = False
+        self._index: List[AlertKey] = []
+        self._unacked_index: List[AlertKey] = []
+        self._by_risk_level: Dict[str, List[AlertKey]] = {}
+        self._by_location: Dict[str, List[AlertKey]] = {}
         self._load_from_disk()
+        self._replay_journal(f"{self._journal_path}.old")
+        self._replay_journal(self._journal_path)
+        for alert in sorted(self._alerts.values(), key=lambda a: (a.created_at, a.id)):
+            self._index_alert(alert)
+        if self._journal_entries or os.path.exists(f"{self._journal_path}.old"):
+            self._save_to_disk(list(self._alerts.values()))
+            self._remove_journal(f"{self._journal_path}.old")
+            self._remove_journal(self._journal_path)
+            self._journal_entries = 0
+        os.makedirs(os.path.dirname(self._journal_path), exist_ok=True)
+        self._journal = open(self._journal_path, "a", encoding="utf-8")
 
     def _serialize_alert(self, a: Alert) -> dict:
         d = asdict(a)
@@ -122,9 +441,9 @@ class AlertStore:
         return d
 
     def _deserialize_alert(self, d: dict) -> Alert:
-        created_at = datetime.fromisoformat(d["created_at"])
+        created_at = parse_timestamp(d["created_at"])
         ack_raw = d.get("acknowledged_at")
-        acknowledged_at = datetime.fromisoformat(ack_raw) if ack_raw else None
+        acknowledged_at = parse_timestamp(ack_raw) if ack_raw else None
         return Alert(
             id=str(d["id"]),
             created_at=created_at,
@@ -135,6 +454,7 @@ class AlertStore:
             file_name=str(d.get("file_name", "")),
             event_time_seconds=float(d.get("event_time_seconds", 0.0)),
             acknowledged_at=acknowledged_at,
+            zone=d.get("zone"),
         )
 
     def _load_from_disk(self) -> None:
@@ -154,14 +474,103 @@ class AlertStore:
         except Exception:
             return
 
-    def _save_to_disk(self) -> None:
+    def _replay_journal(self, path: str) -> None:
+        if not os.path.exists(path):
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    if entry["op"] == "create":
+                        alert = self._deserialize_alert(entry["alert"])
+                        self._alerts[alert.id] = alert
+                    elif entry["op"] == "ack":
+                        alert = self._alerts.get(str(entry["id"]))
+                        if alert is not None and alert.acknowledged_at is None:
+                            alert.acknowledged_at = parse_timestamp(entry["acknowledged_at"])
+                except Exception:
+                    continue
+                self._journal_entries += 1
+
+    def _index_alert(self, alert: Alert) -> None:
+        key = (alert.created_at, alert.id)
+        insort(self._index, key)
+        insort(self._by_risk_level.setdefault(RiskLevel(alert.risk_level).value, []), key)
+        insort(self._by_location.setdefault(alert.location, []), key)
+        if alert.acknowledged_at is None:
+            insort(self._unacked_index, key)
+
+    def _unindex_ack(self, alert: Alert) -> None:
+        key = (alert.created_at, alert.id)
+        i = bisect_left(self._unacked_index, key)
+        if i < len(self._unacked_index) and self._unacked_index[i] == key:
+            del self._unacked_index[i]
+
+    def add_listener(self, listener: ChangeListener) -> None:
+        self._listeners.append(listener)
+
+    def _record_change(self, alert_id: str) -> int:
+        with self._sequence.lock:
+            seq = self._sequence.advance()
+            self._changes[alert_id] = seq
+            self._changes.move_to_end(alert_id)
+            return seq
+
+    def changes_since(self, since: int, upto: int) -> List[dict]:
+        with self._lock:
+            return [self._serialize_alert(self._alerts[i]) for i in _changed_keys(self._changes, since, upto)]
+
+    def _remove_journal(self, path: str) -> None:
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _save_to_disk(self, alerts: List[Alert]) -> None:
         os.makedirs(os.path.dirname(self._file_path), exist_ok=True)
-        payload = [self._serialize_alert(a) for a in self._alerts.values()]
+        payload = [self._serialize_alert(a) for a in alerts]
         tmp = f"{self._file_path}.tmp"
         with open(tmp, "w", encoding="utf-8") as f:
-            json.dump(payload, f, indent=2)
+            json.dump(payload, f)
+            f.flush()
+            if self._fsync:
+                os.fsync(f.fileno())
         os.replace(tmp, self._file_path)
 
+    def _append_journal(self, entry: dict) -> None:
+        self._journal.write(json.dumps(entry) + "\n")
+        self._journal.flush()
+        if self._fsync:
+            os.fsync(self._journal.fileno())
+        self._journal_entries += 1
+        # Compact once the journal outgrows the snapshot so the rewrite cost stays amortized O(1) per write.
+        if self._journal_entries >= max(self._compact_every, len(self._alerts)) and not self._compacting:
+            self._start_compaction()
+
+    def _start_compaction(self) -> None:
+        # Called with the lock held: rotate the journal (O(1)) and snapshot in the background.
+        old_path = f"{self._journal_path}.old"
+        self._journal.close()
+        if os.path.exists(old_path):
+            with open(self._journal_path, "r", encoding="utf-8") as src, open(old_path, "a", encoding="utf-8") as dst:
+                dst.write(src.read())
+            os.remove(self._journal_path)
+        else:
+            os.replace(self._journal_path, old_path)
+        self._journal = open(self._journal_path, "a", encoding="utf-8")
+        self._journal_entries = 0
+        self._compacting = True
+        alerts = list(self._alerts.values())
+        Thread(target=self._compact, args=(alerts, old_path), daemon=True).start()
+
+    def _compact(self, alerts: List[Alert], old_path: str) -> None:
+        try:
+            self._save_to_disk(alerts)
+            self._remove_journal(old_path)
+        except Exception:
+            pass
+        finally:
+            with self._lock:
+                self._compacting = False
+
     def create_alert(
         self,
         *,
@@ -171,6 +580,7 @@ class AlertStore:
         risk_score: float,
         file_name: str,
         event_time_seconds: float,
+        zone: Optional[str] = None,
     ) -> Alert:
         alert = Alert(
             id=str(uuid4()),
@@ -181,31 +591,106 @@ class AlertStore:
             risk_score=float(risk_score),
             file_name=file_name,
             event_time_seconds=float(event_time_seconds),
+            zone=zone,
         )
+        entry = {"op": "create", "alert": self._serialize_alert(alert)}
         with self._lock:
             self._alerts[alert.id] = alert
-            self._save_to_disk()
+            self._index_alert(alert)
+            seq = self._record_change(alert.id)
+            self._append_journal(entry)
+        _emit(self._listeners, {"seq": seq, "entity": "alert", "key": alert.id, "op": "upsert", "data": entry["alert"]})
         return alert
 
-    def list_alerts(self, *, include_acknowledged: bool = True) -> List[dict]:
+    def query_alerts(
+        self,
+        *,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        since: Optional[datetime] = None,
+        risk_level: Optional[RiskLevel] = None,
+        location: Optional[str] = None,
+        acknowledged: Optional[bool] = None,
+    ) -> Tuple[List[dict], Optional[str]]:
+        before = decode_cursor(cursor) if cursor else None
         with self._lock:
-            alerts = list(self._alerts.values())
-
-        def _key(a: Alert):
-            return a.created_at
+            # Walk the smallest index that satisfies one of the filters, newest first.
+            candidates = [self._index]
+            if acknowledged is False:
+                candidates.append(self._unacked_index)
+            if risk_level is not None:
+                candidates.append(self._by_risk_level.get(RiskLevel(risk_level).value, []))
+            if location is not None:
+                candidates.append(self._by_location.get(location, []))
+            index = min(candidates, key=len)
 
-        alerts.sort(key=_key, reverse=True)
-        if not include_acknowledged:
-            alerts = [a for a in alerts if a.acknowledged_at is None]
+            i = (bisect_left(index, before) if before else len(index)) - 1
+            page: List[Alert] = []
+            while i >= 0 and len(page) < limit:
+                created_at, alert_id = index[i]
+                if since is not None and created_at <= since:
+                    i = -1
+                    break
+                a = self._alerts[alert_id]
+                if (
+                    (risk_level is None or a.risk_level == risk_level)
+                    and (location is None or a.location == location)
+                    and (acknowledged is None or (a.acknowledged_at is not None) == acknowledged)
+                ):
+                    page.append(a)
+                i -= 1
 
-        return [self._serialize_alert(a) for a in alerts]
+            next_cursor = encode_cursor(page[-1].created_at, page[-1].id) if page and len(page) >= limit and i >= 0 else None
+            return [self._serialize_alert(a) for a in page], next_cursor
 
     def acknowledge(self, alert_id: str) -> Optional[dict]:
         with self._lock:
             alert = self._alerts.get(alert_id)
             if alert is None:
                 return None
+            seq = None
             if alert.acknowledged_at is None:
                 alert.acknowledged_at = datetime.now(timezone.utc)
-            self._save_to_disk()
-            return self._serialize_alert(alert)
+                self._unindex_ack(alert)
+                seq = self._record_change(alert.id)
+                self._append_journal({"op": "ack", "id": alert.id, "acknowledged_at": alert.acknowledged_at.isoformat()})
+            data = self._serialize_alert(alert)
+        if seq is not None:
+            _emit(self._listeners, {"seq": seq, "entity": "alert", "key": alert.id, "op": "upsert", "data": data})
+        return data
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._journal.closed:
+                self._journal.close()
+
+def _storage_backend() -> str:
+    backend = os.getenv("STORAGE_BACKEND", "json").strip().lower()
+    if backend not in {"json", "sqlite"}:
+        raise ValueError(f"Unknown STORAGE_BACKEND '{backend}'. Use 'json' or 'sqlite'.")
+    return backend
+
+def create_stores():
+    if _storage_backend() == "sqlite":
+        from .sqlite_storage import SqliteAlertStore, SqliteChangeSequence, SqliteDatabase, SqliteLocationStore
+
+        db_path = os.getenv("SQLITE_PATH") or None
+        alert_db = SqliteDatabase(db_path)
+        return (
+            SqliteAlertStore(db=alert_db),
+            SqliteLocationStore(
+                db=SqliteDatabase(db_path),
+                flush_interval=float(os.getenv("LOCATION_FLUSH_INTERVAL", "1.0")),
+                flush_batch_size=int(os.getenv("LOCATION_FLUSH_BATCH", "1000")),
+                ttl_seconds=float(os.getenv("LOCATION_TTL_SECONDS", "60")),
+            ),
+            SqliteChangeSequence(alert_db),
+        )
+    sequence = ChangeSequence()
+    location_store = LocationStore(
+        sequence=sequence,
+        flush_interval=float(os.getenv("LOCATION_FLUSH_INTERVAL", "1.0")),
+        flush_batch_size=int(os.getenv("LOCATION_FLUSH_BATCH", "1000")),
+        ttl_seconds=float(os.getenv("LOCATION_TTL_SECONDS", "60")),
+    )
+    return AlertStore(sequence=sequence), location_store, sequence
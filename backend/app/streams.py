@@ -0,0 +1,274 @@
+from __future__ import annotations
+import os
+import time
+from collections import deque
+from datetime import datetime, timezone
+from threading import Condition, Event, Lock, Thread
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+from uuid import uuid4
+from .models import RiskLevel
+
+if TYPE_CHECKING:
+    from .analyzers.optical_flow import RiskSample
+
+STREAM_SCHEMES = frozenset({"rtsp", "rtsps", "rtmp", "rtmps", "http", "https"})
+
+class StreamLimitReached(Exception):
+    pass
+
+def check_source(source: str, *, allow_files: bool) -> None:
+    # Network URLs and camera indices only (plus plain files when allowed): OpenCV opens far more.
+    if source.isdigit():
+        return
+    parts = urlsplit(source)
+    if parts.scheme.lower() in STREAM_SCHEMES and parts.netloc:
+        return
+    if os.path.isfile(source) and not parts.scheme:
+        if not allow_files:
+            raise ValueError("Local file sources are disabled (set STREAM_ALLOW_FILES=1)")
+        return
+    raise ValueError("Stream source must be an rtsp/rtmp/http(s) URL or a camera index")
+
+class LiveStream:
+    def __init__(
+        self,
+        *,
+        source: str,
+        name: str,
+        user_email: str,
+        location: str,
+        process_fps: float = 5.0,
+        buffer_size: int = 8,
+        cooldown_seconds: float = 30.0,
+        reconnect_seconds: float = 2.0,
+        scorer_options: Optional[dict] = None,
+        on_alert: Optional[Callable[["LiveStream", RiskSample], None]] = None,
+    ) -> None:
+        self.id = str(uuid4())
+        self.source = source
+        self.name = name
+        self.user_email = user_email
+        self.location = location
+        self.process_fps = max(0.1, float(process_fps))
+        self.cooldown_seconds = max(0.0, float(cooldown_seconds))
+        self.created_at = datetime.now(timezone.utc)
+        self.status = "starting"
+        self.error: Optional[str] = None
+        self.frames_read = 0
+        self.frames_dropped = 0
+        self.samples_scored = 0
+        self.alerts_created = 0
+        self.last_sample: Optional[RiskSample] = None
+        from .analyzers.optical_flow import OpticalFlowScorer
+
+        self.scorer = OpticalFlowScorer(**(scorer_options or {}))
+        self._reconnect_seconds = max(0.1, float(reconnect_seconds))
+        self._on_alert = on_alert
+        self._last_alert_at: Optional[float] = None
+        # Sampled frames waiting for the scorer; the oldest are dropped when scoring falls behind.
+        self._frames: deque = deque(maxlen=max(1, int(buffer_size)))
+        self._cond = Condition()
+        self._stop = Event()
+        self._reader_done = False
+        self._reader = Thread(target=self._read_loop, name=f"stream-reader-{self.id[:8]}", daemon=True)
+        self._scorer_thread = Thread(target=self._score_loop, name=f"stream-scorer-{self.id[:8]}", daemon=True)
+
+    @property
+    def is_file(self) -> bool:
+        return os.path.isfile(self.source)
+
+    def start(self) -> None:
+        self._reader.start()
+        self._scorer_thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        for thread in (self._reader, self._scorer_thread):
+            if thread.is_alive():
+                thread.join(timeout)
+        if self.status not in {"error", "finished"}:
+            self.status = "stopped"
+
+    def _open(self):
+        import cv2
+
+        source = int(self.source) if self.source.isdigit() else self.source
+        cap = cv2.VideoCapture(source)
+        if not cap.isOpened():
+            cap.release()
+            return None
+        return cap
+
+    def _read_loop(self) -> None:
+        import cv2
+
+        interval = 1.0 / self.process_fps
+        is_file = self.is_file
+        cap = None
+        seq = 0
+        stream_started = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                if cap is None:
+                    cap = self._open()
+                    if cap is None:
+                        if is_file:
+                            self.status, self.error = "error", f"Could not open stream source: {self.source}"
+                            return
+                        self.status = "reconnecting"
+                        self._stop.wait(self._reconnect_seconds)
+                        continue
+                    fps = cap.get(cv2.CAP_PROP_FPS)
+                    fps = fps if fps and fps > 0 else 25.0
+                    started = time.monotonic()
+                    frame_idx = 0
+                    next_sample = 0.0 if is_file else time.monotonic() - stream_started
+                    self.status = "running"
+
+                if not cap.grab():
+                    cap.release()
+                    cap = None
+                    if is_file:
+                        self.status = "finished"
+                        return
+                    # Leave a gap in the sequence so the scorer does not measure motion across the reconnect.
+                    seq += 1
+                    continue
+
+                if is_file:
+                    # Local files stand in for cameras, so they are played back at their native frame rate.
+                    t_sec = frame_idx / fps
+                    delay = started + t_sec - time.monotonic()
+                    if delay > 0 and self._stop.wait(delay):
+                        return
+                else:
+                    t_sec = time.monotonic() - stream_started
+                frame_idx += 1
+
+                if t_sec + 1e-9 < next_sample:
+                    continue
+                next_sample = t_sec + interval
+                ok, frame_bgr = cap.retrieve()
+                if not ok:
+                    continue
+
+                self.frames_read += 1
+                with self._cond:
+                    if len(self._frames) == self._frames.maxlen:
+                        self.frames_dropped += 1
+                    self._frames.append((seq, t_sec, frame_bgr))
+                    self._cond.notify()
+                seq += 1
+        except Exception as e:
+            self.status, self.error = "error", f"Stream reader failed: {e}"
+        finally:
+            if cap is not None:
+                cap.release()
+            with self._cond:
+                self._reader_done = True
+                self._cond.notify_all()
+
+    def _score_loop(self) -> None:
+        last_seq: Optional[int] = None
+        try:
+            while True:
+                with self._cond:
+                    while not self._frames and not self._reader_done and not self._stop.is_set():
+                        self._cond.wait(0.5)
+                    if self._stop.is_set() or not self._frames:
+                        return
+                    seq, t_sec, frame_bgr = self._frames.popleft()
+
+                if last_seq is not None and seq != last_seq + 1:
+                    self.scorer.reset_motion()
+                last_seq = seq
+
+                sample = self.scorer.push(frame_bgr, t_sec)
+                if sample is None:
+                    continue
+                self.samples_scored += 1
+                self.last_sample = sample
+                if sample.risk_level in {RiskLevel.MEDIUM, RiskLevel.HIGH}:
+                    self._maybe_alert(sample)
+        except Exception as e:
+            self.status, self.error = "error", f"Stream scorer failed: {e}"
+            self._stop.set()
+
+    def _maybe_alert(self, sample: RiskSample) -> None:
+        now = time.monotonic()
+        if self._last_alert_at is not None and now - self._last_alert_at < self.cooldown_seconds:
+            return
+        self._last_alert_at = now
+        if self._on_alert is not None:
+            self._on_alert(self, sample)
+        self.alerts_created += 1
+
+def serialize_stream(stream: LiveStream) -> dict:
+    last = stream.last_sample
+    return {
+        "streamId": stream.id,
+        "name": stream.name,
+        "source": stream.source,
+        "location": stream.location,
+        "status": stream.status,
+        "error": stream.error,
+        "createdAt": stream.created_at.isoformat(),
+        "processFps": stream.process_fps,
+        "framesRead": stream.frames_read,
+        "framesDropped": stream.frames_dropped,
+        "samplesScored": stream.samples_scored,
+        "alertsCreated": stream.alerts_created,
+        "counts": dict(stream.scorer.counts),
+        "zoneCounts": stream.scorer.zone_counts,
+        "lastSample": None
+        if last is None
+        else {
+            "timeSeconds": last.time_seconds,
+            "riskLevel": last.risk_level.value,
+            "zScore": last.z_score,
+            "meanFlowMag": last.mean_flow_mag,
+            "activeRatio": last.active_ratio,
+            "cause": last.cause,
+            "zone": last.zone,
+        },
+    }
+
+class StreamManager:
+    def __init__(self, *, max_streams: int = 8, on_alert: Optional[Callable[[LiveStream, RiskSample], None]] = None) -> None:
+        self._lock = Lock()
+        self._streams: Dict[str, LiveStream] = {}
+        self._max_streams = max(1, int(max_streams))
+        self._on_alert = on_alert
+
+    def add(self, **kwargs) -> LiveStream:
+        stream = LiveStream(on_alert=self._on_alert, **kwargs)
+        with self._lock:
+            if len(self._streams) >= self._max_streams:
+                raise StreamLimitReached(f"At most {self._max_streams} live streams can be monitored")
+            self._streams[stream.id] = stream
+        stream.start()
+        return stream
+
+    def get(self, stream_id: str) -> Optional[LiveStream]:
+        with self._lock:
+            return self._streams.get(stream_id)
+
+    def list(self) -> List[LiveStream]:
+        with self._lock:
+            return list(self._streams.values())
+
+    def remove(self, stream_id: str) -> Optional[LiveStream]:
+        with self._lock:
+            stream = self._streams.pop(stream_id, None)
+        if stream is not None:
+            stream.stop()
+        return stream
+
+    def shutdown(self) -> None:
+        with self._lock:
+            streams, self._streams = list(self._streams.values()), {}
+        for stream in streams:
+            stream.stop()
@@ -0,0 +1,84 @@
+from __future__ import annotations
+import hashlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Iterable
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+
+# Multipart boundaries and the small form fields sent alongside the file.
+FORM_OVERHEAD_BYTES = 1024 * 1024
+
+class UploadTooLarge(Exception):
+    pass
+
+@dataclass
+class SavedUpload:
+    path: Path
+    size_bytes: int
+    sha256: str
+
+class UploadLimitMiddleware:
+    # Enforces the size limit before Starlette spools the body: on Content-Length, else while receiving.
+    def __init__(self, app, *, max_bytes: int, paths: Iterable[str]) -> None:
+        self.app = app
+        self.max_body = max_bytes + FORM_OVERHEAD_BYTES if max_bytes > 0 else 0
+        self.max_bytes = max_bytes
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not self.max_body or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        detail = f"Upload exceeds the {self.max_bytes} byte limit"
+        length = dict(scope["headers"]).get(b"content-length", b"")
+        if length.isdigit() and int(length) > self.max_body:
+            await JSONResponse({"detail": detail}, status_code=413, headers={"Connection": "close"})(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body:
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+def _copy_upload(src: BinaryIO, dest: Path, max_bytes: int, chunk_size: int) -> SavedUpload:
+    digest = hashlib.sha256()
+    size = 0
+    tmp = dest.with_name(f"{dest.name}.part")
+    try:
+        src.seek(0)
+        with open(tmp, "wb") as f:
+            while True:
+                chunk = src.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_bytes > 0 and size > max_bytes:
+                    raise UploadTooLarge(f"Upload exceeds the {max_bytes} byte limit")
+                digest.update(chunk)
+                f.write(chunk)
+        tmp.replace(dest)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+    return SavedUpload(path=dest, size_bytes=size, sha256=digest.hexdigest())
+
+async def save_upload_streaming(
+    file: UploadFile,
+    dest: Path,
+    *,
+    max_bytes: int,
+    chunk_size: int = 1024 * 1024,
+) -> SavedUpload:
+    # Copies and hashes the spooled upload in a worker thread, off the event loop.
+    return await run_in_threadpool(_copy_upload, file.file, dest, max_bytes, chunk_size)
@@ -0,0 +1,73 @@
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+from backend.app.models import RiskLevel
+from backend.app.storage import AlertStore
+
+def _seed_snapshot(path: str, n: int) -> None:
+    base = datetime.now(timezone.utc) - timedelta(days=30)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for i in range(n):
+            if i:
+                f.write(",")
+            json.dump(
+                {
+                    "id": str(uuid4()),
+                    "created_at": (base + timedelta(seconds=i)).isoformat(),
+                    "user_email": f"user{i % 500}@example.com",
+                    "location": f"zone-{i % 40}",
+                    "risk_level": "HIGH" if i % 3 else "MEDIUM",
+                    "risk_score": float(i % 100),
+                    "file_name": "clip.mp4",
+                    "event_time_seconds": 1.0,
+                    "acknowledged_at": None,
+                },
+                f,
+            )
+        f.write("]")
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure AlertStore write latency (create + ack) against history size.")
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000", help="Comma-separated pre-existing alert counts.")
+    parser.add_argument("--writes", type=int, default=500, help="Timed writes per size (default: 500).")
+    parser.add_argument("--no-fsync", action="store_true", help="Skip fsync on each append.")
+    args = parser.parse_args()
+
+    print(f"{'alerts':>10}  {'create p50 ms':>14}  {'create p99 ms':>14}  {'ack p50 ms':>11}  {'load s':>8}")
+    for n in [int(x) for x in args.sizes.split(",") if x.strip()]:
+        with tempfile.TemporaryDirectory() as tmp:
+            file_path = os.path.join(tmp, "alerts.json")
+            _seed_snapshot(file_path, n)
+
+            t0 = time.perf_counter()
+            store = AlertStore(file_path=file_path, fsync=not args.no_fsync)
+            load_s = time.perf_counter() - t0
+
+            create_ms: list[float] = []
+            ack_ms: list[float] = []
+            for _ in range(args.writes):
+                t0 = time.perf_counter()
+                alert = store.create_alert(user_email="bench@example.com", location="zone-1", risk_level=RiskLevel.HIGH, risk_score=1.0, file_name="clip.mp4", event_time_seconds=0.0,)
+                create_ms.append((time.perf_counter() - t0) * 1000.0)
+
+                t0 = time.perf_counter()
+                store.acknowledge(alert.id)
+                ack_ms.append((time.perf_counter() - t0) * 1000.0)
+            store.close()
+
+        print(f"{n:>10}  {statistics.median(create_ms):>14.3f}  {_percentile(create_ms, 99):>14.3f}  {statistics.median(ack_ms):>11.3f}  {load_s:>8.2f}")
+
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
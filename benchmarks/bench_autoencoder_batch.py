@@ -0,0 +1,49 @@
+import argparse
+import os
+import time
+from typing import Optional
+import numpy as np
+from backend.app.path_setup import ensure_workspace_on_path
+
+def _model(model_path: Optional[str]):
+    from Crowd_Anomaly_Detection.run_video_risk_alerts import _build_model, _load_model
+
+    if model_path:
+        return _load_model(os.path.abspath(model_path))
+    # Random weights exercise the same graph; throughput does not depend on the trained values.
+    return _build_model()
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare autoencoder inference throughput (bunches/s) across batch sizes on CPU.")
+    parser.add_argument("--bunches", type=int, default=64, help="Synthetic 10-frame bunches per run (default: 64).")
+    parser.add_argument("--batch-sizes", default="1,4,8,16,32", help="Comma-separated batch sizes.")
+    parser.add_argument("--model", default=None, help="Path to AnomalyDetector.h5 (default: untrained weights).")
+    args = parser.parse_args()
+
+    ensure_workspace_on_path()
+    from Crowd_Anomaly_Detection.run_video_risk_alerts import _iter_batch_losses, _mean_euclidean_loss
+
+    rng = np.random.default_rng(0)
+    bunches = rng.random((args.bunches, 227, 227, 10, 1), dtype=np.float32)
+    model = _model(args.model)
+    model.predict_on_batch(bunches[:1])
+
+    reference = None
+    print(f"{'batch':>6}  {'bunches/s':>10}  {'seconds':>8}  {'max |dloss|':>12}")
+    for batch_size in [int(x) for x in args.batch_sizes.split(",") if x.strip()]:
+        t0 = time.perf_counter()
+        losses = [loss for batch in _iter_batch_losses(model, bunches, batch_size) for loss in batch]
+        elapsed = time.perf_counter() - t0
+        if reference is None:
+            # Unbatched reference, computed the way the analyzer did before batching.
+            reference = []
+            for bunch in bunches:
+                n_bunch = np.expand_dims(bunch, axis=0)
+                reference.append(_mean_euclidean_loss(n_bunch, model.predict(n_bunch, verbose=0)))
+        drift = max(abs(a - b) for a, b in zip(losses, reference))
+        print(f"{batch_size:>6}  {len(bunches) / elapsed:>10.2f}  {elapsed:>8.2f}  {drift:>12.3g}")
+
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,95 @@
+import argparse
+import time
+import tracemalloc
+from backend.app.path_setup import ensure_workspace_on_path
+
+def _frames(count: int, width: int, height: int):
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    return [np.roll(base, i * 4, axis=1) for i in range(count)]
+
+class _AllocatingMeter:
+    # The per-frame loop before buffer reuse: fresh arrays from every call, and cartToPolar computes an unused angle.
+    def __init__(self, resize_width: int, active_mag_threshold: float) -> None:
+        self.resize_width = resize_width
+        self.active_mag_threshold = active_mag_threshold
+        self._prev = None
+
+    def measure(self, frame_bgr):
+        import cv2
+        import numpy as np
+
+        h, w = frame_bgr.shape[:2]
+        new_w = int(self.resize_width)
+        frame_bgr = cv2.resize(frame_bgr, (new_w, max(1, int(h * (new_w / w)))), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2GRAY)
+        prev, self._prev = self._prev, gray
+        if prev is None:
+            return None
+        flow = cv2.calcOpticalFlowFarneback(prev, gray, None, pyr_scale=0.5, levels=3, winsize=15, iterations=3, poly_n=5, poly_sigma=1.2, flags=0,)
+        mag, _ang = cv2.cartToPolar(flow[..., 0], flow[..., 1])
+        return float(np.mean(mag)), float(np.mean(mag > self.active_mag_threshold))
+
+def _timed(meter, frames):
+    t0 = time.perf_counter()
+    out = [meter.measure(frame) for frame in frames]
+    return out, time.perf_counter() - t0
+
+def _alloc_per_frame(meter, frames) -> float:
+    # Average tracemalloc peak above the steady state while measuring one frame (numpy/OpenCV buffers are traced).
+    meter.measure(frames[0])
+    meter.measure(frames[1])
+    tracemalloc.start()
+    total = 0
+    for frame in frames[2:]:
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        meter.measure(frame)
+        total += tracemalloc.get_traced_memory()[1] - current
+    tracemalloc.stop()
+    return total / max(1, len(frames) - 2)
+
+def _max_drift(out, reference) -> float:
+    # cv2.magnitude and cartToPolar round differently in the last float32 bit, so stats are compared with a tolerance.
+    return max((abs(a[0] - b[0]) for a, b in zip(out, reference) if a is not None and b is not None), default=0.0)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Per-frame cost of the Farneback flow loop: allocating baseline vs preallocated buffers, and per-zone stats.")
+    parser.add_argument("--frames", type=int, default=300, help="Synthetic frames per variant (default: 300).")
+    parser.add_argument("--width", type=int, default=640, help="Source frame width (default: 640).")
+    parser.add_argument("--height", type=int, default=360, help="Source frame height (default: 360).")
+    parser.add_argument("--resize-width", type=int, default=320, help="Flow resolution width (default: 320).")
+    parser.add_argument("--alloc-frames", type=int, default=50, help="Frames traced for the allocation column (default: 50).")
+    parser.add_argument("--zone-grid", default="4x4", help="ROWSxCOLS grid for the zones variant; empty to skip it (default: 4x4).")
+    args = parser.parse_args()
+
+    ensure_workspace_on_path()
+    from Crowd_Anomaly_Detection.flow_scorer import FlowMeter
+
+    frames = _frames(max(3, args.frames), args.width, args.height)
+    variants = [
+        ("allocating", lambda: _AllocatingMeter(args.resize_width, 1.0)),
+        ("buffers", lambda: FlowMeter(resize_width=args.resize_width)),
+        ("buffers+initflow", lambda: FlowMeter(resize_width=args.resize_width, use_initial_flow=True)),
+    ]
+    if args.zone_grid:
+        grid = tuple(int(part) for part in args.zone_grid.lower().split("x"))
+        # Same Farneback work plus the per-zone bincount reduction; the stats column compares scene-level values only.
+        variants.append((f"buffers+zones{args.zone_grid}", lambda: FlowMeter(resize_width=args.resize_width, zone_grid=grid)))
+
+    reference = None
+    w = max(len(name) for name, _ in variants)
+    print(f"{'variant':>{w}}  {'ms/frame':>9}  {'alloc KiB/frame':>15}  {'max |dmag|':>10}")
+    for name, make in variants:
+        out, wall = _timed(make(), frames)
+        alloc = _alloc_per_frame(make(), frames[: max(3, args.alloc_frames)])
+        if reference is None:
+            reference = out
+        print(f"{name:>{w}}  {wall * 1000 / len(frames):>9.2f}  {alloc / 1024:>15.1f}  {_max_drift(out, reference):>10.2e}")
+
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
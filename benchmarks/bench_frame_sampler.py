@@ -0,0 +1,53 @@
+import argparse
+import os
+import tempfile
+import time
+from backend.app.path_setup import ensure_workspace_on_path
+
+def _synthetic_video(path: str, frames: int, fps: float) -> None:
+    import cv2
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (640, 360))
+    base = rng.integers(0, 255, (360, 640, 3), dtype=np.uint8)
+    for i in range(frames):
+        writer.write(np.roll(base, i * 4, axis=1))
+    writer.release()
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare frame sampling strategies (read / grab / seek) by decode throughput.")
+    parser.add_argument("--video", default=None, help="Video to sample (default: a synthetic 30fps clip).")
+    parser.add_argument("--frames", type=int, default=1800, help="Length of the synthetic clip in frames (default: 1800).")
+    parser.add_argument("--process-fps", type=float, default=5.0, help="Sampling rate, as used by the optical-flow analyzer (default: 5).")
+    parser.add_argument("--strategies", default="read,grab,seek", help="Comma-separated strategies.")
+    args = parser.parse_args()
+
+    ensure_workspace_on_path()
+    from Crowd_Anomaly_Detection.frame_sampler import iter_sampled_frames, open_video
+
+    with tempfile.TemporaryDirectory() as tmp:
+        video_path = args.video
+        if video_path is None:
+            video_path = os.path.join(tmp, "synthetic.mp4")
+            _synthetic_video(video_path, args.frames, 30.0)
+
+        reference = None
+        print(f"{'strategy':>8}  {'sampled':>8}  {'wall s':>8}  {'cpu s':>8}  {'source fps':>11}  {'same frames':>11}")
+        for strategy in [s.strip() for s in args.strategies.split(",") if s.strip()]:
+            cap, fps = open_video(video_path)
+            step = max(1, int(round(fps / max(args.process_fps, 0.1))))
+            t0, c0 = time.perf_counter(), time.process_time()
+            indices = [idx for idx, _frame in iter_sampled_frames(cap, step, strategy=strategy)]
+            wall, cpu = time.perf_counter() - t0, time.process_time() - c0
+            cap.release()
+
+            if reference is None:
+                reference = indices
+            span = (indices[-1] + 1) if indices else 0
+            print(f"{strategy:>8}  {len(indices):>8}  {wall:>8.2f}  {cpu:>8.2f}  {span / wall if wall else 0.0:>11.1f}  {str(indices == reference):>11}")
+
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
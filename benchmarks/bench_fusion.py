@@ -0,0 +1,65 @@
+import argparse
+import os
+import tempfile
+import time
+from typing import Optional
+from backend.app.analysis import analyze_with_signal
+from backend.app.analyzers import autoencoder
+from benchmarks.bench_frame_sampler import _synthetic_video
+
+class _ZeroModel:
+    # Reconstructs nothing: keeps decoding and feature extraction in the measurement and leaves inference out of it.
+    def predict_on_batch(self, batch):
+        import numpy as np
+
+        return np.zeros_like(batch)
+
+def _model(model_path: Optional[str], skip_inference: bool):
+    from backend.app.path_setup import workspace_module
+
+    if skip_inference:
+        return _ZeroModel()
+    rva = workspace_module("run_video_risk_alerts")
+    if model_path:
+        return rva._load_model(os.path.abspath(model_path))
+    # Random weights exercise the same graph; cost does not depend on the trained values.
+    return rva._build_model()
+
+def _run(video_path: str, analyzer: str, options: dict):
+    wall, cpu = time.perf_counter(), time.process_time()
+    _result, signals = analyze_with_signal(video_path=video_path, analyzer=analyzer, options=options)
+    return signals, time.perf_counter() - wall, time.process_time() - cpu
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Optical flow + autoencoder: two separate decodes vs one shared decode with fusion.")
+    parser.add_argument("--video", default=None, help="Video to analyze (default: a synthetic 30fps clip).")
+    parser.add_argument("--frames", type=int, default=1800, help="Length of the synthetic clip in frames (default: 1800).")
+    parser.add_argument("--model", default=None, help="Path to AnomalyDetector.h5 (default: untrained weights).")
+    parser.add_argument("--skip-inference", action="store_true", help="Replace the model with a zero reconstruction to time decode and features only.")
+    args = parser.parse_args()
+
+    autoencoder._model = _model(args.model, args.skip_inference)
+    # Full-length signals on both sides, as in fusion mode.
+    options = {"processFps": 5.0, "sampleEverySeconds": 0.2, "batchSize": 16, "stopOnHigh": False, "fusion": True}
+    options.update(minConsecutive=1, zLow=3.0, zMed=5.0, zHigh=7.0, flowWeight=0.5, autoencoderWeight=0.5)
+    options.update(thresholdLow=0.0008, thresholdMedium=0.0012, thresholdHigh=0.0016, includeLosses=False)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        video_path = args.video
+        if video_path is None:
+            video_path = os.path.join(tmp, "synthetic.mp4")
+            _synthetic_video(video_path, args.frames, 30.0)
+
+        flow, flow_wall, flow_cpu = _run(video_path, "optical_flow", options)
+        ae, ae_wall, ae_cpu = _run(video_path, "autoencoder", options)
+        shared, wall, cpu = _run(video_path, "optical_flow,autoencoder", options)
+
+        print(f"{'mode':>10}  {'wall s':>8}  {'cpu s':>8}  {'identical':>9}")
+        print(f"{'separate':>10}  {flow_wall + ae_wall:>8.2f}  {flow_cpu + ae_cpu:>8.2f}  {'-':>9}")
+        same = shared["optical_flow"] == flow["optical_flow"] and shared["autoencoder"] == ae["autoencoder"]
+        print(f"{'shared':>10}  {wall:>8.2f}  {cpu:>8.2f}  {str(same):>9}")
+
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
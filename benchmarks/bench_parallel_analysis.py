@@ -0,0 +1,46 @@
+import argparse
+import os
+import tempfile
+import time
+from backend.app.analyzers import optical_flow
+from backend.app.analyzers.optical_flow import analyze_video_optical_flow
+from benchmarks.bench_frame_sampler import _synthetic_video
+
+def _run(video_path: str, segments: int, process_fps: float):
+    t0 = time.perf_counter()
+    result = analyze_video_optical_flow(video_path=video_path, process_fps=process_fps, stop_on_high=False, parallel_segments=segments)
+    return result, time.perf_counter() - t0
+
+def _same(a, b) -> bool:
+    key = lambda r: [(s.time_seconds, s.mean_flow_mag, s.z_score, s.risk_level) for s in r.samples]
+    return key(a) == key(b) and a.counts == b.counts
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare sequential and segment-parallel optical-flow analysis (wall time and identical output).")
+    parser.add_argument("--video", default=None, help="Video to analyze (default: a synthetic 30fps clip).")
+    parser.add_argument("--frames", default="1800,9000", help="Comma-separated synthetic clip lengths in frames (default: 1800,9000).")
+    parser.add_argument("--process-fps", type=float, default=5.0, help="Sampling rate (default: 5).")
+    parser.add_argument("--segments", default="2,4,8", help="Comma-separated segment counts to compare against sequential.")
+    parser.add_argument("--min-segment-samples", type=int, default=optical_flow.MIN_SEGMENT_SAMPLES, help=f"Override MIN_SEGMENT_SAMPLES, e.g. 1 to time splits it would skip (default: {optical_flow.MIN_SEGMENT_SAMPLES}).")
+    args = parser.parse_args()
+    optical_flow.MIN_SEGMENT_SAMPLES = args.min_segment_samples
+
+    with tempfile.TemporaryDirectory() as tmp:
+        videos = [args.video] if args.video else []
+        for frames in [] if args.video else [int(x) for x in args.frames.split(",") if x.strip()]:
+            videos.append(os.path.join(tmp, f"synthetic-{frames}.mp4"))
+            _synthetic_video(videos[-1], frames, 30.0)
+
+        print(f"{'video':>20}  {'segments':>8}  {'samples':>8}  {'wall s':>8}  {'speedup':>8}  {'identical':>9}")
+        for video_path in videos:
+            name = os.path.basename(video_path)[-20:]
+            baseline, base_s = _run(video_path, 0, args.process_fps)
+            print(f"{name:>20}  {1:>8}  {len(baseline.samples):>8}  {base_s:>8.2f}  {1.0:>8.2f}  {'-':>9}")
+            for segments in [int(x) for x in args.segments.split(",") if x.strip()]:
+                result, wall = _run(video_path, segments, args.process_fps)
+                print(f"{name:>20}  {segments:>8}  {len(result.samples):>8}  {wall:>8.2f}  {base_s / wall:>8.2f}  {str(_same(result, baseline)):>9}")
+
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,125 @@
+import argparse
+import importlib.util
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from typing import Dict, List, Optional, Tuple
+
+HEAVY_MODULES = ("numpy", "cv2", "tensorflow")
+
+def _import_profile(module: str) -> Tuple[float, List[Tuple[str, float]], Dict[str, bool]]:
+    # `python -X importtime`: total ms, the slowest direct imports and the heavy modules pulled in.
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True, check=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line[13:]:
+            continue
+        _self, cumulative, name = line[13:].split("|", 2)
+        if cumulative.strip().isdigit():
+            rows.append((name.rstrip(), int(cumulative) / 1000.0))
+    total = next((ms for name, ms in rows if name.strip() == module), 0.0)
+    # A module's own imports are printed just before it, one level (two spaces) deeper.
+    direct = [(name.strip(), ms) for name, ms in rows if len(name) - len(name.lstrip()) == 3]
+    loaded = {heavy: any(name.strip() == heavy for name, _ in rows) for heavy in HEAVY_MODULES}
+    return total, sorted(direct, key=lambda r: -r[1]), loaded
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _tree_rss_kib(pid: int) -> Optional[int]:
+    # VmRSS of the server and every descendant (analysis workers), from /proc; None where /proc is not available.
+    if not os.path.isdir("/proc"):
+        return None
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat", "r") as f:
+                    parents[int(entry)] = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                pass
+    tree, frontier = {pid}, [pid]
+    while frontier:
+        parent = frontier.pop()
+        for child, ppid in parents.items():
+            if ppid == parent and child not in tree:
+                tree.add(child)
+                frontier.append(child)
+    total = 0
+    for p in tree:
+        try:
+            with open(f"/proc/{p}/status", "r") as f:
+                total += next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+        except (OSError, StopIteration):
+            pass
+    return total
+
+def _serve_once(env: Dict[str, str], idle_seconds: float, timeout: float) -> Tuple[float, Optional[int]]:
+    # Seconds from spawning uvicorn to the first 200 from /api/health, and the process tree's RSS after idling.
+    port = _free_port()
+    cmd = [sys.executable, "-m", "uvicorn", "backend.app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"]
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(cmd, env=env)
+    try:
+        deadline = t0 + timeout
+        while True:
+            if proc.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with {proc.returncode}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/health", timeout=1) as resp:
+                    if resp.status == 200:
+                        break
+            except OSError:
+                if time.perf_counter() > deadline:
+                    raise RuntimeError("/api/health did not answer in time")
+                time.sleep(0.01)
+        ready = time.perf_counter() - t0
+        time.sleep(idle_seconds)
+        return ready, _tree_rss_kib(proc.pid)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Backend startup cost: import time, time to first /api/health and idle RSS.")
+    parser.add_argument("--module", default="backend.app.main", help="Module profiled with -X importtime (default: backend.app.main).")
+    parser.add_argument("--top", type=int, default=8, help="Slowest direct imports to list (default: 8).")
+    parser.add_argument("--repeat", type=int, default=3, help="Server starts per variant; the median is reported (default: 3).")
+    parser.add_argument("--idle", type=float, default=2.0, help="Seconds to idle before reading RSS (default: 2).")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds to wait for /api/health (default: 120).")
+    parser.add_argument("--preload", default="optical_flow,autoencoder", help="ANALYZE_PRELOAD for the second variant; empty to skip it.")
+    args = parser.parse_args()
+
+    total, direct, loaded = _import_profile(args.module)
+    heavy = ", ".join(f"{m}={'yes' if v else 'no'}" for m, v in loaded.items())
+    print(f"import {args.module}: {total:.1f} ms  ({heavy})")
+    for name, ms in direct[: args.top]:
+        print(f"  {ms:>8.1f} ms  {name}")
+
+    if importlib.util.find_spec("uvicorn") is None:
+        print("uvicorn is not installed; skipping the /api/health and RSS measurements.")
+        return 0
+
+    variants = [("lazy", "")] + ([(f"preload={args.preload}", args.preload)] if args.preload else [])
+    print(f"\n{'variant':>34}  {'first /api/health':>17}  {'idle RSS MiB':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        # Keep the benchmark's stores out of backend/data.
+        base_env = {**os.environ, "STORAGE_BACKEND": "sqlite", "SQLITE_PATH": os.path.join(tmp, "bench.db"), "SIGNAL_DIR": os.path.join(tmp, "signals")}
+        for name, preload in variants:
+            runs = [_serve_once({**base_env, "ANALYZE_PRELOAD": preload}, args.idle, args.timeout) for _ in range(max(1, args.repeat))]
+            ready = statistics.median(r[0] for r in runs)
+            rss = [r[1] for r in runs if r[1] is not None]
+            rss_text = f"{statistics.median(rss) / 1024:.1f}" if rss else "n/a"
+            print(f"{name:>34}  {ready * 1000:>14.0f} ms  {rss_text:>12}")
+
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -22,12 +22,33 @@ export async function analyzeVideo({ file, userEmail, location, options }) {
     const txt = await res.text()
     throw new Error(txt || `Analyze failed (${res.status})`)
   }
+  const job = await res.json()
+  return waitForJob(job.jobId)
+}
+
+export async function fetchJob(jobId) {
+  const res = await fetch(`${DEFAULTS.apiBaseUrl}/api/jobs/${jobId}`)
+  if (!res.ok) {
+    const txt = await res.text()
+    throw new Error(txt || `Fetch job failed (${res.status})`)
+  }
   return res.json()
 }
 
-export async function fetchAlerts({ includeAcknowledged = true } = {}) {
+export async function waitForJob(jobId, { intervalMs = 1000 } = {}) {
+  for (;;) {
+    const job = await fetchJob(jobId)
+    if (job.status === 'SUCCEEDED') return job.result
+    if (job.status === 'FAILED') throw new Error(job.error || 'Analysis failed')
+    if (job.status === 'CANCELLED') throw new Error('Analysis cancelled')
+    await new Promise((resolve) => setTimeout(resolve, intervalMs))
+  }
+}
+
+export async function fetchAlerts({ includeAcknowledged = true, cursor = '' } = {}) {
   const url = new URL(`${DEFAULTS.apiBaseUrl}/api/alerts`)
   url.searchParams.set('includeAcknowledged', String(includeAcknowledged))
+  if (cursor) url.searchParams.set('cursor', cursor)
 
   const res = await fetch(url.toString())
   if (!res.ok) {
@@ -37,6 +58,39 @@ export async function fetchAlerts({ includeAcknowledged = true } = {}) {
   return res.json()
 }
 
+function setArea(url, area) {
+  if (!area) return
+  for (const key of ['minLat', 'minLon', 'maxLat', 'maxLon']) {
+    if (area[key] != null) url.searchParams.set(key, String(area[key]))
+  }
+}
+
+export async function fetchChanges({ since = 0, epoch = '', etag = '', area = null } = {}) {
+  const url = new URL(`${DEFAULTS.apiBaseUrl}/api/changes`)
+  url.searchParams.set('since', String(since))
+  if (epoch) url.searchParams.set('epoch', epoch)
+  setArea(url, area)
+
+  const res = await fetch(url.toString(), {
+    cache: 'no-store',
+    headers: etag ? { 'If-None-Match': etag } : {},
+  })
+  if (res.status === 304) return { notModified: true, etag }
+  if (!res.ok) {
+    const txt = await res.text()
+    throw new Error(txt || `Fetch changes failed (${res.status})`)
+  }
+  return { notModified: false, etag: res.headers.get('ETag') || '', data: await res.json() }
+}
+
+export function openChangeStream({ since = 0, epoch = '', area = null } = {}) {
+  const url = new URL(`${DEFAULTS.apiBaseUrl}/api/events`)
+  url.searchParams.set('since', String(since))
+  if (epoch) url.searchParams.set('epoch', epoch)
+  setArea(url, area)
+  return new EventSource(url.toString())
+}
+
 export async function acknowledgeAlert(alertId) {
   const res = await fetch(`${DEFAULTS.apiBaseUrl}/api/alerts/${alertId}/ack`, {
     method: 'POST',
@@ -65,8 +119,10 @@ export async function updateLocation(userEmail, lat, lng) {
   return res.json()
 }
 
-export async function fetchLocations() {
-  const res = await fetch(`${DEFAULTS.apiBaseUrl}/api/locations`)
+export async function fetchLocations({ area = null } = {}) {
+  const url = new URL(`${DEFAULTS.apiBaseUrl}/api/locations`)
+  setArea(url, area)
+  const res = await fetch(url.toString())
   if (!res.ok) {
      const txt = await res.text()
     throw new Error(txt || `Fetch locations failed (${res.status})`)
@@ -1,11 +1,11 @@
-import React, { useMemo } from 'react'
+import React, { useRef, useState } from 'react'
 import { GoogleMap, Marker, useJsApiLoader } from '@react-google-maps/api'
 
 const containerStyle = { width: '100%', height: '100%', minHeight: '400px', borderRadius: '1rem' };
 
 const defaultCenter = { lat: 19.2183,  lng: 72.8367 };
 
-export default function Map({ locations = [] }) {
+export default function Map({ locations = [], onBoundsChange }) {
   const apiKey = import.meta.env.VITE_GOOGLE_MAPS_API_KEY;
 
   if (!apiKey || apiKey === '') {
@@ -26,11 +26,21 @@ export default function Map({ locations = [] }) {
     googleMapsApiKey: apiKey,
   })
 
-  const center = useMemo(() => {
-    return locations.length > 0
+  const mapRef = useRef(null)
+  // Only the first fix centers the map; later updates must not pan it (that would move the viewport query).
+  const [center] = useState(() => (
+    locations.length > 0
       ? { lat: locations[0].latitude, lng: locations[0].longitude }
       : defaultCenter
-  }, [locations])
+  ))
+
+  function reportBounds() {
+    const bounds = mapRef.current?.getBounds()
+    if (!bounds || !onBoundsChange) return
+    const sw = bounds.getSouthWest()
+    const ne = bounds.getNorthEast()
+    onBoundsChange({ minLat: sw.lat(), minLon: sw.lng(), maxLat: ne.lat(), maxLon: ne.lng() })
+  }
 
   if (loadError) {
     return (
@@ -51,7 +61,7 @@ export default function Map({ locations = [] }) {
 
   return (
     <div className="h-96 w-full rounded-xl overflow-hidden shadow-sm border border-slate-200/70">
-      <GoogleMap mapContainerStyle={containerStyle} center={center} zoom={13}>
+      <GoogleMap mapContainerStyle={containerStyle} center={center} zoom={13} onLoad={(m) => { mapRef.current = m }} onIdle={reportBounds}>
         {locations.map((loc) => (
           <Marker key={loc.user_email} position={{ lat: loc.latitude, lng: loc.longitude }} title={`${loc.user_email} (${loc.timestamp})`} />
         ))}
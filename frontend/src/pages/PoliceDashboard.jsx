@@ -1,18 +1,26 @@
-import { useEffect, useMemo, useState } from 'react'
+import { useEffect, useMemo, useRef, useState } from 'react'
 import { useNavigate } from 'react-router-dom'
-import { acknowledgeAlert, fetchAlerts, fetchLocations } from '../auth/api.js'
+import { acknowledgeAlert, fetchAlerts, fetchChanges, fetchLocations, openChangeStream } from '../auth/api.js'
 import Map from '../components/Map.jsx'
 import { clearSession, getSession } from '../auth/session.js'
 import ThemeToggle from '../components/ThemeToggle.jsx'
 
+function byKey(items, key) {
+  return Object.fromEntries((items || []).map((item) => [item[key], item]))
+}
+
 export default function PoliceDashboard() {
   const nav = useNavigate()
   const session = getSession()
-  const [alerts, setAlerts] = useState([])
+  const [alertsById, setAlertsById] = useState({})
+  const [olderCursor, setOlderCursor] = useState('')
   const [busyId, setBusyId] = useState('')
   const [error, setError] = useState('')
   const [includeAck, setIncludeAck] = useState(true)
-  const [locations, setLocations] = useState([])
+  const [locationsByEmail, setLocationsByEmail] = useState({})
+  const syncRef = useRef({ seq: 0, epoch: '', etag: '' })
+  const [area, setArea] = useState(null)
+  const areaRef = useRef(null)
 
   function riskPill(level) {
     const v = String(level || 'NONE')
@@ -35,6 +43,17 @@ export default function PoliceDashboard() {
     return `${session.email} (${session.policeId})`
   }, [session])
 
+  const alerts = useMemo(() => {
+    return Object.values(alertsById)
+      .filter((a) => includeAck || !a.acknowledged_at)
+      .sort((a, b) => String(b.created_at).localeCompare(String(a.created_at)))
+  }, [alertsById, includeAck])
+
+  const locations = useMemo(() => {
+    const cutoff = Date.now() - 60 * 1000
+    return Object.values(locationsByEmail).filter((l) => new Date(l.timestamp).getTime() >= cutoff)
+  }, [locationsByEmail])
+
   const stats = useMemo(() => {
     const total = alerts.length
     const unacked = alerts.filter((a) => !a.acknowledged_at).length
@@ -43,24 +62,68 @@ export default function PoliceDashboard() {
     return { total, unacked, high, med }
   }, [alerts])
 
+  function applyChanges(data) {
+    if (data.reset) {
+      setAlertsById(byKey(data.alerts, 'id'))
+      setOlderCursor(data.alertsCursor || '')
+      setLocationsByEmail(byKey(data.locations, 'user_email'))
+      return
+    }
+    setAlertsById((prev) => ({ ...prev, ...byKey(data.alerts, 'id') }))
+    setLocationsByEmail((prev) => {
+      const next = { ...prev, ...byKey(data.locations, 'user_email') }
+      for (const email of data.removedLocations || []) delete next[email]
+      return next
+    })
+  }
+
   async function load() {
     setError('')
     try {
-      const data = await fetchAlerts({ includeAcknowledged: includeAck })
-      setAlerts(data.alerts || [])
-      
-      const locData = await fetchLocations()
-      setLocations(locData.locations || [])
+      const sync = syncRef.current
+      const res = await fetchChanges({ since: sync.seq, epoch: sync.epoch, etag: sync.etag, area: areaRef.current })
+      if (res.notModified) return
+      applyChanges(res.data)
+      syncRef.current = { seq: res.data.seq, epoch: res.data.epoch, etag: res.etag }
     } catch (err) {
       setError(err?.message || String(err))
     }
   }
 
   useEffect(() => {
-    load()
-    const id = setInterval(load, 3000)
-    return () => clearInterval(id)
-  }, [includeAck])
+    areaRef.current = area
+    if (area && syncRef.current.seq > 0) {
+      // The viewport changed: replace the visible users, then keep streaming deltas for the new area.
+      fetchLocations({ area })
+        .then((data) => setLocationsByEmail(byKey(data.locations, 'user_email')))
+        .catch((err) => setError(err?.message || String(err)))
+    }
+    if (typeof window.EventSource === 'undefined') {
+      load()
+      const id = setInterval(load, 3000)
+      return () => clearInterval(id)
+    }
+    const sync = syncRef.current
+    const source = openChangeStream({ since: sync.seq, epoch: sync.epoch, area })
+    source.addEventListener('changes', (e) => {
+      const data = JSON.parse(e.data)
+      applyChanges(data)
+      syncRef.current = { seq: data.seq, epoch: data.epoch, etag: '' }
+      setError('')
+    })
+    source.onerror = () => setError('Live updates disconnected, reconnecting…')
+    return () => source.close()
+  }, [area])
+
+  async function loadOlder() {
+    try {
+      const data = await fetchAlerts({ cursor: olderCursor })
+      setAlertsById((prev) => ({ ...byKey(data.alerts, 'id'), ...prev }))
+      setOlderCursor(data.nextCursor || '')
+    } catch (err) {
+      setError(err?.message || String(err))
+    }
+  }
 
   async function onAck(alertId) {
     setBusyId(alertId)
@@ -98,7 +161,7 @@ export default function PoliceDashboard() {
           <div className="flex flex-col gap-3 sm:flex-row sm:items-start sm:justify-between">
             <div>
               <h2 className="text-lg font-bold">Alerts</h2>
-              <p className="mt-1 text-sm text-slate-600 dark:text-slate-300">Crowd risk escalation notifications (MEDIUM/HIGH) • Polling every 3s • Persisted on disk</p>
+              <p className="mt-1 text-sm text-slate-600 dark:text-slate-300">Crowd risk escalation notifications (MEDIUM/HIGH) • Live updates • Persisted on disk</p>
             </div>
             <div className="flex flex-wrap items-center gap-3">
               <label className="flex items-center gap-2 text-sm text-slate-700 dark:text-slate-200"><input type="checkbox" checked={includeAck} onChange={(e) => setIncludeAck(e.target.checked)} />Include acknowledged</label>
@@ -122,7 +185,7 @@ export default function PoliceDashboard() {
                 <div className="text-xs text-slate-600 dark:text-slate-400">Active users: {locations.length}</div>
              </div>
              <div className="mt-4">
-               <Map locations={locations} />
+               <Map locations={locations} onBoundsChange={setArea} />
              </div>
           </div>
 
@@ -160,6 +223,7 @@ export default function PoliceDashboard() {
                           {riskPill(a.risk_level)}
                           <div className="text-sm font-semibold text-slate-900 dark:text-slate-100">{a.user_email}</div>
                           <div className="text-sm text-slate-600 dark:text-slate-300">• {a.location}</div>
+                          {a.zone ? <div className="text-sm text-slate-600 dark:text-slate-300">• Zone <span className="font-mono">{a.zone}</span></div> : null}
                           <div className="text-xs text-slate-500 dark:text-slate-400">{new Date(a.created_at).toLocaleString()}</div>
                         </div>
                         <div className="mt-2 text-sm text-slate-700 dark:text-slate-200">
@@ -179,6 +243,9 @@ export default function PoliceDashboard() {
                 ))}
               </div>
             )}
+            {olderCursor ? (
+              <button onClick={loadOlder} type="button" className="mt-3 rounded-xl border border-slate-200 bg-white/70 px-3 py-2 text-sm font-semibold text-slate-800 hover:bg-white dark:border-white/10 dark:bg-white/10 dark:text-slate-100 dark:hover:bg-white/15">Load older alerts</button>
+            ) : null}
           </div>
         </div>
       </div>
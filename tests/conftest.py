@@ -0,0 +1,9 @@
+import os
+import tempfile
+
+# backend.app.main opens its stores at import time; keep them out of backend/data.
+_data_dir = tempfile.mkdtemp(prefix="crowd-risk-tests-")
+os.environ.setdefault("STORAGE_BACKEND", "sqlite")
+os.environ.setdefault("SQLITE_PATH", os.path.join(_data_dir, "app.db"))
+os.environ.setdefault("SIGNAL_DIR", os.path.join(_data_dir, "signals"))
+os.environ.setdefault("ANALYZE_CACHE_DIR", os.path.join(_data_dir, "cache"))
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+
+from backend.app.analyzers import autoencoder
+
+class _StubModel:
+    # Elementwise "reconstruction", so each bunch's output is the same whatever batch it arrives in.
+    def __init__(self):
+        self.batch_sizes = []
+
+    def predict_on_batch(self, batch):
+        self.batch_sizes.append(len(batch))
+        return np.tanh(np.asarray(batch) * 0.9)
+
+@pytest.fixture
+def stub_model(monkeypatch):
+    model = _StubModel()
+    monkeypatch.setattr(autoencoder, "_model", model)
+    return model
+
+@pytest.fixture
+def clip(tmp_path):
+    path = str(tmp_path / "clip.mp4")
+    rng = np.random.default_rng(0)
+    base = cv2.GaussianBlur(rng.integers(0, 255, (120, 160, 3), dtype=np.uint8), (9, 9), 0)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), 25.0, (160, 120))
+    for i in range(100):
+        writer.write(np.roll(base, 3 * i, axis=1))
+    writer.release()
+    return path
+
+@pytest.mark.parametrize("streaming", [True, False])
+def test_batched_losses_match_batch_size_one(stub_model, clip, streaming):
+    options = {"sample_every_seconds": 0.04, "sampling": "grab", "streaming": streaming, "norm_window_frames": 30, "model_path": "unused.h5"}
+    single = list(autoencoder.iter_loss_signal(clip, batch_size=1, **options))
+    assert len(single) == 10 and max(single) > 0
+    assert set(stub_model.batch_sizes) == {1}
+
+    stub_model.batch_sizes.clear()
+    batched = list(autoencoder.iter_loss_signal(clip, batch_size=4, **options))
+    assert stub_model.batch_sizes == [4, 4, 2]
+    assert batched == single
@@ -0,0 +1,86 @@
+import asyncio
+from functools import partial
+from fastapi.testclient import TestClient
+from backend.app import main
+from backend.app.models import RiskLevel
+
+client = TestClient(main.app)
+
+def _create_alerts(count):
+    for i in range(count):
+        main.store.create_alert(
+            user_email="cam@example.com",
+            location="Kandivali",
+            risk_level=RiskLevel.HIGH,
+            risk_score=1.0,
+            file_name=f"clip{i}.mp4",
+            event_time_seconds=float(i),
+        )
+
+def test_reset_returns_one_page_and_a_cursor():
+    _create_alerts(main.ALERTS_PAGE_SIZE + 5)
+    data = client.get("/api/changes", params={"since": 0}).json()
+    assert data["reset"] is True
+    assert len(data["alerts"]) == main.ALERTS_PAGE_SIZE
+    assert data["alertsCursor"]
+
+    rest = client.get("/api/alerts", params={"cursor": data["alertsCursor"]}).json()
+    seen = {a["id"] for a in data["alerts"]}
+    assert rest["alerts"] and not seen & {a["id"] for a in rest["alerts"]}
+
+def test_etag_depends_on_the_area():
+    box = {"since": 0, "minLat": 19.0, "minLon": 72.0, "maxLat": 19.5, "maxLon": 73.0}
+    first = client.get("/api/changes", params=box)
+    etag = first.headers["ETag"]
+    assert client.get("/api/changes", params=box, headers={"If-None-Match": etag}).status_code == 304
+
+    moved = {**box, "minLat": 18.0}
+    res = client.get("/api/changes", params=moved, headers={"If-None-Match": etag})
+    assert res.status_code == 200
+    assert res.headers["ETag"] != etag
+
+class _Request:
+    headers = {}
+
+    async def is_disconnected(self):
+        return False
+
+def test_events_pick_up_changes_from_other_workers():
+    from backend.app.sqlite_storage import SqliteAlertStore
+
+    # A second store on the same database stands in for another uvicorn worker: its writes bypass main.change_feed.
+    other_worker = SqliteAlertStore(db_path=main.os.environ["SQLITE_PATH"])
+
+    async def run():
+        res = await main.stream_events(_Request(), since=0, epoch=None, area=main.MapArea())
+        events = res.body_iterator
+        assert (await events.__anext__()).startswith("id:")
+        alert = await main.run_in_threadpool(
+            partial(
+                other_worker.create_alert,
+                user_email="other@example.com",
+                location="Borivali",
+                risk_level=RiskLevel.MEDIUM,
+                risk_score=0.5,
+                file_name="other.mp4",
+                event_time_seconds=1.0,
+            )
+        )
+        event = await asyncio.wait_for(events.__anext__(), timeout=3)
+        await events.aclose()
+        return alert, event
+
+    alert, event = asyncio.run(run())
+    assert alert.id in event
+
+def test_alert_filters_compare_instants_not_offsets():
+    from datetime import datetime, timedelta, timezone
+
+    ist, est = timezone(timedelta(hours=5, minutes=30)), timezone(timedelta(hours=-5))
+    before = client.get("/api/alerts", params={"limit": 1000}).json()["alerts"]
+    _create_alerts(1)
+    now = datetime.now(timezone.utc)
+    hour_ago = (now - timedelta(hours=1)).astimezone(ist).isoformat()
+    ahead = (now + timedelta(minutes=5)).astimezone(est).isoformat()
+    assert len(client.get("/api/alerts", params={"since": hour_ago, "limit": 1000}).json()["alerts"]) == len(before) + 1
+    assert client.get("/api/alerts", params={"since": ahead}).json()["alerts"] == []
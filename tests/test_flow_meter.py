@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+
+from Crowd_Anomaly_Detection.flow_scorer import FlowMeter
+
+def _decoded_frames(tmp_path, count=6, width=640, height=360, shift=4):
+    # Encode a textured clip panning `shift` px per frame and decode it again, so measure() sees real video frames.
+    path = str(tmp_path / "pan.mp4")
+    rng = np.random.default_rng(0)
+    base = cv2.GaussianBlur(rng.integers(0, 255, (height, width, 3), dtype=np.uint8), (9, 9), 0)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), 25.0, (width, height))
+    for i in range(count):
+        writer.write(np.roll(base, i * shift, axis=1))
+    writer.release()
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while True:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frames.append(frame)
+    cap.release()
+    assert len(frames) == count
+    return frames
+
+def _reference(prev_bgr, frame_bgr, resize_width=320, threshold=1.0):
+    # The loop before buffer reuse: fresh arrays everywhere and cartToPolar.
+    def gray(f):
+        h, w = f.shape[:2]
+        return cv2.cvtColor(cv2.resize(f, (resize_width, int(h * resize_width / w)), interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+
+    flow = cv2.calcOpticalFlowFarneback(gray(prev_bgr), gray(frame_bgr), None, 0.5, 3, 15, 3, 5, 1.2, 0)
+    mag, _ang = cv2.cartToPolar(flow[..., 0], flow[..., 1])
+    return float(np.mean(mag)), float(np.mean(mag > threshold))
+
+def test_measure_on_decoded_frames(tmp_path):
+    frames = _decoded_frames(tmp_path)
+    meter = FlowMeter(resize_width=320)
+    assert meter.measure(frames[0]) is None
+    for prev, frame in zip(frames, frames[1:]):
+        mean_mag, active_ratio = meter.measure(frame)
+        ref_mag, ref_ratio = _reference(prev, frame)
+        # 4 px per frame at 640 wide is about 2 px at the 320 px flow resolution.
+        assert 1.0 < mean_mag < 3.0
+        assert mean_mag == pytest.approx(ref_mag, abs=1e-4)
+        assert active_ratio == pytest.approx(ref_ratio, abs=1e-3)
+
+def test_measure_with_initial_flow(tmp_path):
+    frames = _decoded_frames(tmp_path)
+    meter = FlowMeter(resize_width=320, use_initial_flow=True)
+    out = [meter.measure(frame) for frame in frames]
+    assert out[0] is None
+    assert all(1.0 < mean_mag < 3.0 and 0.0 < ratio <= 1.0 for mean_mag, ratio in out[1:])
+
+def test_measure_restarts_after_reset(tmp_path):
+    frames = _decoded_frames(tmp_path, count=3)
+    meter = FlowMeter(resize_width=320)
+    meter.measure(frames[0])
+    meter.measure(frames[1])
+    meter.reset()
+    assert meter.measure(frames[2]) is None
@@ -0,0 +1,88 @@
+import os
+import socket
+import threading
+import numpy as np
+import pytest
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from backend.app.inference_server import InferenceServer, RemoteModel, _authkey, _lock, create_authkey
+
+class _Doubler:
+    def predict_on_batch(self, batch):
+        return batch * 2
+
+class _TrackingServer(InferenceServer):
+    def __init__(self, model):
+        super().__init__(model, max_wait=0.0)
+        self.conns = []
+
+    def _handle(self, conn):
+        self.conns.append(conn)
+        super()._handle(conn)
+
+@pytest.fixture(autouse=True)
+def _no_shared_secret(monkeypatch):
+    monkeypatch.delenv("INFERENCE_AUTHKEY", raising=False)
+
+def _serve(tmp_path):
+    address = str(tmp_path / "inference.sock")
+    server = _TrackingServer(_Doubler())
+    listener = Listener(address, family="AF_UNIX", authkey=create_authkey(address))
+    threading.Thread(target=server.serve_forever, args=(listener,), daemon=True).start()
+    return address, server
+
+def test_remote_model_batches_through_the_server(tmp_path):
+    address, server = _serve(tmp_path)
+    model = RemoteModel(address, connect_timeout=5)
+    out = model.predict_on_batch(np.ones((3, 2), dtype=np.float32))
+    assert np.array_equal(out, np.full((3, 2), 2, dtype=np.float32))
+    model.close()
+    server.stop()
+
+def test_remote_model_reconnects_after_the_connection_drops(tmp_path):
+    address, server = _serve(tmp_path)
+    model = RemoteModel(address, connect_timeout=5)
+    model.predict_on_batch(np.ones((1, 2)))
+    # What a server restart looks like to the client: the connection is shut down under it.
+    for conn in server.conns:
+        with socket.fromfd(conn.fileno(), socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.shutdown(socket.SHUT_RDWR)
+    out = model.predict_on_batch(np.ones((2, 2)))
+    assert np.array_equal(out, np.full((2, 2), 2.0))
+    assert len(server.conns) == 2
+    model.close()
+    server.stop()
+
+def test_a_bad_handshake_does_not_stop_the_server(tmp_path):
+    address, server = _serve(tmp_path)
+    with pytest.raises(AuthenticationError):
+        Client(address, family="AF_UNIX", authkey=b"wrong")
+    model = RemoteModel(address, connect_timeout=5)
+    assert np.array_equal(model.predict_on_batch(np.ones((1, 2))), np.full((1, 2), 2.0))
+    model.close()
+    server.stop()
+
+def test_generated_key_is_private(tmp_path):
+    address = str(tmp_path / "inference.sock")
+    key = create_authkey(address)
+    assert os.stat(f"{address}.key").st_mode & 0o777 == 0o600
+    assert _authkey(address) == key
+    os.chmod(f"{address}.key", 0o644)
+    with pytest.raises(PermissionError):
+        _authkey(address)
+
+def test_lock_file_does_not_follow_symlinks(tmp_path):
+    address = str(tmp_path / "inference.sock")
+    target = tmp_path / "victim"
+    target.write_text("keep")
+    os.symlink(target, f"{address}.lock")
+    with pytest.raises(OSError):
+        _lock(address)
+    assert target.read_text() == "keep"
+
+def test_lock_allows_one_server_per_socket(tmp_path):
+    address = str(tmp_path / "inference.sock")
+    fd = _lock(address)
+    assert fd is not None
+    assert _lock(address) is None
+    os.close(fd)
@@ -0,0 +1,71 @@
+import os
+import signal
+import time
+import pytest
+from backend.app import jobs
+from backend.app.jobs import JobManager, JobQueueFull
+from backend.app.models import JobStatus
+
+def _ok(**kwargs):
+    return {"riskLevel": "NONE"}, {}
+
+def _slow(**kwargs):
+    time.sleep(1.0)
+    return _ok()
+
+def _die(**kwargs):
+    os.kill(os.getpid(), signal.SIGKILL)
+
+def _submit(manager):
+    return manager.submit(video_path="clip.mp4", analyzer="optical_flow", options={}, user_email="u@example.com", location="Kandivali", file_name="clip.mp4")
+
+def _wait(manager, job, statuses, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while manager.get(job.id).status not in statuses:
+        assert time.monotonic() < deadline, manager.get(job.id)
+        time.sleep(0.05)
+    return manager.get(job.id)
+
+@pytest.fixture
+def manager():
+    manager = JobManager(max_workers=1, max_queue=0, on_result=lambda job, result: result)
+    yield manager
+    manager.shutdown()
+
+def test_pool_recovers_after_a_worker_dies(manager, monkeypatch):
+    monkeypatch.setattr(jobs, "analyze_with_signal", _die)
+    failed = _wait(manager, _submit(manager), {JobStatus.FAILED, JobStatus.SUCCEEDED})
+    assert failed.status == JobStatus.FAILED
+
+    monkeypatch.setattr(jobs, "analyze_with_signal", _ok)
+    assert _wait(manager, _submit(manager), {JobStatus.FAILED, JobStatus.SUCCEEDED}).status == JobStatus.SUCCEEDED
+
+def test_submit_retries_on_a_broken_pool(manager, monkeypatch):
+    dead = manager._get_executor().submit(_die)
+    with pytest.raises(Exception):
+        dead.result(timeout=30)
+    monkeypatch.setattr(jobs, "analyze_with_signal", _ok)
+    assert _wait(manager, _submit(manager), {JobStatus.FAILED, JobStatus.SUCCEEDED}).status == JobStatus.SUCCEEDED
+
+def test_cancelling_a_running_job_keeps_it_active(manager, monkeypatch):
+    monkeypatch.setattr(jobs, "analyze_with_signal", _slow)
+    job = _wait(manager, _submit(manager), {JobStatus.RUNNING})
+    manager.cancel(job.id)
+    assert job.cancel_requested and job.status == JobStatus.RUNNING
+    with pytest.raises(JobQueueFull):
+        _submit(manager)
+    job = _wait(manager, job, {JobStatus.CANCELLED, JobStatus.SUCCEEDED, JobStatus.FAILED})
+    assert job.status == JobStatus.CANCELLED and job.result is None
+    _submit(manager)
+
+def test_cancelling_a_queued_job(monkeypatch):
+    manager = JobManager(max_workers=1, max_queue=2)
+    monkeypatch.setattr(jobs, "analyze_with_signal", _slow)
+    try:
+        # The pool hands max_workers + 1 calls to its workers up front; the third job is still only queued.
+        submitted = [_submit(manager) for _ in range(3)]
+        assert manager.cancel(submitted[2].id).status == JobStatus.CANCELLED
+        assert not submitted[2].cancel_requested
+        assert manager.stats()["active"] == 2
+    finally:
+        manager.shutdown()
@@ -0,0 +1,34 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from fastapi.testclient import TestClient
+from backend.app import main
+from backend.app.models import LocationPing
+from backend.app.sqlite_storage import SqliteLocationStore
+from backend.app.storage import LocationStore
+
+IST = timezone(timedelta(hours=5, minutes=30))
+EST = timezone(timedelta(hours=-5))
+
+def _ago(seconds, tz):
+    return (datetime.now(timezone.utc) - timedelta(seconds=seconds)).astimezone(tz)
+
+def test_batch_accepts_naive_timestamps():
+    naive = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=5)
+    res = TestClient(main.app).post("/api/locations/batch", json=[{"user_email": "naive@example.com", "latitude": 19.2, "longitude": 72.8, "timestamp": naive.isoformat()}])
+    assert res.status_code == 200
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_expiry_and_activity_ignore_the_ping_offset(tmp_path, backend):
+    if backend == "sqlite":
+        store = SqliteLocationStore(db_path=str(tmp_path / "app.db"), flush_interval=0, ttl_seconds=60, expire_interval=0)
+    else:
+        store = LocationStore(file_path=str(tmp_path / "locations.json"), flush_interval=0, ttl_seconds=60, expire_interval=0)
+    store.update_locations([
+        LocationPing(user_email="fresh-est@example.com", latitude=19.2, longitude=72.8, timestamp=_ago(10, EST)),
+        LocationPing(user_email="stale-ist@example.com", latitude=19.2, longitude=72.8, timestamp=_ago(120, IST)),
+        LocationPing(user_email="naive@example.com", latitude=19.2, longitude=72.8, timestamp=_ago(10, timezone.utc).replace(tzinfo=None)),
+    ])
+    active = {loc["user_email"] for loc in store.get_active_locations(max_age_seconds=60)}
+    assert active == {"fresh-est@example.com", "naive@example.com"}
+    assert store.expire() == 1
+    store.close()
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+
+from backend.app.analyzers import optical_flow, segments
+
+@pytest.fixture
+def clip(tmp_path):
+    path = str(tmp_path / "pan.mp4")
+    rng = np.random.default_rng(0)
+    base = cv2.GaussianBlur(rng.integers(0, 255, (120, 160, 3), dtype=np.uint8), (9, 9), 0)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), 25.0, (160, 120))
+    # Slow pan, then a fast one, so segments straddle a change in motion.
+    for i in range(90):
+        writer.write(np.roll(base, 2 * i if i < 45 else 90 + 6 * (i - 45), axis=1))
+    writer.release()
+    return path
+
+def test_parallel_segments_match_sequential(clip, monkeypatch):
+    monkeypatch.setattr(optical_flow, "MIN_SEGMENT_SAMPLES", 20)
+    options = {"process_fps": 12.5, "resize_width": 160}
+    sequential = list(optical_flow.iter_flow_signal(clip, **options))
+    parallel = list(optical_flow.iter_flow_signal(clip, parallel_segments=3, **options))
+    assert len(sequential) == 44
+    assert parallel == sequential
+
+def test_short_video_stays_sequential(clip, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("segments below MIN_SEGMENT_SAMPLES should not spawn workers")
+
+    monkeypatch.setattr(segments, "iter_segment_results", fail)
+    assert len(list(optical_flow.iter_flow_signal(clip, process_fps=12.5, resize_width=160, parallel_segments=3))) == 44
@@ -0,0 +1,25 @@
+import pytest
+from fastapi.testclient import TestClient
+from backend.app import main
+from backend.app.streams import check_source
+
+client = TestClient(main.app)
+
+@pytest.mark.parametrize("source", ["file:///etc/passwd", "FILE:/etc/passwd", "concat:a.mp4|b.mp4", "/dev/video0", "/etc", "rtsp://", "udp://0.0.0.0:1234"])
+def test_add_stream_rejects_local_and_unknown_sources(source):
+    res = client.post("/api/streams", json={"source": source, "userEmail": "cam@example.com"})
+    assert res.status_code == 400
+    assert main.stream_manager.list() == []
+
+def test_local_files_need_stream_allow_files(tmp_path):
+    clip = tmp_path / "clip.mp4"
+    clip.write_bytes(b"")
+    with pytest.raises(ValueError, match="STREAM_ALLOW_FILES"):
+        check_source(str(clip), allow_files=False)
+    check_source(str(clip), allow_files=True)
+    with pytest.raises(ValueError):
+        check_source(clip.as_uri(), allow_files=True)
+
+@pytest.mark.parametrize("source", ["0", "rtsp://cam.local:554/stream", "https://cam.local/video.mjpg", "rtmp://live.local/app/key"])
+def test_camera_sources_are_accepted(source):
+    check_source(source, allow_files=False)
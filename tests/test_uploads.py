@@ -0,0 +1,54 @@
+import hashlib
+from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi.testclient import TestClient
+from backend.app.uploads import UploadLimitMiddleware, UploadTooLarge, save_upload_streaming
+
+def _client(tmp_path, max_bytes):
+    app = FastAPI()
+    app.add_middleware(UploadLimitMiddleware, max_bytes=max_bytes, paths=["/upload"])
+    app.state.calls = 0
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        app.state.calls += 1
+        try:
+            saved = await save_upload_streaming(file, tmp_path / "out.bin", max_bytes=max_bytes, chunk_size=7)
+        except UploadTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        return {"size": saved.size_bytes, "sha256": saved.sha256}
+
+    return app, TestClient(app)
+
+def test_upload_is_copied_and_hashed(tmp_path):
+    _app, client = _client(tmp_path, max_bytes=1000)
+    data = b"x" * 100
+    res = client.post("/upload", files={"file": ("a.mp4", data)})
+    assert res.status_code == 200
+    assert res.json() == {"size": 100, "sha256": hashlib.sha256(data).hexdigest()}
+    assert (tmp_path / "out.bin").read_bytes() == data
+    assert not (tmp_path / "out.bin.part").exists()
+
+def test_oversized_content_length_rejected_before_the_endpoint(tmp_path):
+    app, client = _client(tmp_path, max_bytes=10)
+    res = client.post("/upload", content=b"x" * (2 * 1024 * 1024), headers={"Content-Type": "multipart/form-data; boundary=b"})
+    assert res.status_code == 413
+    assert app.state.calls == 0
+
+def test_oversized_chunked_body_rejected_while_receiving(tmp_path):
+    app, client = _client(tmp_path, max_bytes=10)
+
+    def body():
+        for _ in range(4):
+            yield b"x" * (512 * 1024)
+
+    res = client.post("/upload", content=body(), headers={"Content-Type": "multipart/form-data; boundary=b"})
+    assert res.status_code == 413
+    assert app.state.calls == 0
+
+def test_file_over_limit_within_form_overhead(tmp_path):
+    app, client = _client(tmp_path, max_bytes=10)
+    res = client.post("/upload", files={"file": ("a.mp4", b"x" * 11)})
+    assert res.status_code == 413
+    assert app.state.calls == 1
+    assert not (tmp_path / "out.bin").exists()
+    assert not (tmp_path / "out.bin.part").exists()